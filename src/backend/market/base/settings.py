@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
     'rest_framework.authtoken',
@@ -59,6 +60,7 @@ INSTALLED_APPS = [
     'users',
     'orders',
     'products',
+    'reports',
     'utils',
 
     'drf_spectacular'
@@ -68,6 +70,7 @@ INSTALLED_APPS = [
 SITE_ID = 1
 
 MIDDLEWARE = [
+    'utils.health.HealthCheckMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -103,7 +106,8 @@ WSGI_APPLICATION = 'base.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-if 'pytest' in sys.argv[0] or env('DB_TYPE') == 'sqlite3':
+# Tests run on sqlite, `DB_TYPE=postgresql pytest` runs them on postgres together with the query plan tests
+if env('DB_TYPE', default='sqlite3' if 'pytest' in sys.argv[0] else None) == 'sqlite3':
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
@@ -119,10 +123,42 @@ else:
             'PASSWORD': env('PG_PASSWORD'),
             'HOST': env("PG_HOST"),
             'PORT': env('PG_PORT'),
+            'OPTIONS': {
+                # seconds, an unreachable server fails requests and the readiness probe instead of hanging them
+                'connect_timeout': env.int('PG_CONNECT_TIMEOUT', default=5),
+            },
         }
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/#redis
+
+# Redis for the data kept out of the database: baskets of the redis basket backend
+REDIS_URL = env('REDIS_URL', default='redis://redis:6379/1')
+
+if 'pytest' in sys.argv[0] or not env('REDIS_URL', default=None):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': env('REDIS_URL'),
+        }
+    }
+
+# Seconds to keep cached catalog responses, they are invalidated on every write anyway
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+# Seconds to keep authenticated users of tokens, they are invalidated on logout and user changes anyway
+AUTH_TOKEN_CACHE_TIMEOUT = env.int('AUTH_TOKEN_CACHE_TIMEOUT', default=5 * 60)
+# Seconds of signed access tokens, catalog reads authenticated by them are not checked against the revocation list
+SIGNED_ACCESS_TOKEN_LIFETIME = env.int('SIGNED_ACCESS_TOKEN_LIFETIME', default=5 * 60)
+SIGNED_REFRESH_TOKEN_LIFETIME = env.int('SIGNED_REFRESH_TOKEN_LIFETIME', default=24 * 60 * 60)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
@@ -141,6 +177,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded files, must be shared between backend and celery workers
+MEDIA_URL = 'media/'
+MEDIA_ROOT = env('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -149,8 +189,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
-
+        'users.authentication.CachedTokenAuthentication',
+        'users.authentication.SignedTokenAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -159,14 +199,16 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'utils.throttling.AnonRateThrottle',
+        'utils.throttling.UserRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/min',
         'user': '1000/day',
-        'shop_import': '10/min',
-        'shop_export': '10/min',
+        # token buckets: capacity per refill period, see `TokenBucketThrottle`
+        'shop_import': '100/hour',
+        'shop_export': '100/hour',
+        'basket_bulk': '1000/hour',
         'dj_rest_auth': '100/min'
     },
     'DEFAULT_RENDERER_CLASSES': [
@@ -174,6 +216,89 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Throttles keep their counters in redis, so the limits are shared by all the processes, see `utils.throttling`
+THROTTLE_REDIS = 'pytest' not in sys.argv[0] and bool(env('REDIS_URL', default=None))
+# Seconds to connect and to wait for redis, then the throttle fails open
+THROTTLE_REDIS_TIMEOUT = env.float('THROTTLE_REDIS_TIMEOUT', default=0.1)
+
+
+# HEALTH CHECKS, see `utils.health`
+# Seconds to keep results of the readiness probe of the database, redis and the celery broker in the process
+READINESS_CACHE_TIMEOUT = env.int('READINESS_CACHE_TIMEOUT', default=5)
+# Seconds to wait for every dependency of the readiness probe
+READINESS_CHECK_TIMEOUT = env.int('READINESS_CHECK_TIMEOUT', default=1)
+
+
+# SHOPS
+# Number of price list rows written by one bulk upsert
+SHOP_IMPORT_CHUNK_SIZE = 1000
+# Number of row errors stored in a background import job
+SHOP_IMPORT_MAX_ERRORS = 100
+# Number of product's details fetched from the server-side cursor at once by the export
+SHOP_EXPORT_CHUNK_SIZE = 2000
+# Import spends a token of the shop's quota per this number of bytes of the price list
+SHOP_QUOTA_BYTES_PER_TOKEN = 1024 * 1024
+# Export spends a token of the shop's quota per this number of product's details
+SHOP_QUOTA_ROWS_PER_TOKEN = 1000
+
+
+# Text search configuration of the product search, 'simple' does not stem mixed russian and english names
+PRODUCT_SEARCH_CONFIG = 'simple'
+
+
+# BASKETS
+# 'orders.baskets.DatabaseBasket' keeps the basket as an order with the basket status,
+# 'orders.baskets.RedisBasket' keeps basket lines in redis and creates the order on confirmation
+BASKET_BACKEND = env('BASKET_BACKEND', default='orders.baskets.DatabaseBasket')
+# Seconds to keep an untouched redis basket
+BASKET_TTL = env.int('BASKET_TTL', default=60 * 60 * 24 * 14)
+
+
+# ORDERS ARCHIVE
+# Delivered and cancelled orders older than this number of days are moved to the archive tables
+ORDER_ARCHIVE_AFTER_DAYS = env.int('ORDER_ARCHIVE_AFTER_DAYS', default=180)
+# Orders moved to the archive in one transaction
+ORDER_ARCHIVE_BATCH_SIZE = env.int('ORDER_ARCHIVE_BATCH_SIZE', default=500)
+
+
+# SALES REPORTS
+# Seconds of order changes before the start of the last rollup run which are rolled up again
+SALES_ROLLUP_OVERLAP = env.int('SALES_ROLLUP_OVERLAP', default=5 * 60)
+# Days of sales rebuilt in one transaction
+SALES_ROLLUP_DAYS_PER_BATCH = env.int('SALES_ROLLUP_DAYS_PER_BATCH', default=31)
+
+
+# IDEMPOTENCY
+# Seconds to keep responses of requests with the `Idempotency-Key` header for retries
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', default=60 * 60 * 24)
+# Seconds a request in progress holds its key, it must be longer than any request with the key
+IDEMPOTENCY_KEY_LEASE = env.int('IDEMPOTENCY_KEY_LEASE', default=60)
+
+
+# CELERY
+# https://docs.celeryq.dev/en/v4.4.1/django/first-steps-with-django.html
+CELERY_BROKER_URL = env('BROKER_URL', default='redis://redis:6379/0')
+CELERY_RESULT_BACKEND = env('CELERY_RESULT_BACKEND', default=CELERY_BROKER_URL)
+CELERY_ACCEPT_CONTENT = ['application/json']
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_RESULT_SERIALIZER = 'json'
+CELERY_TASK_ALWAYS_EAGER = 'pytest' in sys.argv[0]
+# Periodic tasks of `celery beat`, schedules are in seconds
+CELERY_BEAT_SCHEDULE = {
+    'purge-idempotency-keys': {
+        'task': 'utils.tasks.purge_idempotency_keys',
+        'schedule': 60 * 60,
+    },
+    'archive-closed-orders': {
+        'task': 'orders.tasks.archive_closed_orders',
+        'schedule': 60 * 60 * 24,
+    },
+    'update-sales-reports': {
+        'task': 'reports.tasks.update_sales_reports',
+        'schedule': 15 * 60,
+    },
+}
+
 
 # SPECTACULAR
 SPECTACULAR_SETTINGS = {
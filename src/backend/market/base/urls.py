@@ -26,7 +26,7 @@ urlpatterns = [
     path('api/v1/', include('users.urls')),
     path('api/v1/', include('products.urls')),
     path('api/v1/', include('orders.urls')),
-    path('', include('utils.urls')),
+    path('api/v1/', include('reports.urls')),
 
     path('api/v1/auth/', include('dj_rest_auth.urls')),
     path(
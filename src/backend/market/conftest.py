@@ -0,0 +1,61 @@
+import re
+
+import pytest
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Throttling history is kept in the cache, clear it between tests.
+    """
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def assert_no_seq_scan(db):
+    """
+    Check plans of the queries which read the tables: `EXPLAIN` is run on postgres with sequential scans
+    disabled, so a sequential scan in the plan means that no index can serve the query.
+    Tables of a few test rows would be scanned anyway otherwise. Skipped on sqlite.
+    """
+    if connection.vendor != 'postgresql':
+        pytest.skip('Query plans are checked on postgres: DB_TYPE=postgresql pytest')
+
+    def explain(sql):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def func(run, *tables):
+        with CaptureQueriesContext(connection) as context:
+            result = run()
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and any(f'"{table}"' in query['sql'] for table in tables)
+        ]
+        assert queries, f'No queries of {tables}'
+        for sql in queries:
+            plan = explain(sql)
+            for table in tables:
+                assert not re.search(rf'Seq Scan on {table}\b', plan), f'{sql}\n{plan}'
+        return result
+    return func
+
+
+@pytest.fixture
+def redis_client():
+    """Client of `REDIS_URL` for the lua scripts, skipped without a redis server."""
+    client = redis.Redis.from_url(settings.REDIS_URL, socket_connect_timeout=1)
+    try:
+        client.ping()
+    except redis.RedisError:
+        pytest.skip('Lua scripts are checked on redis: REDIS_URL=redis://localhost:6379/1 pytest')
+    return client
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from orders.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatus
+from orders.signals import archiving
+
+# Orders in these statuses never change, so they are moved to the archive
+ARCHIVED_STATUSES = (OrderStatus.DELIVERED, OrderStatus.CANCELLED)
+
+
+def get_archive_cutoff():
+    return timezone.now() - timedelta(days=settings.ORDER_ARCHIVE_AFTER_DAYS)
+
+
+@transaction.atomic
+def archive_order_batch(cutoff, batch_size):
+    """
+    Move a batch of closed orders created before the cutoff with their items to the archive tables.
+    Rows are copied with bulk inserts and removed with set-based deletes in one transaction,
+    locked rows are skipped, so the mover does not wait for requests. Return the number of moved orders.
+    """
+    orders = list(
+        Order.objects.select_for_update(skip_locked=True).filter(
+            status__in=ARCHIVED_STATUSES, created_at__lt=cutoff
+        ).order_by('pk')[:batch_size]
+    )
+    if not orders:
+        return 0
+
+    ArchivedOrder.objects.bulk_create([
+        ArchivedOrder(
+            id=order.pk, owner_id=order.owner_id, status=order.status, created_at=order.created_at,
+            updated_at=order.updated_at, amount=order.amount
+        ) for order in orders
+    ])
+    items = OrderItem.objects.filter(order__in=orders)
+    ArchivedOrderItem.objects.bulk_create([
+        ArchivedOrderItem(**item) for item in items.values('id', 'order_id', 'product_info_id', 'quantity', 'price')
+    ])
+
+    # without the receivers both deletes are single queries, sub-orders of the moved orders are kept
+    with archiving():
+        items.delete()
+        Order.objects.filter(pk__in=[order.pk for order in orders]).delete()
+    return len(orders)
+
+
+def archive_orders(cutoff=None, batch_size=None):
+    """Move all closed orders older than `ORDER_ARCHIVE_AFTER_DAYS` to the archive batch by batch."""
+    cutoff = cutoff or get_archive_cutoff()
+    batch_size = batch_size or settings.ORDER_ARCHIVE_BATCH_SIZE
+    moved = 0
+    while count := archive_order_batch(cutoff, batch_size):
+        moved += count
+        if count < batch_size:
+            break
+    return moved
@@ -0,0 +1,184 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.module_loading import import_string
+
+from orders.models import Order, OrderItem, OrderStatus
+from orders.totals import update_order_amounts
+from products.models import ProductInfo, ProductParameter
+from utils.redis import get_redis
+
+
+def get_basket(user):
+    """Basket of the user in the storage of `BASKET_BACKEND`."""
+    return import_string(settings.BASKET_BACKEND)(user)
+
+
+def _with_details(queryset):
+    """Product's details of basket items are rendered in full."""
+    return queryset.select_related('product__category').prefetch_related(
+        Prefetch('product_parameters', queryset=ProductParameter.objects.select_related('parameter'))
+    )
+
+
+class DatabaseBasket:
+    """
+    Basket as an order with the basket status. Items are identified by the ids of order items.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._order = None
+
+    def get_order(self):
+        """Order of the basket, it is created on the first access."""
+        if self._order is None:
+            self._order, _ = Order.objects.get_or_create(status=OrderStatus.BASKET, owner=self.user)
+        return self._order
+
+    def items(self):
+        return self.get_order().order_items.select_related('product_info__product__category').prefetch_related(
+            Prefetch(
+                'product_info__product_parameters',
+                queryset=ProductParameter.objects.select_related('parameter')
+            )
+        ).order_by('id')
+
+    def get_item(self, pk):
+        try:
+            return self.items().filter(pk=int(pk)).first()
+        except (TypeError, ValueError):
+            return None
+
+    def add(self, product_info, quantity):
+        return OrderItem.objects.create(order=self.get_order(), product_info=product_info, quantity=quantity)
+
+    def update(self, item, product_info, quantity):
+        item.product_info = product_info
+        item.quantity = quantity
+        item.save()
+        return item
+
+    def remove(self, item):
+        item.delete()
+
+    @transaction.atomic
+    def apply(self, lines):
+        """Set quantities by product's details ids, zero quantity removes the item."""
+        order = self.get_order()
+
+        removed = [pk for pk, quantity in lines.items() if not quantity]
+        if removed:
+            order.order_items.filter(product_info_id__in=removed).delete()
+
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(order=order, product_info_id=pk, quantity=quantity)
+                for pk, quantity in lines.items() if quantity
+            ],
+            update_conflicts=True,
+            unique_fields=['order', 'product_info'],
+            update_fields=['quantity'],
+        )
+        # bulk insert does not send signals
+        update_order_amounts([order.pk])
+
+    def checkout(self):
+        """Order with the basket items to be confirmed."""
+        return self.get_order()
+
+    def clear(self):
+        """Order of the basket becomes the confirmed order, nothing to clear."""
+
+
+class RedisBasket(DatabaseBasket):
+    """
+    Basket lines in a redis hash `basket:<user id>` of product's details ids and quantities.
+
+    Basket views do not touch the orders table, the hash expires after `BASKET_TTL` seconds
+    of inactivity. The order is created only on checkout. Items are identified by the ids
+    of their product's details.
+    """
+    key_prefix = 'basket'
+
+    def __init__(self, user, client=None):
+        super().__init__(user)
+        self.client = client or get_redis()
+        self.key = f'{self.key_prefix}:{user.pk}'
+
+    def _write(self, remove=(), lines=None):
+        pipe = self.client.pipeline()
+        if remove:
+            pipe.hdel(self.key, *remove)
+        if lines:
+            pipe.hset(self.key, mapping=lines)
+        pipe.expire(self.key, settings.BASKET_TTL)
+        pipe.execute()
+
+    def get_lines(self):
+        return {int(pk): int(quantity) for pk, quantity in self.client.hgetall(self.key).items()}
+
+    def _items(self, lines):
+        infos = _with_details(ProductInfo.objects.filter(pk__in=lines)).in_bulk()
+        deleted = [pk for pk in lines if pk not in infos]
+        if deleted:
+            self._write(remove=deleted)
+        return [
+            OrderItem(product_info=infos[pk], quantity=quantity)
+            for pk, quantity in sorted(lines.items()) if pk in infos
+        ]
+
+    def items(self):
+        return self._items(self.get_lines())
+
+    def get_item(self, pk):
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return None
+        quantity = self.client.hget(self.key, pk)
+        if quantity is None:
+            return None
+        items = self._items({pk: int(quantity)})
+        return items[0] if items else None
+
+    def add(self, product_info, quantity):
+        self._write(lines={product_info.pk: quantity})
+        return OrderItem(product_info=product_info, quantity=quantity)
+
+    def update(self, item, product_info, quantity):
+        remove = [item.product_info_id] if item.product_info_id != product_info.pk else []
+        self._write(remove=remove, lines={product_info.pk: quantity})
+        return OrderItem(product_info=product_info, quantity=quantity)
+
+    def remove(self, item):
+        self._write(remove=[item.product_info_id])
+
+    def apply(self, lines):
+        self._write(
+            remove=[pk for pk, quantity in lines.items() if not quantity],
+            lines={pk: quantity for pk, quantity in lines.items() if quantity},
+        )
+
+    def checkout(self):
+        """
+        Order with the basket status and items of the redis basket added to the items created
+        by the orders api. Must be called in the transaction which confirms the order,
+        the basket is cleared after the confirmation.
+        """
+        order = self.get_order()
+        lines = self.get_lines()
+        found = set(ProductInfo.objects.filter(pk__in=lines).values_list('pk', flat=True))
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(order=order, product_info_id=pk, quantity=quantity)
+                for pk, quantity in lines.items() if pk in found
+            ],
+            update_conflicts=True,
+            unique_fields=['order', 'product_info'],
+            update_fields=['quantity'],
+        )
+        return order
+
+    def clear(self):
+        self.client.delete(self.key)
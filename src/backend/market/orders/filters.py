@@ -1,7 +1,7 @@
 from django_filters import rest_framework as filters, DateTimeFromToRangeFilter
 from rest_framework.filters import BaseFilterBackend
 
-from orders.models import Order, OrderStatus
+from orders.models import ArchivedOrder, Order, OrderStatus, ShopOrder
 
 
 class OrderFilter(filters.FilterSet):
@@ -17,6 +17,37 @@ class OrderFilter(filters.FilterSet):
         fields = ['status', 'created_at', 'updated_at', 'amount']
 
 
+class ArchivedOrderFilter(OrderFilter):
+    """
+    Фильтры для архивных заказов.
+    """
+
+    class Meta(OrderFilter.Meta):
+        model = ArchivedOrder
+
+
+class ShopOrderFilter(filters.FilterSet):
+    """
+    Фильтры для заказов магазинов.
+    """
+
+    created_at = DateTimeFromToRangeFilter()
+
+    class Meta:
+        model = ShopOrder
+        fields = ['status', 'shop', 'created_at']
+
+
+class ShopOrderListFilterBackend(BaseFilterBackend):
+    """
+    Suppliers see the orders of their shop, admins see the orders of all shops.
+    """
+    def filter_queryset(self, request, queryset, view):
+        if request.user.is_staff:
+            return queryset
+        return queryset.filter(shop__owner=request.user)
+
+
 class OrderListFilterBackend(BaseFilterBackend):
     """
     Filter that only allows users to see their own objects and allows admins to see all objects.
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.11 on 2026-10-18 00:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0007_productcard'),
+        ('orders', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('status', models.TextField(choices=[('NEW', 'Новый'), ('BASKET', 'Корзина'), ('CONFIRMED', 'Подтвержден'), ('ASSEMBLED', 'Собран'), ('SENT', 'Отправлен'), ('DELIVERED', 'Доставлен'), ('CANCELLED', 'Отменен')], verbose_name='Статус')),
+                ('created_at', models.DateTimeField(db_index=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(verbose_name='Дата обновления')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Сумма')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата переноса в архив')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Архивный заказ',
+                'verbose_name_plural': 'Архив заказов',
+                'ordering': ('-created_at',),
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField(default=1, verbose_name='Quantity')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_items', to='orders.archivedorder', verbose_name='Order')),
+                ('product_info', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_order_items', to='products.productinfo', verbose_name="Product's details")),
+            ],
+            options={
+                'verbose_name': 'Архивная позиция заказа',
+                'verbose_name_plural': 'Список архивных позиций заказов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['owner', 'created_at'], name='archived_order_owner_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.11 on 2026-10-18 00:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def split_confirmed_orders(apps, schema_editor):
+    """Sub-orders of the orders confirmed before the split, created at the creation time of the orders."""
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    ShopOrder = apps.get_model('orders', 'ShopOrder')
+    rows = OrderItem.objects.exclude(order__status='BASKET').order_by().values(
+        'order_id', 'order__status', 'order__created_at', 'product_info__shop_id'
+    ).annotate(
+        amount=models.Sum(
+            models.F('quantity') * models.F('product_info__price'),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2)
+        )
+    )
+    ShopOrder.objects.bulk_create([
+        ShopOrder(
+            order_id=row['order_id'], shop_id=row['product_info__shop_id'], status=row['order__status'],
+            amount=row['amount'], created_at=row['order__created_at']
+        ) for row in rows.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_productcard'),
+        ('orders', '0004_archivedorder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShopOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.TextField(choices=[('NEW', 'Новый'), ('BASKET', 'Корзина'), ('CONFIRMED', 'Подтвержден'), ('ASSEMBLED', 'Собран'), ('SENT', 'Отправлен'), ('DELIVERED', 'Доставлен'), ('CANCELLED', 'Отменен')], verbose_name='Статус')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Сумма')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shop_orders', to='orders.order', verbose_name='Order')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shop_orders', to='products.shop', verbose_name='Shop')),
+            ],
+            options={
+                'verbose_name': 'Заказ магазина',
+                'verbose_name_plural': 'Список заказов магазинов',
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['shop', 'status', 'created_at', 'id'], name='shop_order_queue_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoporder',
+            constraint=models.UniqueConstraint(fields=('order', 'shop'), name='unique_shop_order'),
+        ),
+        migrations.RunPython(split_confirmed_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.11 on 2026-10-18 00:55
+
+from django.db import migrations, models
+
+
+def merge_duplicate_baskets(apps, schema_editor):
+    """Items of older baskets of the owner are moved to the newest basket, then older baskets are deleted."""
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    owners = Order.objects.filter(status='BASKET').values('owner_id').annotate(
+        count=models.Count('id')
+    ).filter(count__gt=1).values_list('owner_id', flat=True)
+    for owner_id in owners:
+        kept, *duplicates = Order.objects.filter(status='BASKET', owner_id=owner_id).order_by('-created_at', '-id')
+        for duplicate in duplicates:
+            existing = OrderItem.objects.filter(order=kept).values('product_info_id')
+            OrderItem.objects.filter(order=duplicate).exclude(product_info_id__in=existing).update(order=kept)
+            duplicate.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_shoporder'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['owner', 'status', 'created_at', 'id'], name='order_owner_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['owner', 'created_at', 'id'], name='order_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'BASKET'), _negated=True), fields=['created_at', 'id'], name='order_placed_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='order_status_created_idx'),
+        ),
+        migrations.RunPython(merge_duplicate_baskets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'BASKET')), fields=('owner',), name='unique_basket_per_owner'),
+        ),
+    ]
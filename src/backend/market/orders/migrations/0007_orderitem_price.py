@@ -0,0 +1,33 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:17
+
+from django.db import migrations, models
+
+
+def fill_item_prices(apps, schema_editor):
+    """Prices of the confirmation of placed orders are not known, items take the current prices."""
+    ProductInfo = apps.get_model('products', 'ProductInfo')
+    price = models.Subquery(ProductInfo.objects.filter(pk=models.OuterRef('product_info_id')).values('price'))
+    apps.get_model('orders', 'OrderItem').objects.exclude(order__status='BASKET').update(price=price)
+    apps.get_model('orders', 'ArchivedOrderItem').objects.update(price=price)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_order_indexes'),
+        ('products', '0008_productinfo_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedorderitem',
+            name='price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Цена'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Цена'),
+        ),
+        migrations.RunPython(fill_item_prices, migrations.RunPython.noop),
+    ]
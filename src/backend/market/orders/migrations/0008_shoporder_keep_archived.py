@@ -0,0 +1,30 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fix_shop_order_amounts(apps, schema_editor):
+    """Sub-orders of orders of one shop take the amount of the order fixed on the confirmation."""
+    Order = apps.get_model('orders', 'Order')
+    ShopOrder = apps.get_model('orders', 'ShopOrder')
+    single = ShopOrder.objects.order_by().values('order_id').annotate(shops=models.Count('id')).filter(shops=1)
+    ShopOrder.objects.filter(order_id__in=single.values('order_id')).filter(
+        order_id__in=Order.objects.values('pk')
+    ).update(amount=models.Subquery(Order.objects.filter(pk=models.OuterRef('order_id')).values('amount')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_orderitem_price'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='shoporder',
+            name='order',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='shop_orders', to='orders.order', verbose_name='Order'),
+        ),
+        migrations.RunPython(fix_shop_order_amounts, migrations.RunPython.noop),
+    ]
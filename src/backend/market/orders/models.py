@@ -1,8 +1,9 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from products.models import ProductInfo
+from products.models import ProductInfo, Shop
 
 
 class OrderStatus(models.TextChoices):
@@ -24,6 +25,22 @@ class Order(models.Model):
         verbose_name = 'Заказ'
         verbose_name_plural = "Список заказов"
         ordering = ('-created_at',)
+        constraints = [
+            # basket of the user is found by this index, concurrent `get_or_create` can not make a second basket
+            models.UniqueConstraint(
+                fields=['owner'], condition=models.Q(status='BASKET'), name='unique_basket_per_owner'
+            ),
+        ]
+        indexes = [
+            # orders of the owner with the keyset pagination, optionally filtered by status
+            models.Index(fields=['owner', 'status', 'created_at', 'id'], name='order_owner_status_idx'),
+            models.Index(fields=['owner', 'created_at', 'id'], name='order_owner_created_idx'),
+            # staff list of placed orders and its status filter
+            models.Index(
+                fields=['created_at', 'id'], condition=~models.Q(status='BASKET'), name='order_placed_created_idx'
+            ),
+            models.Index(fields=['status', 'created_at', 'id'], name='order_status_created_idx'),
+        ]
 
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -98,4 +115,150 @@ class OrderItem(models.Model):
     quantity = models.PositiveIntegerField(
         verbose_name=_("Quantity"),
         default=1,
-    )
\ No newline at end of file
+    )
+
+    # Price of the confirmation, items of baskets follow the current price, see `orders.totals`
+    price = models.DecimalField(
+        null=True,
+        blank=True,
+        max_digits=12,
+        decimal_places=2,
+        verbose_name='Цена',
+    )
+
+
+class ShopOrder(models.Model):
+    """
+    Часть подтвержденного заказа с позициями одного магазина, см. `orders.splits`.
+    Статус повторяет статус заказа.
+    """
+
+    class Meta:
+        verbose_name = 'Заказ магазина'
+        verbose_name_plural = "Список заказов магазинов"
+        ordering = ('-created_at',)
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'shop'], name='unique_shop_order'),
+        ]
+        indexes = [
+            # queue of the shop by status, primary key is the tie-breaker of the keyset pagination
+            models.Index(fields=['shop', 'status', 'created_at', 'id'], name='shop_order_queue_idx'),
+        ]
+
+    # Order keeps its id in the archive, so sub-orders of archived orders are kept without the constraint
+    order = models.ForeignKey(
+        Order,
+        verbose_name=_('Order'),
+        related_name='shop_orders',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+    )
+
+    shop = models.ForeignKey(
+        Shop,
+        verbose_name=_('Shop'),
+        related_name='shop_orders',
+        on_delete=models.CASCADE
+    )
+
+    status = models.TextField(
+        choices=OrderStatus.choices,
+        verbose_name='Статус',
+    )
+
+    amount = models.DecimalField(
+        default=0,
+        max_digits=12,
+        decimal_places=2,
+        verbose_name='Сумма',
+    )
+
+    # Time of the confirmation of the order
+    created_at = models.DateTimeField(default=timezone.now, verbose_name='Дата создания')
+
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
+
+    def __str__(self):
+        return f'{self.shop_id}: {self.status}, {self.amount}'
+
+
+class ArchivedOrder(models.Model):
+    """
+    Закрытые заказы, перенесенные из таблицы заказов, см. `orders.archive`.
+    Заказ сохраняет свой id, поэтому ссылки на него остаются верными.
+    """
+
+    class Meta:
+        verbose_name = 'Архивный заказ'
+        verbose_name_plural = "Архив заказов"
+        ordering = ('-created_at',)
+        indexes = [
+            models.Index(fields=['owner', 'created_at'], name='archived_order_owner_idx'),
+        ]
+
+    id = models.BigIntegerField(primary_key=True)
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name='Пользователь',
+        related_name='archived_orders',
+        on_delete=models.CASCADE
+    )
+
+    status = models.TextField(
+        choices=OrderStatus.choices,
+        verbose_name='Статус',
+    )
+
+    created_at = models.DateTimeField(db_index=True, verbose_name='Дата создания')
+
+    updated_at = models.DateTimeField(verbose_name='Дата обновления')
+
+    amount = models.DecimalField(
+        default=0,
+        max_digits=12,
+        decimal_places=2,
+        verbose_name='Сумма',
+    )
+
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата переноса в архив')
+
+    def __str__(self):
+        return f'{self.status}, {self.amount} - {self.created_at}'
+
+
+class ArchivedOrderItem(models.Model):
+
+    class Meta:
+        verbose_name = 'Архивная позиция заказа'
+        verbose_name_plural = "Список архивных позиций заказов"
+
+    id = models.BigIntegerField(primary_key=True)
+
+    order = models.ForeignKey(
+        ArchivedOrder,
+        verbose_name=_('Order'),
+        related_name='order_items',
+        on_delete=models.CASCADE
+    )
+
+    product_info = models.ForeignKey(
+        ProductInfo,
+        verbose_name=_("Product's details"),
+        related_name='archived_order_items',
+        on_delete=models.CASCADE
+    )
+
+    quantity = models.PositiveIntegerField(
+        verbose_name=_("Quantity"),
+        default=1,
+    )
+
+    # Price of the confirmation, items of baskets follow the current price, see `orders.totals`
+    price = models.DecimalField(
+        null=True,
+        blank=True,
+        max_digits=12,
+        decimal_places=2,
+        verbose_name='Цена',
+    )
@@ -1,13 +1,18 @@
+from django.db import transaction
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers, status
-from rest_framework.exceptions import MethodNotAllowed
 
-from orders.models import OrderItem, Order, OrderStatus
+from orders.baskets import get_basket
+from orders.models import OrderItem, Order, OrderStatus, ShopOrder
+from orders.totals import update_order_amounts
+from orders.transitions import BULK_STATUSES, transit
 from products.models import ProductInfo
 from products.serializers import ProductInfoSerializer
 from users.serializers import UserSerializer
+from utils.sparse import SparseFieldsMixin
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
 
     product_info = ProductInfoSerializer(read_only=True)
     product_info_id = serializers.PrimaryKeyRelatedField(required=True, queryset=ProductInfo.objects.all(), write_only=True)
@@ -17,18 +22,17 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = ('product_info', 'quantity', 'product_info_id',)
 
     def create(self, validated_data):
-        # Как только пользователь решит добавить экземпляр в корзине создаем заказ со статусом корзины.
-        # Далее используем заказ как корзину пока пользователь не подтвердит заказ
-        order, _ = Order.objects.get_or_create(status=OrderStatus.BASKET, owner=self.context['request'].user)
-        product_info = validated_data.pop('product_info_id')
-        instance = OrderItem.objects.create(order=order, product_info=product_info, **validated_data)
-        return instance
+        # Позиции хранятся в корзине пользователя, см. `orders.baskets`
+        basket = get_basket(self.context['request'].user)
+        return basket.add(validated_data['product_info_id'], validated_data.get('quantity', 1))
 
     def update(self, instance, validated_data):
-        product_info_id = validated_data.pop('product_info_id', False)
-        if product_info_id:
-            validated_data['product_info'] = product_info_id
-        return super().update(instance, validated_data)
+        basket = get_basket(self.context['request'].user)
+        return basket.update(
+            instance,
+            validated_data.get('product_info_id', instance.product_info),
+            validated_data.get('quantity', instance.quantity),
+        )
 
     def validate_product_info_id(self, data):
         if data.quantity == 0:
@@ -36,7 +40,41 @@ class OrderItemSerializer(serializers.ModelSerializer):
         return data
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class BasketItemBulkListSerializer(serializers.ListSerializer):
+    """
+    Операции над позициями корзины одним запросом: все товары проверяются одним запросом `IN`,
+    позиции с нулевым количеством удаляются, остальные добавляются или обновляются одним upsert.
+    """
+
+    def validate(self, attrs):
+        # последняя операция над тем же товаром побеждает
+        lines = {item['product_info_id']: item['quantity'] for item in attrs}
+        stock = dict(ProductInfo.objects.filter(pk__in=lines).values_list('pk', 'quantity'))
+
+        errors = [f'Товар {pk} не найден' for pk in lines if pk not in stock]
+        errors += [f'Товар {pk} закончился' for pk, quantity in lines.items() if quantity and stock.get(pk) == 0]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        basket = get_basket(self.context['request'].user)
+        basket.apply({item['product_info_id']: item['quantity'] for item in validated_data})
+        return basket
+
+
+class BasketItemBulkSerializer(serializers.Serializer):
+    """
+    Serializer операции над позицией корзины, нулевое количество удаляет позицию.
+    """
+    product_info_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=0)
+
+    class Meta:
+        list_serializer_class = BasketItemBulkListSerializer
+
+
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer для заказа.
     """
@@ -72,52 +110,37 @@ class OrderSerializer(serializers.ModelSerializer):
         # Так как двух корзин у пользователя быть не может
         order, _ = Order.objects.get_or_create(status=OrderStatus.BASKET, owner=self.context['request'].user)
         order_items = validated_data.pop('order_items')
-        for item in order_items:
-            order.amount += item['product_info_id'].price * item.get('quantity', 1)
-            item['product_info'] = item.pop('product_info_id')
-            OrderItem.objects.create(order=order, **item)
-
-        order.save()
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_info=item['product_info_id'], quantity=item.get('quantity', 1))
+            for item in order_items
+        ])
+        update_order_amounts([order.pk])
+        order.refresh_from_db(fields=['amount', 'updated_at'])
 
         return order
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Метод для обновления заказа."""
 
         order_items_data = validated_data.get('order_items')
         status = validated_data.get('status')
 
-        # Update status
+        # Статус меняется по таблице переходов, см. `orders.transitions`
         if status is not None:
-            instance.status = status
-            # если заказ отменен восстанавливаем кол-во товара
-            if instance.status == OrderStatus.CANCELLED:
-                for item in list(instance.order_items.all().select_related('product_info')):
-                    item.product_info.quantity += item.quantity
-                    item.product_info.save()
-
-            # Если статус новый считаем сумму и уменьшаем кол-во товара
-            if instance.status == OrderStatus.NEW:
-                order_items = list(instance.order_items.all().select_related('product_info'))
-                if len(order_items) == 0:
-                    raise MethodNotAllowed({'message': 'Ваша корзина пустая!'})
-                for item in order_items:
-                    item.product_info.quantity -= item.quantity
-                    item.product_info.save()
-                    instance.amount += item.product_info.price * item.quantity
+            transit(instance, status)
 
         # Только владелец может изменять только свой заказ-корзину
         if order_items_data is not None and instance.status == OrderStatus.BASKET:
-            for item in list(instance.order_items.all()):
-                item.delete()
-            instance.amount = 0
-
-            for item in order_items_data:
-                item['product_info'] = item.pop('product_info_id')
-                instance.amount += item['product_info'].price * item.get('quantity', 1)
-                OrderItem.objects.create(order=instance, **item)
+            instance.order_items.all().delete()
+            OrderItem.objects.bulk_create([
+                OrderItem(order=instance, product_info=item['product_info_id'], quantity=item.get('quantity', 1))
+                for item in order_items_data
+            ])
+            update_order_amounts([instance.pk])
 
-        instance.save()
+        # статус и сумма заказа обновлены запросами, см. `orders.transitions` и `orders.totals`
+        instance.refresh_from_db(fields=['status', 'amount', 'updated_at'])
 
         return instance
 
@@ -127,3 +150,28 @@ class OrderSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(['The field cannot be an empty list'])
 
         return data
+
+
+class OrderTransitionSerializer(serializers.Serializer):
+    """
+    Serializer смены статуса нескольких заказов.
+    """
+    orders = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+    status = serializers.ChoiceField(choices=sorted(BULK_STATUSES))
+
+
+class ShopOrderSerializer(serializers.ModelSerializer):
+    """
+    Serializer для заказа магазина с позициями только этого магазина.
+    """
+    order_items = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ShopOrder
+        fields = ('id', 'order', 'shop', 'status', 'amount', 'created_at', 'updated_at', 'order_items',)
+        read_only_fields = fields
+
+    @extend_schema_field(OrderItemSerializer(many=True))
+    def get_order_items(self, instance):
+        # items of the shop are attached by the view, see `orders.splits.attach_shop_order_items`
+        return OrderItemSerializer(instance.items, many=True, context=self.context).data
@@ -0,0 +1,49 @@
+from contextlib import contextmanager
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from orders.models import Order, OrderItem, ShopOrder
+from orders.totals import update_basket_amounts, update_order_amounts
+from products.models import ProductInfo
+from products.signals import product_infos_changed
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def update_order(sender, instance, **kwargs):
+    """Changed items change the amount of the order and its `updated_at`."""
+    update_order_amounts([instance.order_id])
+
+
+@receiver(post_delete, sender=Order)
+def delete_shop_orders(sender, instance, **kwargs):
+    """Sub-orders have no constraint to keep them for the archive, so deleted orders delete them here."""
+    ShopOrder.objects.filter(order_id=instance.pk).delete()
+
+
+@contextmanager
+def archiving():
+    """
+    Orders moved to the archive are deleted without the receivers of items and orders:
+    their amounts are not recomputed item by item and their sub-orders are kept.
+    Receivers are disconnected in the whole process, the archive runs in the celery worker.
+    """
+    post_delete.disconnect(update_order, sender=OrderItem)
+    post_delete.disconnect(delete_shop_orders, sender=Order)
+    try:
+        yield
+    finally:
+        post_delete.connect(update_order, sender=OrderItem)
+        post_delete.connect(delete_shop_orders, sender=Order)
+
+
+@receiver(post_save, sender=ProductInfo)
+def update_baskets(sender, instance, created, **kwargs):
+    if not created:
+        update_basket_amounts([instance.pk])
+
+
+@receiver(product_infos_changed)
+def update_baskets_in_bulk(sender, product_infos, **kwargs):
+    update_basket_amounts(product_infos)
@@ -0,0 +1,64 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import DecimalField, F, Prefetch, Q, Sum
+from django.utils import timezone
+
+from orders.models import ArchivedOrderItem, OrderItem, ShopOrder
+from products.models import ProductParameter
+
+
+def split_orders(orders):
+    """
+    Create sub-orders of the shops of the order items, `orders` is a list of ids.
+    Amounts are computed by the database at the prices of the confirmation with one grouped query
+    and sub-orders are upserted with one bulk insert, so they follow the status and amount
+    of the confirmed order.
+    """
+    rows = OrderItem.objects.filter(order__in=orders).order_by().values(
+        'order_id', 'order__status', shop_id=F('product_info__shop_id')
+    ).annotate(
+        amount=Sum(F('quantity') * F('price'), output_field=DecimalField(max_digits=12, decimal_places=2))
+    )
+    now = timezone.now()
+    ShopOrder.objects.bulk_create(
+        [
+            ShopOrder(
+                order_id=row['order_id'], shop_id=row['shop_id'], status=row['order__status'],
+                amount=row['amount'], created_at=now
+            ) for row in rows
+        ],
+        update_conflicts=True,
+        unique_fields=['order', 'shop'],
+        update_fields=['status', 'amount', 'updated_at'],
+    )
+
+
+def update_shop_orders(orders, status):
+    """Sub-orders of the orders, a list of ids, take the new status of the orders."""
+    ShopOrder.objects.filter(order__in=orders).update(status=status, updated_at=timezone.now())
+
+
+def attach_shop_order_items(shop_orders):
+    """
+    Items of the shop of every sub-order are set to its `items` with one query
+    by pairs of the order and the shop, items of archived orders are read from the archive.
+    """
+    if not shop_orders:
+        return shop_orders
+
+    items = {}
+    for model in (OrderItem, ArchivedOrderItem):
+        missing = [shop_order for shop_order in shop_orders if (shop_order.order_id, shop_order.shop_id) not in items]
+        if not missing:
+            break
+        lookup = reduce(or_, [Q(order_id=item.order_id, product_info__shop_id=item.shop_id) for item in missing])
+        queryset = model.objects.filter(lookup).select_related('product_info__product__category').prefetch_related(
+            Prefetch('product_info__product_parameters', queryset=ProductParameter.objects.select_related('parameter'))
+        ).order_by('id')
+        for item in queryset:
+            items.setdefault((item.order_id, item.product_info.shop_id), []).append(item)
+
+    for shop_order in shop_orders:
+        shop_order.items = items.get((shop_order.order_id, shop_order.shop_id), [])
+    return shop_orders
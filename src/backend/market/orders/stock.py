@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+from rest_framework import serializers
+
+from orders.models import OrderItem
+from products.cards import update_product_cards
+from products.models import ProductInfo
+from utils.cache import bump_version
+
+
+def _lines(orders):
+    """Ordered quantities of the orders by product's details id."""
+    return dict(
+        OrderItem.objects.filter(order__in=orders).order_by().values('product_info_id').annotate(
+            total=Sum('quantity')
+        ).values_list('product_info_id', 'total')
+    )
+
+
+def _quantity_case(lines):
+    return Case(
+        *[When(pk=pk, then=Value(quantity)) for pk, quantity in lines.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _stock_changed(lines):
+    """
+    Bulk updates send no signals. Cards are rebuilt and the cache is invalidated after the commit,
+    so the locked rows are not held by the rebuild and a rollback leaves the cache untouched.
+    """
+    bump_version(ProductInfo)
+    transaction.on_commit(
+        lambda: update_product_cards(ProductInfo.objects.filter(pk__in=lines).values('product_id'))
+    )
+
+
+def reserve_stock(order):
+    """
+    Decrement stock of product's details by all the items of the order in one transaction.
+
+    Rows are locked with `SELECT ... FOR UPDATE` in the order of their ids, so concurrent checkouts
+    of overlapping baskets wait for each other instead of deadlocking, then stock is decremented
+    by one conditional update of all the rows. Rows are locked only until the transaction ends.
+    Raises `ValidationError` with the product's details which are out of stock.
+    """
+    lines = _lines([order.pk])
+    if not lines:
+        return
+
+    with transaction.atomic():
+        stock = dict(
+            ProductInfo.objects.select_for_update().filter(pk__in=lines).order_by('pk').values_list('pk', 'quantity')
+        )
+        missing = sorted(pk for pk, quantity in lines.items() if stock.get(pk, 0) < quantity)
+        if missing:
+            raise serializers.ValidationError(
+                {'order_items': [f'Недостаточно товара {pk} на складе.' for pk in missing]}
+            )
+
+        quantity = _quantity_case(lines)
+        updated = ProductInfo.objects.filter(pk__in=lines, quantity__gte=quantity).update(
+            quantity=F('quantity') - quantity, updated_at=timezone.now()
+        )
+        if updated != len(lines):
+            # can not happen while the rows are locked, but the check keeps the stock consistent
+            raise serializers.ValidationError({'order_items': ['Недостаточно товара на складе.']})
+
+    _stock_changed(lines)
+
+
+def release_stock(orders):
+    """Return stock of product's details by all the items of the orders, a list of ids, with one update."""
+    lines = _lines(orders)
+    if not lines:
+        return
+
+    ProductInfo.objects.filter(pk__in=lines).update(
+        quantity=F('quantity') + _quantity_case(lines), updated_at=timezone.now()
+    )
+    _stock_changed(lines)
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from orders.archive import archive_orders
+
+
+@shared_task(ignore_result=True)
+def archive_closed_orders():
+    """Move delivered and cancelled orders older than `ORDER_ARCHIVE_AFTER_DAYS` to the archive."""
+    archive_orders()
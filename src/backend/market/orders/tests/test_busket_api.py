@@ -2,6 +2,51 @@ import pytest
 from rest_framework import status
 from rest_framework.reverse import reverse
 
+from orders import baskets
+from orders.models import Order
+from products.cards import get_product_card
+
+
+class FakeRedis:
+    """Hashes of redis used by the redis basket."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttl = {}
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+    def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update({str(k).encode(): str(v).encode() for k, v in mapping.items()})
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.data.get(key, {}).pop(str(field).encode(), None)
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(str(field).encode())
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def expire(self, key, seconds):
+        self.ttl[key] = seconds
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture
+def redis_basket(settings, monkeypatch):
+    settings.BASKET_BACKEND = 'orders.baskets.RedisBasket'
+    client = FakeRedis()
+    monkeypatch.setattr(baskets, 'get_redis', lambda: client)
+    return client
+
 
 @pytest.mark.django_db
 def test_retrieve_basket_item_for_unauthorized_client(order_item_factory, api_client):
@@ -354,3 +399,235 @@ def test_confirm_basket_item_for_owner_client(api_client, order_factory, order_i
     resp = client.patch(url)
     assert resp.status_code == status.HTTP_200_OK
     print(resp.rendered_content)
+
+
+@pytest.mark.django_db
+def test_confirm_basket_decrements_stock(api_client, order_factory, order_item_factory, product_info_factory):
+    # arrange
+    client, owner = api_client()
+    order = order_factory(owner=owner)
+    first, second = product_info_factory(_quantity=2, quantity=5)
+    order_item_factory(order=order, product_info=first, quantity=5)
+    order_item_factory(order=order, product_info=second, quantity=2)
+
+    # act
+    resp = client.patch(reverse("basket-confirm"))
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert (first.quantity, second.quantity) == (0, 3)
+
+
+@pytest.mark.django_db
+def test_confirm_basket_out_of_stock(api_client, order_factory, order_item_factory, product_info_factory):
+    # arrange
+    client, owner = api_client()
+    order = order_factory(owner=owner)
+    first, second = product_info_factory(_quantity=2, quantity=5)
+    order_item_factory(order=order, product_info=first, quantity=1)
+    order_item_factory(order=order, product_info=second, quantity=6)
+
+    # act
+    resp = client.patch(reverse("basket-confirm"))
+
+    # assert: nothing is reserved and the basket is kept
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert str(second.id) in resp.json()['order_items'][0]
+    first.refresh_from_db()
+    order.refresh_from_db()
+    assert first.quantity == 5
+    assert order.status == 'BASKET'
+
+
+@pytest.mark.django_db
+def test_confirm_basket_with_idempotency_key(api_client, order_factory, order_item_factory, product_info_factory):
+    # arrange
+    client, owner = api_client()
+    order = order_factory(owner=owner)
+    info = product_info_factory(quantity=1)
+    order_item_factory(order=order, product_info=info, quantity=2)
+    url = reverse("basket-confirm")
+
+    # act: failed request releases the key
+    resp = client.patch(url, HTTP_IDEMPOTENCY_KEY='confirm-1')
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    info.quantity = 5
+    info.save()
+
+    resp = client.patch(url, HTTP_IDEMPOTENCY_KEY='confirm-1')
+    retry = client.patch(url, HTTP_IDEMPOTENCY_KEY='confirm-1')
+
+    # assert: the retry replays the response and stock is decremented once
+    assert resp.status_code == status.HTTP_200_OK
+    assert retry.status_code == status.HTTP_200_OK
+    assert retry['Idempotent-Replayed'] == 'true'
+    assert retry.json() == resp.json()
+    info.refresh_from_db()
+    assert info.quantity == 3
+
+
+@pytest.mark.django_db
+def test_confirm_basket_rebuilds_cards_after_commit(api_client, order_factory, order_item_factory,
+                                                    product_info_factory, django_capture_on_commit_callbacks):
+    # arrange
+    client, owner = api_client()
+    info = product_info_factory(quantity=5)
+    order_item_factory(order=order_factory(owner=owner), product_info=info, quantity=2)
+    assert get_product_card(info.product_id)[0]['quantity'] == 5
+
+    # act
+    with django_capture_on_commit_callbacks() as callbacks:
+        resp = client.patch(reverse("basket-confirm"))
+
+    # assert: the card is rebuilt only after the commit, not under the row locks
+    assert resp.status_code == status.HTTP_200_OK
+    assert get_product_card(info.product_id)[0]['quantity'] == 5
+    for callback in callbacks:
+        callback()
+    assert get_product_card(info.product_id)[0]['quantity'] == 3
+
+
+@pytest.mark.django_db
+def test_bulk_basket_items(api_client, order_factory, order_item_factory, product_info_factory,
+                           django_assert_max_num_queries):
+    # arrange
+    client, owner = api_client()
+    order = order_factory(owner=owner)
+    infos = product_info_factory(_quantity=4, quantity=10)
+    order_item_factory(order=order, product_info=infos[0], quantity=1)
+    order_item_factory(order=order, product_info=infos[1], quantity=1)
+    payload = [
+        {'product_info_id': infos[0].id, 'quantity': 3},
+        {'product_info_id': infos[1].id, 'quantity': 0},
+        {'product_info_id': infos[2].id, 'quantity': 2},
+        {'product_info_id': infos[3].id, 'quantity': 1},
+    ]
+    url = reverse("basket-bulk")
+
+    # act: number of queries does not depend on the number of items
+    with django_assert_max_num_queries(12):
+        resp = client.post(url, payload, format='json')
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert [(item['product_info']['id'], item['quantity']) for item in resp.json()] == [
+        (infos[0].id, 3), (infos[2].id, 2), (infos[3].id, 1)
+    ]
+    assert dict(order.order_items.values_list('product_info_id', 'quantity')) == {
+        infos[0].id: 3, infos[2].id: 2, infos[3].id: 1
+    }
+
+
+@pytest.mark.django_db
+def test_bulk_basket_items_validation(api_client, order_factory, order_item_factory, product_info_factory):
+    # arrange
+    client, owner = api_client()
+    order = order_factory(owner=owner)
+    info, sold_out = product_info_factory(quantity=10), product_info_factory(quantity=0)
+    order_item_factory(order=order, product_info=info, quantity=1)
+    url = reverse("basket-bulk")
+
+    # act
+    resp = client.post(url, [
+        {'product_info_id': info.id, 'quantity': 5},
+        {'product_info_id': sold_out.id, 'quantity': 1},
+        {'product_info_id': 10 ** 6, 'quantity': 1},
+    ], format='json')
+
+    # assert: nothing is changed
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert len(resp.json()['non_field_errors']) == 2
+    assert order.order_items.get().quantity == 1
+
+    # act
+    resp = client.post(url, [{'product_info_id': info.id, 'quantity': -1}], format='json')
+
+    # assert
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_redis_basket(api_client, product_info_factory, redis_basket):
+    # arrange
+    client, owner = api_client()
+    first, second, third = product_info_factory(_quantity=3, quantity=10)
+    url = reverse("basket-list")
+
+    # act: basket is kept out of the orders table
+    client.post(url, {'product_info_id': first.id, 'quantity': 2})
+    client.post(reverse("basket-bulk"), [
+        {'product_info_id': second.id, 'quantity': 3}, {'product_info_id': third.id, 'quantity': 1}
+    ], format='json')
+    client.patch(reverse("basket-detail", kwargs={'pk': second.id}), {'quantity': 4})
+    client.delete(reverse("basket-detail", kwargs={'pk': third.id}))
+    resp = client.get(url)
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert [(item['product_info']['id'], item['quantity']) for item in resp.json()['results']] == [
+        (first.id, 2), (second.id, 4)
+    ]
+    assert redis_basket.ttl[f'basket:{owner.id}'] > 0
+    assert not Order.objects.filter(owner=owner).exists()
+
+    # act: order is created on confirmation
+    resp = client.patch(reverse("basket-confirm"))
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    order = Order.objects.get(owner=owner)
+    assert order.status == 'NEW'
+    assert dict(order.order_items.values_list('product_info_id', 'quantity')) == {first.id: 2, second.id: 4}
+    assert not redis_basket.hgetall(f'basket:{owner.id}')
+
+
+@pytest.mark.django_db
+def test_redis_basket_confirm_out_of_stock(api_client, product_info_factory, redis_basket):
+    # arrange
+    client, owner = api_client()
+    info = product_info_factory(quantity=1)
+    client.post(reverse("basket-list"), {'product_info_id': info.id, 'quantity': 2})
+
+    # act
+    resp = client.patch(reverse("basket-confirm"))
+
+    # assert: basket is kept and no order is left
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert not Order.objects.filter(owner=owner).exists()
+    assert redis_basket.hgetall(f'basket:{owner.id}')
+
+
+@pytest.mark.django_db
+def test_basket_amount_follows_items_and_prices(api_client, product_info_factory):
+    # arrange
+    client, owner = api_client()
+    first, second = product_info_factory(_quantity=2, quantity=10, price=100)
+
+    # act
+    client.post(reverse("basket-list"), {'product_info_id': first.id, 'quantity': 2})
+    client.post(reverse("basket-bulk"), [{'product_info_id': second.id, 'quantity': 3}], format='json')
+
+    # assert
+    order = Order.objects.get(owner=owner)
+    assert order.amount == 500
+
+    # act: basket follows the prices
+    second.price = 50
+    second.save()
+
+    # assert
+    order.refresh_from_db()
+    assert order.amount == 350
+
+    # act: confirmed order keeps the amount
+    client.patch(reverse("basket-confirm"))
+    first.price = 1000
+    first.save()
+
+    # assert
+    order.refresh_from_db()
+    assert (order.status, order.amount) == ('NEW', 350)
+    # items keep the prices of the confirmation
+    assert sorted(order.order_items.values_list('price', flat=True)) == [50, 100]
@@ -1,10 +1,14 @@
 import decimal
+from datetime import timedelta
 
 import pytest
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.reverse import reverse
 
-from orders.models import OrderStatus
+from orders.archive import archive_order_batch, archive_orders
+from orders.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatus
+from utils.models import IdempotencyKey
 
 
 @pytest.mark.django_db
@@ -65,6 +69,56 @@ def test_retrieve_order_for_owner_client(order_factory, api_client):
         assert product
 
 
+@pytest.mark.django_db
+def test_retrieve_order_conditional_get(order_factory, order_item_factory, api_client):
+    # arrange
+    client, user = api_client()
+    order = order_factory(owner=user)
+    item = order_item_factory(order=order)
+    url = reverse("orders-detail", kwargs={'pk': order.id})
+    etag = client.get(url)['ETag']
+
+    # act
+    resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    # assert
+    assert resp.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # act: product's details of the item changed
+    item.product_info.price = 777
+    item.product_info.save()
+    resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    etag = resp['ETag']
+
+    # act: item removed
+    item.delete()
+    resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json()['order_items'] == []
+
+
+@pytest.mark.django_db
+def test_list_orders_conditional_get(order_factory, api_client):
+    # arrange
+    client, user = api_client()
+    order_factory(_quantity=3, owner=user, status=OrderStatus.NEW)
+    url = reverse("orders-list")
+    etag = client.get(url)['ETag']
+
+    # act
+    resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    # assert
+    assert resp.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # act: other user has other representation
+    other_client, _ = api_client()
+    resp = other_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+
+
 @pytest.mark.django_db
 def test_list_orders_for_unauthorized_client(api_client):
     # arrange
@@ -87,21 +141,21 @@ def test_list_orders_for_not_owner_client(api_client, order_factory):
     resp = client.get(url)
     assert resp.status_code == status.HTTP_200_OK
     resp_json = resp.json()
-    assert resp_json['count'] == 0
+    assert len(resp_json['results']) == 0
 
 
 @pytest.mark.django_db
 def test_list_orders_for_owner_client(api_client, order_factory):
     # arrange
     client, user = api_client()
-    objs = order_factory(_quantity=10, owner=user)
+    objs = order_factory(_quantity=10, owner=user, status=OrderStatus.NEW)
     url = reverse("orders-list")
 
     # for OWNER client
     resp = client.get(url)
     assert resp.status_code == status.HTTP_200_OK
     resp_json = resp.json()
-    assert resp_json['count'] == len(objs)
+    assert len(resp_json['results']) == len(objs)
 
 
 @pytest.mark.django_db
@@ -118,7 +172,28 @@ def test_list_orders_for_admin_client(api_client, order_factory, order_item_fact
     assert resp.status_code == status.HTTP_200_OK
     resp_json = resp.json()
     # -1 корзина, которая не должна быть доступна поставщику
-    assert resp_json['count'] == len(orders) - 1
+    assert len(resp_json['results']) == len(orders) - 1
+
+
+@pytest.mark.django_db
+def test_list_orders_keyset_pagination(api_client, order_factory):
+    # arrange
+    client, user = api_client()
+    objs = order_factory(_quantity=15, owner=user, status=OrderStatus.NEW)
+    url = reverse("orders-list")
+
+    # act
+    resp = client.get(url)
+    first = resp.json()
+    resp = client.get(first['next'])
+    second = resp.json()
+
+    # assert: orders are listed from the newest
+    assert resp.status_code == status.HTTP_200_OK
+    ids = [item['id'] for item in first['results'] + second['results']]
+    assert ids == [obj.id for obj in sorted(objs, key=lambda obj: (obj.created_at, obj.id), reverse=True)]
+    assert second['next'] is None
+    assert second['previous']
 
 
 @pytest.mark.django_db
@@ -189,7 +264,7 @@ def test_filter_updated_at_orders(api_client, order_factory):
     assert resp.status_code == status.HTTP_200_OK
     resp_json = resp.json()
     assert resp_json
-    assert resp_json['count'] == 1
+    assert len(resp_json['results']) == 1
 
 
 @pytest.mark.django_db
@@ -231,6 +306,61 @@ def test_create_order_for_authorized_client(api_client, product_info_factory, pr
         assert item['product_info']['id'] == products[i].id
 
 
+@pytest.mark.django_db
+def test_create_order_with_idempotency_key(api_client, product_info_factory):
+    # arrange
+    client, user = api_client()
+    first, second = product_info_factory(_quantity=2, price=100)
+    url = reverse("orders-list")
+    payload = {'order_items': [{'product_info_id': first.id, 'quantity': 2}]}
+
+    # act: retry of the request with the same key
+    resp = client.post(url, payload, format='json', HTTP_IDEMPOTENCY_KEY='order-1')
+    retry = client.post(url, payload, format='json', HTTP_IDEMPOTENCY_KEY='order-1')
+
+    # assert: the order is created once and the response is replayed
+    assert resp.status_code == status.HTTP_201_CREATED
+    assert retry.status_code == status.HTTP_201_CREATED
+    assert retry['Idempotent-Replayed'] == 'true'
+    assert retry.json() == resp.json()
+    assert Order.objects.filter(owner=user).count() == 1
+
+    # act: the key is reused for another request
+    resp = client.post(
+        url, {'order_items': [{'product_info_id': second.id}]}, format='json', HTTP_IDEMPOTENCY_KEY='order-1'
+    )
+
+    # assert
+    assert resp.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert Order.objects.filter(owner=user).count() == 1
+
+
+@pytest.mark.django_db
+def test_idempotency_key_lease_is_taken_over(api_client, product_info_factory):
+    # arrange: the process of the first request died before storing the response
+    client, user = api_client()
+    url = reverse("orders-list")
+    payload = {'order_items': [{'product_info_id': product_info_factory().id}]}
+    client.post(url, payload, format='json', HTTP_IDEMPOTENCY_KEY='order-1')
+    Order.objects.filter(owner=user).delete()
+    IdempotencyKey.objects.update(status_code=None, response=None)
+
+    # act: retry while the request holds the key
+    resp = client.post(url, payload, format='json', HTTP_IDEMPOTENCY_KEY='order-1')
+
+    # assert
+    assert resp.status_code == status.HTTP_409_CONFLICT
+
+    # act: retry after the lease
+    IdempotencyKey.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+    resp = client.post(url, payload, format='json', HTTP_IDEMPOTENCY_KEY='order-1')
+
+    # assert: the retry takes the key over and stores its response
+    assert resp.status_code == status.HTTP_201_CREATED
+    assert 'Idempotent-Replayed' not in resp
+    assert IdempotencyKey.objects.get().status_code == status.HTTP_201_CREATED
+
+
 @pytest.mark.django_db
 def test_validate_product_is_over_on_create_order(api_client, product_info_factory, product_factory):
     # arrange
@@ -476,3 +606,165 @@ def test_delete_order_for_owner_client(api_client, order_factory):
     url = reverse("orders-detail", kwargs={'pk': order.id})
     resp = client.delete(url)
     assert resp.status_code == status.HTTP_204_NO_CONTENT
+
+
+@pytest.mark.django_db
+def test_list_orders_sparse_fieldsets(api_client, order_factory, order_item_factory):
+    # arrange
+    client, user = api_client()
+    order = order_factory(owner=user)
+    item = order_item_factory(order=order)
+    url = reverse("orders-list")
+
+    # act
+    resp = client.get(url, {'fields': 'id,amount,order_items.quantity,order_items.product_info.price'})
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json()['results'] == [{
+        'id': order.id,
+        'amount': resp.json()['results'][0]['amount'],
+        'order_items': [{'quantity': item.quantity, 'product_info': {'price': f'{item.product_info.price:.2f}'}}],
+    }]
+
+    # act
+    resp = client.get(reverse("orders-detail", kwargs={'pk': order.id}), {'omit': 'owner,order_items'})
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert set(resp.json()) == {'id', 'amount', 'status', 'created_at', 'updated_at'}
+
+
+@pytest.mark.django_db
+def test_update_status_not_allowed_transition(api_client, order_factory):
+    # arrange
+    client, user = api_client(is_staff=True)
+    order = order_factory(status=OrderStatus.DELIVERED)
+    url = reverse("orders-detail", kwargs={'pk': order.id})
+
+    # act
+    resp = client.patch(url, {'status': OrderStatus.CANCELLED}, format='json')
+
+    # assert
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    order.refresh_from_db()
+    assert order.status == OrderStatus.DELIVERED
+
+
+@pytest.mark.django_db
+def test_transition_orders_in_bulk(api_client, order_factory, order_item_factory, product_info_factory):
+    # arrange
+    client, user = api_client(is_staff=True)
+    orders = order_factory(_quantity=3, status=OrderStatus.CONFIRMED)
+    info = product_info_factory(quantity=1)
+    for order in orders:
+        order_item_factory(order=order, product_info=info, quantity=2)
+    url = reverse("orders-transition")
+
+    # act
+    resp = client.post(url, {'orders': [order.id for order in orders[:2]], 'status': 'ASSEMBLED'}, format='json')
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    statuses = Order.objects.filter(pk__in=[order.id for order in orders]).values_list('status', flat=True)
+    assert sorted(statuses) == ['ASSEMBLED', 'ASSEMBLED', 'CONFIRMED']
+
+    # act: cancellation returns stock of all the orders
+    resp = client.post(url, {'orders': [order.id for order in orders], 'status': 'CANCELLED'}, format='json')
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert set(statuses.all()) == {'CANCELLED'}
+    info.refresh_from_db()
+    assert info.quantity == 7
+
+
+@pytest.mark.django_db
+def test_transition_orders_in_bulk_validation(api_client, order_factory):
+    # arrange
+    admin, _ = api_client(is_staff=True)
+    client, _ = api_client()
+    new, sent = order_factory(status=OrderStatus.NEW), order_factory(status=OrderStatus.SENT)
+    url = reverse("orders-transition")
+    payload = {'orders': [new.id, sent.id], 'status': 'CONFIRMED'}
+
+    # act
+    resp = client.post(url, payload, format='json')
+
+    # assert
+    assert resp.status_code == status.HTTP_403_FORBIDDEN
+
+    # act
+    resp = admin.post(url, payload, format='json')
+
+    # assert: nothing is changed
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert str(sent.id) in resp.json()['orders'][0]
+    new.refresh_from_db()
+    assert new.status == OrderStatus.NEW
+
+    # act
+    resp = admin.post(url, {'orders': [new.id], 'status': 'NEW'}, format='json')
+
+    # assert
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_archive_closed_orders(api_client, order_factory, order_item_factory, product_info_factory):
+    # arrange
+    client, user = api_client()
+    other_client, _ = api_client()
+    info = product_info_factory()
+    delivered, cancelled, recent, sent = [
+        order_factory(owner=user, status=order_status)
+        for order_status in (OrderStatus.DELIVERED, OrderStatus.CANCELLED, OrderStatus.DELIVERED, OrderStatus.SENT)
+    ]
+    item = order_item_factory(order=delivered, product_info=info, quantity=3)
+    old = timezone.now() - timedelta(days=365)
+    Order.objects.filter(pk__in=[delivered.pk, cancelled.pk, sent.pk]).update(created_at=old)
+
+    # act
+    moved = archive_orders(batch_size=1)
+
+    # assert: only closed old orders are moved with their items
+    assert moved == 2
+    assert set(ArchivedOrder.objects.values_list('pk', flat=True)) == {delivered.pk, cancelled.pk}
+    assert not Order.objects.filter(pk__in=[delivered.pk, cancelled.pk]).exists()
+    assert not OrderItem.objects.filter(pk=item.pk).exists()
+    assert Order.objects.filter(pk__in=[recent.pk, sent.pk]).count() == 2
+
+    # act: current orders are read by default
+    resp = client.get(reverse("orders-list"))
+    assert {order['id'] for order in resp.json()['results']} == {recent.pk, sent.pk}
+
+    # act: archive is read on request
+    resp = client.get(reverse("orders-list"), {'archived': 'true', 'status': OrderStatus.DELIVERED})
+    assert resp.status_code == status.HTTP_200_OK
+    results = resp.json()['results']
+    assert [order['id'] for order in results] == [delivered.pk]
+    assert [(i['product_info']['id'], i['quantity']) for i in results[0]['order_items']] == [(info.pk, 3)]
+
+    resp = client.get(reverse("orders-detail", kwargs={'pk': cancelled.pk}), {'archived': 'true'})
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json()['status'] == OrderStatus.CANCELLED
+    resp = other_client.get(reverse("orders-detail", kwargs={'pk': cancelled.pk}), {'archived': 'true'})
+    assert resp.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_archive_batch_is_set_based(order_factory, order_item_factory, django_assert_num_queries):
+    # arrange
+    for _ in range(3):
+        order = order_factory(status=OrderStatus.DELIVERED)
+        order_item_factory(order=order)
+        order_item_factory(order=order)
+    Order.objects.update(created_at=timezone.now() - timedelta(days=365))
+
+    # act: select, copy and delete of orders and items do not depend on the number of rows
+    with django_assert_num_queries(10):
+        moved = archive_order_batch(timezone.now(), 10)
+
+    # assert
+    assert moved == 3
+    assert ArchivedOrderItem.objects.count() == 6
@@ -0,0 +1,61 @@
+import pytest
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from orders.models import OrderStatus, ShopOrder
+
+
+@pytest.mark.django_db
+def test_basket_lookup_uses_index(api_client, order_factory, assert_no_seq_scan):
+    # arrange
+    client, user = api_client()
+    order_factory(owner=user)
+
+    # act
+    resp = assert_no_seq_scan(lambda: client.get(reverse("basket-list")), 'orders_order')
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', [{}, {'status': OrderStatus.NEW}])
+def test_owner_orders_list_uses_index(api_client, order_factory, assert_no_seq_scan, params):
+    # arrange
+    client, user = api_client()
+    order_factory(_quantity=3, owner=user, status=OrderStatus.NEW)
+
+    # act
+    resp = assert_no_seq_scan(lambda: client.get(reverse("orders-list"), params), 'orders_order')
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', [{}, {'status': OrderStatus.NEW}])
+def test_staff_orders_list_uses_index(api_client, order_factory, assert_no_seq_scan, params):
+    # arrange
+    client, _ = api_client(is_staff=True)
+    order_factory(_quantity=3, status=OrderStatus.NEW)
+
+    # act
+    resp = assert_no_seq_scan(lambda: client.get(reverse("orders-list"), params), 'orders_order')
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_shop_orders_queue_uses_index(api_client, order_factory, assert_no_seq_scan):
+    # arrange
+    client, supplier = api_client(is_supplier=True)
+    ShopOrder.objects.create(order=order_factory(status=OrderStatus.NEW), shop=supplier.shop, status=OrderStatus.NEW)
+
+    # act
+    resp = assert_no_seq_scan(
+        lambda: client.get(reverse("shop-orders-list"), {'status': OrderStatus.NEW}), 'orders_shoporder'
+    )
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
@@ -0,0 +1,147 @@
+import decimal
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from orders.archive import archive_orders
+from orders.models import Order, OrderStatus, ShopOrder
+
+
+@pytest.fixture
+def confirmed_order(api_client, order_factory, order_item_factory, product_info_factory, shop_factory):
+    """
+    Подтвержденный заказ с позициями магазина поставщика и другого магазина.
+    """
+    def func(supplier):
+        client, owner = api_client()
+        order = order_factory(owner=owner)
+        first = product_info_factory(shop=supplier.shop, price=100, quantity=10)
+        second = product_info_factory(shop=supplier.shop, price=50, quantity=10)
+        other = product_info_factory(shop=shop_factory(), price=10, quantity=10)
+        for info, quantity in ((first, 2), (second, 1), (other, 3)):
+            order_item_factory(order=order, product_info=info, quantity=quantity)
+        resp = client.patch(reverse("basket-confirm"))
+        assert resp.status_code == status.HTTP_200_OK
+        return order, (first, second, other)
+    return func
+
+
+@pytest.mark.django_db
+def test_confirmed_order_is_split_by_shops(api_client, confirmed_order):
+    # arrange
+    supplier_client, supplier = api_client(is_supplier=True)
+    order, (first, second, other) = confirmed_order(supplier)
+
+    # assert
+    shop_orders = {shop_order.shop_id: shop_order for shop_order in ShopOrder.objects.filter(order=order)}
+    assert set(shop_orders) == {supplier.shop.id, other.shop_id}
+    assert shop_orders[supplier.shop.id].amount == 250
+    assert shop_orders[other.shop_id].amount == 30
+    assert {shop_order.status for shop_order in shop_orders.values()} == {'NEW'}
+
+    # act: supplier sees only the items of the shop
+    resp = supplier_client.get(reverse("shop-orders-list"))
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    results = resp.json()['results']
+    assert [shop_order['order'] for shop_order in results] == [order.id]
+    assert decimal.Decimal(results[0]['amount']) == 250
+    assert [item['product_info']['id'] for item in results[0]['order_items']] == [first.id, second.id]
+
+    # act: sub-orders of other shops are hidden
+    resp = supplier_client.get(reverse("shop-orders-detail", kwargs={'pk': shop_orders[other.shop_id].id}))
+
+    # assert
+    assert resp.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_shop_orders_follow_order_status(api_client, confirmed_order):
+    # arrange
+    supplier_client, supplier = api_client(is_supplier=True)
+    admin_client, _ = api_client(is_staff=True)
+    order, _ = confirmed_order(supplier)
+
+    # act
+    resp = admin_client.post(
+        reverse("orders-transition"), {'orders': [order.id], 'status': 'CANCELLED'}, format='json'
+    )
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert set(ShopOrder.objects.filter(order=order).values_list('status', flat=True)) == {'CANCELLED'}
+    resp = supplier_client.get(reverse("shop-orders-list"), {'status': 'NEW'})
+    assert resp.json()['results'] == []
+    resp = supplier_client.get(reverse("shop-orders-list"), {'status': 'CANCELLED'})
+    assert [shop_order['order'] for shop_order in resp.json()['results']] == [order.id]
+
+
+@pytest.mark.django_db
+def test_shop_orders_of_archived_orders(api_client, confirmed_order):
+    # arrange: prices are changed after the confirmation, the order is delivered and archived
+    supplier_client, supplier = api_client(is_supplier=True)
+    order, (first, second, other) = confirmed_order(supplier)
+    first.price = 1000
+    first.save()
+    Order.objects.filter(pk=order.pk).update(status=OrderStatus.DELIVERED)
+    archive_orders(cutoff=timezone.now())
+
+    # act
+    resp = supplier_client.get(reverse("shop-orders-list"))
+
+    # assert: the sub-order keeps the amount of the confirmation and the items of the shop from the archive
+    results = resp.json()['results']
+    assert [shop_order['order'] for shop_order in results] == [order.id]
+    assert decimal.Decimal(results[0]['amount']) == 250
+    assert [item['product_info']['id'] for item in results[0]['order_items']] == [first.id, second.id]
+
+
+@pytest.mark.django_db
+def test_shop_orders_of_deleted_orders_are_deleted(api_client, confirmed_order):
+    # arrange
+    supplier_client, supplier = api_client(is_supplier=True)
+    admin_client, _ = api_client(is_staff=True)
+    deleted, _ = confirmed_order(supplier)
+    of_deleted_owner, _ = confirmed_order(supplier)
+
+    # act: the order is deleted by the admin, the owner of the other order is deleted
+    resp = admin_client.delete(reverse("orders-detail", kwargs={'pk': deleted.pk}))
+    of_deleted_owner.owner.delete()
+
+    # assert
+    assert resp.status_code == status.HTTP_204_NO_CONTENT
+    assert not ShopOrder.objects.exists()
+    assert supplier_client.get(reverse("shop-orders-list")).json()['results'] == []
+
+
+@pytest.mark.django_db
+def test_shop_orders_queue_keyset_pagination(api_client, order_factory, django_assert_max_num_queries):
+    # arrange
+    supplier_client, supplier = api_client(is_supplier=True)
+    shop_orders = [
+        ShopOrder.objects.create(order=order_factory(status='NEW'), shop=supplier.shop, status='NEW')
+        for _ in range(12)
+    ]
+    url = reverse("shop-orders-list")
+
+    # act
+    with django_assert_max_num_queries(8):
+        resp = supplier_client.get(url, {'status': 'NEW'})
+    next_page = supplier_client.get(resp.json()['next'])
+
+    # assert: newest first
+    ids = [shop_order['id'] for shop_order in resp.json()['results'] + next_page.json()['results']]
+    assert ids == [shop_order.id for shop_order in reversed(shop_orders)]
+    assert next_page.json()['next'] is None
+
+
+@pytest.mark.django_db
+def test_shop_orders_for_not_supplier(api_client):
+    # arrange
+    client, _ = api_client()
+
+    # assert
+    assert client.get(reverse("shop-orders-list")).status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,9 @@
+from utils.throttling import TokenBucketThrottle
+
+
+class BasketBulkRateThrottle(TokenBucketThrottle):
+    """Bulk update of the basket costs a token per item."""
+    scope = 'basket_bulk'
+
+    def get_cost(self, request, view):
+        return len(request.data) if isinstance(request.data, list) else 1
@@ -0,0 +1,45 @@
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from orders.models import Order, OrderItem, OrderStatus
+from products.models import ProductInfo
+
+
+def item_price():
+    """Price of the confirmation of the order item, items of baskets have no price and follow the current price."""
+    return Coalesce('price', 'product_info__price')
+
+
+def order_amount():
+    """Sum of the order items by their prices, computed by the database for every order."""
+    total = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order').annotate(
+        total=Sum(F('quantity') * item_price())
+    ).values('total')
+    return Coalesce(
+        Subquery(total), Value(0), output_field=DecimalField(max_digits=12, decimal_places=2)
+    )
+
+
+def fix_item_prices(orders):
+    """Items of the orders, a list of ids, keep the current prices on confirmation with one update statement."""
+    OrderItem.objects.filter(order__in=orders).update(
+        price=Subquery(ProductInfo.objects.filter(pk=OuterRef('product_info_id')).values('price'))
+    )
+
+
+def update_order_amounts(orders):
+    """
+    Recompute amounts of the orders, `orders` is a list of ids or a values queryset,
+    with one update statement. Changed amount changes the order, so `updated_at` is updated too.
+    """
+    Order.objects.filter(pk__in=orders).update(amount=order_amount(), updated_at=timezone.now())
+
+
+def update_basket_amounts(product_infos):
+    """Baskets follow the prices of product's details, confirmed orders keep the amount of the confirmation."""
+    update_order_amounts(
+        OrderItem.objects.filter(
+            product_info__in=product_infos, order__status=OrderStatus.BASKET
+        ).values('order_id')
+    )
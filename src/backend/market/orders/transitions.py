@@ -0,0 +1,90 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import MethodNotAllowed
+
+from orders.models import Order, OrderStatus
+from orders.splits import split_orders, update_shop_orders
+from orders.stock import release_stock, reserve_stock
+from orders.totals import fix_item_prices, update_order_amounts
+
+# Allowed status changes of an order
+TRANSITIONS = {
+    OrderStatus.BASKET: {OrderStatus.NEW},
+    OrderStatus.NEW: {OrderStatus.CONFIRMED, OrderStatus.CANCELLED},
+    OrderStatus.CONFIRMED: {OrderStatus.ASSEMBLED, OrderStatus.CANCELLED},
+    OrderStatus.ASSEMBLED: {OrderStatus.SENT, OrderStatus.CANCELLED},
+    OrderStatus.SENT: {OrderStatus.DELIVERED},
+    OrderStatus.DELIVERED: set(),
+    OrderStatus.CANCELLED: set(),
+}
+
+# Confirmation reserves stock of every order separately, so it is not applied in bulk
+BULK_STATUSES = {status for targets in TRANSITIONS.values() for status in targets} - {OrderStatus.NEW}
+
+
+def can_transit(current, status):
+    return status in TRANSITIONS.get(current, ())
+
+
+def _error(current, status):
+    return f'Нельзя изменить статус заказа с {current} на {status}.'
+
+
+@transaction.atomic
+def transit(order, status):
+    """
+    Change status of the order with its side effects: confirmation reserves stock, fixes the prices
+    of the items and the amount at the current prices and splits the order by shops,
+    cancellation returns stock.
+    Order row is locked, so concurrent changes of the same order are applied one by one.
+    """
+    current = Order.objects.select_for_update().values_list('status', flat=True).get(pk=order.pk)
+    if not can_transit(current, status):
+        raise serializers.ValidationError({'status': [_error(current, status)]})
+
+    if status == OrderStatus.NEW:
+        if not order.order_items.exists():
+            raise MethodNotAllowed({'message': 'Ваша корзина пустая!'})
+        reserve_stock(order)
+        fix_item_prices([order.pk])
+        update_order_amounts([order.pk])
+    elif status == OrderStatus.CANCELLED:
+        release_stock([order.pk])
+
+    Order.objects.filter(pk=order.pk).update(status=status, updated_at=timezone.now())
+    order.status = status
+
+    # shops see confirmed orders by their sub-orders
+    if status == OrderStatus.NEW:
+        split_orders([order.pk])
+    else:
+        update_shop_orders([order.pk], status)
+
+
+@transaction.atomic
+def transit_in_bulk(order_ids, status):
+    """
+    Change status of many orders with set-based updates: the orders are locked in the order of ids,
+    every transition is validated, then the stock of cancelled orders is returned with one update
+    and the status is changed with one update. Nothing is changed if any transition is not allowed.
+    """
+    if status not in BULK_STATUSES:
+        raise serializers.ValidationError({'status': [f'Статус {status} нельзя установить нескольким заказам.']})
+
+    current = dict(
+        Order.objects.select_for_update().filter(pk__in=order_ids).order_by('pk').values_list('pk', 'status')
+    )
+    errors = [f'Заказ {pk} не найден.' for pk in order_ids if pk not in current]
+    errors += [
+        f'Заказ {pk}: {_error(current[pk], status)}'
+        for pk in order_ids if pk in current and not can_transit(current[pk], status)
+    ]
+    if errors:
+        raise serializers.ValidationError({'orders': errors})
+
+    if status == OrderStatus.CANCELLED:
+        release_stock(list(current))
+
+    update_shop_orders(list(current), status)
+    return Order.objects.filter(pk__in=current).update(status=status, updated_at=timezone.now())
@@ -1,10 +1,11 @@
 from rest_framework.routers import DefaultRouter
 
-from orders.views import OrderViewSet, BasketItemViewSet
+from orders.views import OrderViewSet, BasketItemViewSet, ShopOrderViewSet
 
 router = DefaultRouter()
 router.register(r'orders', OrderViewSet, basename='orders')
 router.register(r'basket', BasketItemViewSet, basename='basket')
+router.register(r'shop-orders', ShopOrderViewSet, basename='shop-orders')
 
 
 urlpatterns = router.urls
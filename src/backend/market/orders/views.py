@@ -1,16 +1,38 @@
+from django.db import transaction
 from django.db.models import Prefetch
+from django.http import Http404
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema, OpenApiExample, extend_schema_view
-from rest_framework import viewsets, filters, status
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter, extend_schema_view
+from rest_framework import mixins, viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, OR
 from rest_framework.response import Response
 
-from orders.filters import OrderListFilterBackend, OrderFilter
-from orders.models import OrderItem, Order, OrderStatus
+from orders.baskets import get_basket
+from orders.filters import (
+    ArchivedOrderFilter, OrderListFilterBackend, OrderFilter, ShopOrderFilter, ShopOrderListFilterBackend
+)
+from orders.models import ArchivedOrder, ArchivedOrderItem, OrderItem, Order, OrderStatus, ShopOrder
 from orders.permissions import IsAdminAndIsNotBasket, IsOwnerAndIsBasketStatus
-from orders.serializers import OrderSerializer, OrderItemSerializer
-from users.permissions import IsOwnerOrAdminUser
+from orders.serializers import (
+    BasketItemBulkSerializer, OrderSerializer, OrderItemSerializer, OrderTransitionSerializer, ShopOrderSerializer
+)
+from orders.throttles import BasketBulkRateThrottle
+from orders.splits import attach_shop_order_items
+from orders.transitions import transit_in_bulk
+from products.models import ProductParameter
+from users.permissions import IsOwnerOrAdminUser, IsSupplier
+from utils.conditional import ConditionalGetMixin
+from utils.idempotency import IDEMPOTENCY_KEY_PARAMETER, idempotent
+from utils.pagination import KeysetPagination
+from utils.sparse import SPARSE_FIELDSET_PARAMETERS, SparseQuerysetMixin
+from utils.throttling import RateLimitHeadersMixin
+
+ARCHIVED_PARAMETER = OpenApiParameter(
+    'archived', OpenApiTypes.BOOL,
+    description='Read delivered and cancelled orders moved to the archive instead of the current orders.'
+)
 
 
 @extend_schema_view(
@@ -18,14 +40,17 @@ from users.permissions import IsOwnerOrAdminUser
         operation_id="orders_list",
         summary="List all the orders.",
         description="Return a list of all orders.",
+        parameters=SPARSE_FIELDSET_PARAMETERS + [ARCHIVED_PARAMETER],
     ),
     retrieve=extend_schema(
         summary="Retrieve order.",
         description="Get the detail of a specific order.",
+        parameters=SPARSE_FIELDSET_PARAMETERS + [ARCHIVED_PARAMETER],
     ),
     create=extend_schema(
         summary="Create order.",
         description="Create and return order's details.",
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
     ),
     update=extend_schema(
         exclude=True
@@ -55,21 +80,74 @@ from users.permissions import IsOwnerOrAdminUser
     destroy=extend_schema(
         summary="Delete parameter.",
         description="Delete parameter by id.",
-    )
+    ),
+    transition=extend_schema(
+        summary="Change status of orders.",
+        description="Change status of many orders at once, nothing is changed if any transition is not allowed.",
+        request=OrderTransitionSerializer,
+        responses=OrderTransitionSerializer,
+    ),
 )
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     """
     Viewset для заказов.
     """
     order_item_set = OrderItem.objects.select_related('product_info')
+    # items are always prefetched for the last modified time of the order
     queryset = Order.objects.prefetch_related(Prefetch('order_items', queryset=order_item_set))
+    # closed orders moved to the archive are read only with `?archived=true`, see `orders.archive`
+    archived_queryset = ArchivedOrder.objects.prefetch_related(
+        Prefetch('order_items', queryset=ArchivedOrderItem.objects.select_related('product_info'))
+    )
+    sparse_select_related = {'owner': 'owner', 'owner.contacts': 'owner__contacts', 'owner.profile': 'owner__profile'}
+    sparse_prefetch_related = {
+        'order_items.product_info.product': 'order_items__product_info__product',
+        'order_items.product_info.product.category': 'order_items__product_info__product__category',
+        'order_items.product_info.product_parameters': Prefetch(
+            'order_items__product_info__product_parameters',
+            queryset=ProductParameter.objects.select_related('parameter')
+        ),
+    }
     permission_classes = [IsAuthenticated & IsOwnerOrAdminUser]
     serializer_class = OrderSerializer
+    pagination_class = KeysetPagination
 
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter, OrderListFilterBackend]
     ordering_fields = ['amount', ]
 
-    filterset_class = OrderFilter
+    @property
+    def filterset_class(self):
+        return ArchivedOrderFilter if self.is_archived() else OrderFilter
+
+    def is_archived(self):
+        request = getattr(self, 'request', None)
+        return (
+            request is not None and self.action in ('list', 'retrieve')
+            and request.query_params.get('archived', '').lower() in ('1', 'true')
+        )
+
+    def get_queryset(self):
+        if self.is_archived():
+            return self.get_sparse_queryset(self.archived_queryset.all())
+        return super().get_queryset()
+
+    def get_last_modified(self, instance):
+        """Order includes product's details of its items."""
+        return max(
+            [instance.updated_at] + [item.product_info.updated_at for item in instance.order_items.all()]
+        )
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @action(methods=['POST'], detail=False)
+    def transition(self, request):
+        serializer = OrderTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        transit_in_bulk(serializer.validated_data['orders'], serializer.validated_data['status'])
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
     def partial_update(self, request, *args, **kwargs):
         response = super().partial_update(request, *args, **kwargs)
@@ -83,6 +161,8 @@ class OrderViewSet(viewsets.ModelViewSet):
             return [IsAuthenticated(), OR(IsAdminAndIsNotBasket(), IsOwnerAndIsBasketStatus())]
         elif self.action == "destroy":
             return [IsAuthenticated(), OR(IsAdminUser(), IsOwnerAndIsBasketStatus())]
+        elif self.action == "transition":
+            return [IsAuthenticated(), IsAdminUser()]
         else:
             return super(OrderViewSet, self).get_permissions()
 
@@ -99,6 +179,7 @@ class OrderViewSet(viewsets.ModelViewSet):
     create=extend_schema(
         summary="Create basket item.",
         description="Create and return details of basket item.",
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
     ),
     update=extend_schema(
         exclude=True
@@ -114,27 +195,108 @@ class OrderViewSet(viewsets.ModelViewSet):
     confirm=extend_schema(
         summary="Make new order.",
         description="Mark basket as order.",
-    )
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
+    ),
+    bulk=extend_schema(
+        summary="Update basket items.",
+        description="Add, update and remove many basket items, zero quantity removes the item. "
+                    "Return all items of the basket.",
+        request=BasketItemBulkSerializer(many=True),
+        responses=OrderItemSerializer(many=True),
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
+    ),
 )
-class BasketItemViewSet(viewsets.ModelViewSet):
+class BasketItemViewSet(RateLimitHeadersMixin, viewsets.ModelViewSet):
     """
     Viewset для заказов в корзине.
     """
     # Permission IsOwnerUser не нужен так как пользователь получает только свои позиции из корзины
     permission_classes = [IsAuthenticated]
     serializer_class = OrderItemSerializer
+    filter_backends = []
+    bulk_max_items = 100
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
 
     @action(methods=['PATCH'], detail=False)
+    @idempotent
     def confirm(self, request):
-        order, created = Order.objects.get_or_create(status=OrderStatus.BASKET, owner=self.request.user)
-        serializer = OrderSerializer(order, data={'status': OrderStatus.NEW}, context={'request': request}, partial=True)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        basket = get_basket(request.user)
+        with transaction.atomic():
+            order = basket.checkout()
+            serializer = OrderSerializer(
+                order, data={'status': OrderStatus.NEW}, context={'request': request}, partial=True
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        basket.clear()
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(methods=['POST'], detail=False, throttle_classes=[BasketBulkRateThrottle])
+    @idempotent
+    def bulk(self, request):
+        serializer = BasketItemBulkSerializer(
+            data=request.data, many=True, max_length=self.bulk_max_items, context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        basket = serializer.save()
+
+        return Response(
+            OrderItemSerializer(basket.items(), many=True, context={'request': request}).data, status=status.HTTP_200_OK
+        )
+
     def get_queryset(self):
-        # Как только пользователь запросит экземпляр в корзине создаем заказ со статусом корзины.
-        # Далее используем заказ как корзину пока пользователь не подтвердит заказ
-        order, _ = Order.objects.get_or_create(status=OrderStatus.BASKET, owner=self.request.user)
-        return order.order_items.all().select_related('product_info')
+        # Позиции корзины хранятся в заказе со статусом корзины или в redis, см. `orders.baskets`
+        if getattr(self, 'swagger_fake_view', False):
+            return OrderItem.objects.none()
+        return get_basket(self.request.user).items()
+
+    def get_object(self):
+        item = get_basket(self.request.user).get_item(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        if item is None:
+            raise Http404
+        self.check_object_permissions(self.request, item)
+        return item
+
+    def update(self, request, *args, **kwargs):
+        # позиции redis корзины не queryset, поэтому без повторной предзагрузки `UpdateModelMixin`
+        partial = kwargs.pop('partial', False)
+        serializer = self.get_serializer(self.get_object(), data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return Response(serializer.data)
+
+    def perform_destroy(self, instance):
+        get_basket(self.request.user).remove(instance)
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="List orders of the shop.",
+        description="Return the queue of confirmed orders with the items of the supplier's shop, newest first.",
+    ),
+    retrieve=extend_schema(
+        summary="Retrieve order of the shop.",
+        description="Get the order with the items of the supplier's shop.",
+    ),
+)
+class ShopOrderViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Viewset для заказов магазина поставщика.
+    Очередь читается по индексу (shop, status, created_at) с keyset пагинацией.
+    """
+    queryset = ShopOrder.objects.all()
+    permission_classes = [IsAuthenticated & (IsAdminUser | IsSupplier)]
+    serializer_class = ShopOrderSerializer
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, ShopOrderListFilterBackend]
+    filterset_class = ShopOrderFilter
+
+    def paginate_queryset(self, queryset):
+        return attach_shop_order_items(super().paginate_queryset(queryset))
+
+    def get_object(self):
+        return attach_shop_order_items([super().get_object()])[0]
@@ -0,0 +1,45 @@
+from itertools import groupby, islice
+
+from django.db.models import Prefetch
+
+from products.models import Product, ProductCard, ProductInfo, ProductParameter
+from products.serializers import ProductInfoSerializer
+
+
+def build_offers(infos):
+    """Offers of a product card in the format of `ProductInfoSerializer`."""
+    return ProductInfoSerializer(infos, many=True).data
+
+
+def update_product_cards(product_ids, chunk_size=500):
+    """
+    Rebuild cards of the products, `product_ids` is a list of ids or a values queryset.
+    Product's details of every chunk of products are read with three queries and cards are upserted
+    with one bulk insert, so no signals are sent.
+    """
+    products = Product.objects.filter(pk__in=product_ids).order_by('pk').values_list('pk', flat=True)
+    products = products.iterator(chunk_size=chunk_size)
+    while chunk := list(islice(products, chunk_size)):
+        infos = ProductInfo.objects.filter(product__in=chunk).select_related('product__category').prefetch_related(
+            Prefetch(
+                'product_parameters',
+                queryset=ProductParameter.objects.select_related('parameter').order_by('id')
+            )
+        ).order_by('product_id', 'id')
+        offers = {product_id: build_offers(list(group)) for product_id, group in groupby(infos, lambda i: i.product_id)}
+
+        ProductCard.objects.bulk_create(
+            [ProductCard(product_id=product_id, offers=offers.get(product_id, [])) for product_id in chunk],
+            update_conflicts=True,
+            unique_fields=['product'],
+            update_fields=['offers', 'updated_at'],
+        )
+
+
+def get_product_card(product_id):
+    """Offers of the product by primary key, the card is built on the first read."""
+    offers = ProductCard.objects.filter(pk=product_id).values_list('offers', flat=True).first()
+    if offers is None:
+        update_product_cards([product_id])
+        offers = ProductCard.objects.filter(pk=product_id).values_list('offers', flat=True).first()
+    return offers if offers is not None else []
@@ -0,0 +1,98 @@
+import csv
+import json
+
+import yaml
+from django.conf import settings
+from django.db.models import Prefetch
+
+from products.importers import CSV_COLUMNS
+from products.models import Category, Parameter, ProductInfo, ProductParameter
+
+try:
+    from yaml import CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeDumper as YamlDumper
+
+
+class Echo:
+    """
+    File-like object which returns written value instead of buffering it.
+    https://docs.djangoproject.com/en/4.2/howto/outputting-csv/#streaming-large-csv-files
+    """
+
+    def write(self, value):
+        return value
+
+
+class ShopExporter:
+    """
+    Export product's details of a shop in the same formats as the import reads.
+
+    Rows are read with `QuerySet.iterator()`, which uses a server-side cursor on PostgreSQL,
+    and parameters are prefetched for every chunk, so memory does not depend on the shop size.
+    """
+
+    formats = {
+        'yaml': 'application/yaml',
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+    }
+
+    def __init__(self, shop, chunk_size=None):
+        self.shop = shop
+        self.chunk_size = chunk_size or settings.SHOP_EXPORT_CHUNK_SIZE
+
+    def get_queryset(self):
+        product_parameter_set = ProductParameter.objects.select_related('parameter').order_by('id')
+        return ProductInfo.objects.filter(shop=self.shop).select_related('product').prefetch_related(
+            Prefetch('product_parameters', queryset=product_parameter_set)
+        ).order_by('id')
+
+    def get_categories(self):
+        return Category.objects.filter(products__product_infos__shop=self.shop).distinct().order_by('id')
+
+    def rows(self, category_names=False):
+        """
+        Goods rows. Category is given by id as in yaml price list or by name for csv and ndjson.
+        """
+        categories = dict(self.get_categories().values_list('id', 'name')) if category_names else {}
+        for info in self.get_queryset().iterator(chunk_size=self.chunk_size):
+            category = info.product.category_id
+            yield {
+                'id': info.code_id,
+                'category': categories.get(category, category),
+                'model': info.model,
+                'name': info.product.name,
+                'price': str(info.price),
+                'price_rrc': str(info.price_rrc),
+                'quantity': info.quantity,
+                'parameters': {item.parameter.name: item.value for item in info.product_parameters.all()},
+            }
+
+    def export(self, file_format):
+        return getattr(self, f'export_{file_format}')()
+
+    def export_yaml(self):
+        yield yaml.dump({'shop': self.shop.name}, Dumper=YamlDumper, allow_unicode=True)
+        categories = [{'id': pk, 'name': name} for pk, name in self.get_categories().values_list('id', 'name')]
+        yield yaml.dump({'categories': categories}, Dumper=YamlDumper, allow_unicode=True, sort_keys=False)
+        yield 'goods:\n'
+        for row in self.rows():
+            yield yaml.dump([row], Dumper=YamlDumper, allow_unicode=True, sort_keys=False)
+
+    def export_csv(self):
+        parameters = list(
+            Parameter.objects.filter(product_parameters__product_info__shop=self.shop)
+            .distinct().order_by('name').values_list('name', flat=True)
+        )
+        writer = csv.writer(Echo())
+        yield writer.writerow(CSV_COLUMNS + tuple(parameters))
+        for row in self.rows(category_names=True):
+            yield writer.writerow(
+                [row[key] if row[key] is not None else '' for key in CSV_COLUMNS]
+                + [row['parameters'].get(name, '') for name in parameters]
+            )
+
+    def export_ndjson(self):
+        for row in self.rows(category_names=True):
+            yield json.dumps(row, ensure_ascii=False) + '\n'
@@ -1,7 +1,13 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection
+from django.db.models import Count, Exists, F, OuterRef, Q
 from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
 
-from products.models import ProductInfo
+from products.models import ProductInfo, ProductParameter
 
 
 class ProductInfoFilter(filters.FilterSet):
@@ -32,3 +38,113 @@ class ProductInfoListFilterBackend(BaseFilterBackend):
             filter_params = {'shop__id': shop_id}
 
         return queryset.filter(**filter_params)
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Search by the `search` query parameter.
+
+    Substring search goes through `view.search_document` with `icontains`, which is served by a pg_trgm
+    GIN index on PostgreSQL. If the view has `search_vector`, words are also matched with full-text search
+    over its GIN index. Results are ranked by relevance unless other ordering is requested.
+    Other databases fall back to the plain substring search.
+    """
+    search_param = api_settings.SEARCH_PARAM
+
+    def get_search_terms(self, request):
+        return request.query_params.get(self.search_param, '').replace('\x00', '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        document = view.search_document
+        vector = getattr(view, 'search_vector', None)
+        condition = Q(**{f'{document}__icontains': terms.lower()})
+        if connection.vendor != 'postgresql':
+            return queryset.filter(condition)
+
+        if vector is not None:
+            query = SearchQuery(terms, config=settings.PRODUCT_SEARCH_CONFIG, search_type='websearch')
+            condition |= Q(**{vector: query})
+            rank = SearchRank(F(vector), query)
+        else:
+            rank = TrigramSimilarity(document, terms)
+
+        queryset = queryset.filter(condition).annotate(rank=rank)
+        if not queryset.query.order_by:
+            queryset = queryset.order_by('-rank')
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'A search term.',
+            'schema': {'type': 'string'},
+        }]
+
+
+class ProductParameterFilterBackend(BaseFilterBackend):
+    """
+    Filter product's details by parameter values: `?param=<parameter id>:<value>`.
+    Values of the same parameter are joined with OR, different parameters with AND.
+    """
+    param = 'param'
+
+    def get_groups(self, request):
+        """Selected values by parameter id."""
+        groups = {}
+        for item in request.query_params.getlist(self.param):
+            parameter_id, _, value = item.partition(':')
+            if not parameter_id.isdigit() or not value:
+                raise ValidationError({self.param: ['Expected "<parameter id>:<value>".']})
+            groups.setdefault(int(parameter_id), set()).add(value)
+        return groups
+
+    @staticmethod
+    def match(parameter_id, values, product_info=OuterRef('pk')):
+        return Exists(
+            ProductParameter.objects.filter(product_info=product_info, parameter_id=parameter_id, value__in=values)
+        )
+
+    def filter_queryset(self, request, queryset, view):
+        for parameter_id, values in self.get_groups(request).items():
+            queryset = queryset.filter(self.match(parameter_id, values))
+        return queryset
+
+    def get_facets(self, request, queryset):
+        """
+        Value counts of every parameter over the product's details of the queryset, in one grouped query.
+
+        Product's details are filtered by all the selected parameters except the counted one,
+        so values of a parameter which is already selected keep their counts.
+        """
+        facets = ProductParameter.objects.filter(product_info__in=queryset.order_by().values('pk'))
+        for parameter_id, values in self.get_groups(request).items():
+            facets = facets.filter(
+                Q(parameter_id=parameter_id) | self.match(parameter_id, values, product_info=OuterRef('product_info'))
+            )
+
+        result = {}
+        rows = facets.values('parameter_id', 'parameter__name', 'value').annotate(count=Count('id')).order_by(
+            'parameter__name', 'parameter_id', '-count', 'value'
+        )
+        for row in rows:
+            facet = result.setdefault(row['parameter_id'], {
+                'id': row['parameter_id'], 'name': row['parameter__name'], 'values': []
+            })
+            facet['values'].append({'value': row['value'], 'count': row['count']})
+        return list(result.values())
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.param,
+            'required': False,
+            'in': 'query',
+            'description': 'Parameter value as "<parameter id>:<value>", may be repeated.',
+            'schema': {'type': 'array', 'items': {'type': 'string'}},
+            'explode': True,
+        }]
@@ -0,0 +1,350 @@
+import codecs
+import csv
+import json
+import os
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+import yaml
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from products.cards import update_product_cards
+from products.models import Category, Parameter, Product, ProductInfo, ProductParameter, Shop
+from products.search import update_search_index
+from products.signals import product_infos_changed
+from utils.cache import bump_version
+
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+
+# Columns of a csv price list, all other columns are parameters of the product.
+CSV_COLUMNS = ('id', 'category', 'name', 'model', 'price', 'price_rrc', 'quantity')
+
+
+class PriceListError(ValueError):
+    """Price list can not be read."""
+
+
+class PriceList:
+    """
+    Price list of a shop: shop name, category names by their ids in the file and goods rows.
+    """
+
+    def __init__(self, goods, shop=None, categories=None):
+        self.goods = goods
+        self.shop = shop
+        self.categories = categories or {}
+
+
+def _document_to_price_list(data):
+    """Build a price list from a parsed yaml or json document."""
+    if not isinstance(data, dict):
+        raise PriceListError('Price list must be a mapping with "goods" list.')
+
+    goods = data.get('goods') or []
+    if not isinstance(goods, list):
+        raise PriceListError('"goods" must be a list.')
+
+    categories = {}
+    for category in data.get('categories') or []:
+        if not isinstance(category, dict) or 'id' not in category or 'name' not in category:
+            raise PriceListError('Every category must have "id" and "name".')
+        categories[category['id']] = category['name']
+
+    return PriceList(iter(goods), shop=data.get('shop'), categories=categories)
+
+
+def read_yaml(stream):
+    try:
+        data = yaml.load(stream, Loader=YamlLoader)
+    except (yaml.YAMLError, UnicodeDecodeError) as e:
+        raise PriceListError(f'Invalid yaml: {e}')
+    return _document_to_price_list(data)
+
+
+def read_json(stream):
+    try:
+        data = json.load(stream)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise PriceListError(f'Invalid json: {e}')
+    return _document_to_price_list(data)
+
+
+def read_ndjson(stream):
+    """One goods row per line, category is given by name."""
+    def rows():
+        try:
+            for number, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    raise PriceListError(f'Invalid json on line {number}: {e}')
+        except UnicodeDecodeError as e:
+            raise PriceListError(f'Invalid encoding: {e}')
+
+    return PriceList(rows())
+
+
+def read_csv(stream):
+    """One goods row per line, category is given by name, extra columns are parameters."""
+    def rows():
+        try:
+            for row in csv.DictReader(stream):
+                item = {key: row.pop(key) for key in CSV_COLUMNS if row.get(key) not in (None, '')}
+                item['parameters'] = {key: value for key, value in row.items() if key and value not in (None, '')}
+                yield item
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise PriceListError(f'Invalid csv: {e}')
+
+    return PriceList(rows())
+
+
+READERS = {
+    'application/yaml': read_yaml,
+    'application/x-yaml': read_yaml,
+    'text/yaml': read_yaml,
+    'application/json': read_json,
+    'application/x-ndjson': read_ndjson,
+    'text/csv': read_csv,
+}
+
+EXTENSIONS = {
+    '.yaml': read_yaml,
+    '.yml': read_yaml,
+    '.json': read_json,
+    '.ndjson': read_ndjson,
+    '.jsonl': read_ndjson,
+    '.csv': read_csv,
+}
+
+
+def get_reader(content_type=None, filename=None):
+    """Choose price list reader by the content type or by the file extension."""
+    reader = READERS.get((content_type or '').split(';')[0].strip().lower())
+    if reader is None and filename:
+        reader = EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+    if reader is None:
+        raise PriceListError(f'Unsupported price list format: {content_type or filename}.')
+    return reader
+
+
+def read_price_list(stream, content_type=None, filename=None):
+    """Open a binary stream as a price list."""
+    reader = get_reader(content_type, filename)
+    if stream is None:
+        raise PriceListError('Price list is empty.')
+
+    return reader(codecs.getreader('utf-8')(stream))
+
+
+def _decimal(value, field):
+    try:
+        return Decimal(str(value if value is not None else 0)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise PriceListError(f'"{field}" must be a number.')
+
+
+def _string(value, field, max_length, required=False):
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise PriceListError(f'"{field}" is required.')
+    if len(value) > max_length:
+        raise PriceListError(f'"{field}" must be at most {max_length} characters.')
+    return value
+
+
+def _validated(value, field, name):
+    """Value checked by the validators of the field of product's details."""
+    try:
+        ProductInfo._meta.get_field(name).run_validators(value)
+    except ValidationError as e:
+        raise PriceListError(f'"{field}": {" ".join(e.messages)}')
+    return value
+
+
+def clean_row(row, categories):
+    """Validate goods row and convert it to the values stored in the database."""
+    if not isinstance(row, dict):
+        raise PriceListError('Row must be a mapping.')
+
+    try:
+        code_id = int(row.get('id'))
+        quantity = int(row.get('quantity', 1))
+    except (TypeError, ValueError):
+        raise PriceListError('"id" and "quantity" must be integers.')
+
+    category = row.get('category')
+    category = categories.get(category, category)
+
+    parameters = row.get('parameters') or {}
+    if not isinstance(parameters, dict):
+        raise PriceListError('"parameters" must be a mapping.')
+
+    return {
+        'code_id': _validated(code_id, 'id', 'code_id'),
+        'name': _string(row.get('name'), 'name', 80, required=True),
+        'category': _string(category, 'category', 40) or None,
+        'model': _string(row.get('model'), 'model', 80),
+        'price': _validated(_decimal(row.get('price'), 'price'), 'price', 'price'),
+        'price_rrc': _validated(_decimal(row.get('price_rrc'), 'price_rrc'), 'price_rrc', 'price_rrc'),
+        'quantity': _validated(quantity, 'quantity', 'quantity'),
+        'parameters': {
+            _string(name, 'parameter', 40, required=True): _string(value, name, 100)
+            for name, value in parameters.items()
+        },
+    }
+
+
+class ShopImporter:
+    """
+    Load a price list into a shop.
+
+    Goods are read lazily and written by chunks: categories, products and parameters are resolved
+    with one query per chunk, product's details and their parameters are upserted with bulk inserts,
+    then search documents and product cards of the chunk are rebuilt.
+    Invalid rows are skipped and reported in `errors`.
+    """
+
+    def __init__(self, shop, chunk_size=None):
+        self.shop = shop
+        self.chunk_size = chunk_size or settings.SHOP_IMPORT_CHUNK_SIZE
+        self.rows = 0
+        self.imported = 0
+        self.errors = []
+        self._category_ids = {}
+        self._parameter_ids = {}
+
+    def run(self, price_list, progress=None):
+        """Import all goods of the price list. `progress` is called with the importer after every chunk."""
+        if price_list.shop and str(price_list.shop) != self.shop.name:
+            self.shop.name = _string(price_list.shop, 'shop', 50)
+            self.shop.save(update_fields=['name'])
+
+        goods = enumerate(price_list.goods, start=1)
+        while chunk := list(islice(goods, self.chunk_size)):
+            rows = {}
+            for number, row in chunk:
+                try:
+                    row = clean_row(row, price_list.categories)
+                except PriceListError as e:
+                    self.errors.append({'row': number, 'error': str(e)})
+                    continue
+                # the last occurrence of the same offer wins
+                rows[(row['name'], row['category'], row['code_id'])] = row
+
+            if rows:
+                with transaction.atomic():
+                    self._load(list(rows.values()))
+                # bulk queries do not send signals
+                bump_version(Shop, Category, Product, ProductInfo, Parameter, ProductParameter)
+
+            self.rows += len(chunk)
+            self.imported += len(rows)
+            if progress is not None:
+                progress(self)
+
+        return self
+
+    def _load(self, rows):
+        category_ids = self._get_category_ids({row['category'] for row in rows if row['category']})
+        product_ids = self._get_product_ids({(row['name'], category_ids.get(row['category'])) for row in rows})
+        parameter_ids = self._get_parameter_ids({name for row in rows for name in row['parameters']})
+
+        for row in rows:
+            row['product_id'] = product_ids[(row['name'], category_ids.get(row['category']))]
+
+        ProductInfo.objects.bulk_create(
+            [
+                ProductInfo(
+                    product_id=row['product_id'],
+                    shop=self.shop,
+                    code_id=row['code_id'],
+                    model=row['model'],
+                    price=row['price'],
+                    price_rrc=row['price_rrc'],
+                    quantity=row['quantity'],
+                )
+                for row in rows
+            ],
+            update_conflicts=True,
+            unique_fields=['product', 'shop', 'code_id'],
+            update_fields=['model', 'price', 'price_rrc', 'quantity', 'updated_at'],
+        )
+
+        info_ids = {
+            (product_id, code_id): pk
+            for product_id, code_id, pk in ProductInfo.objects.filter(
+                shop=self.shop, code_id__in={row['code_id'] for row in rows}
+            ).values_list('product_id', 'code_id', 'id')
+        }
+
+        ProductParameter.objects.bulk_create(
+            [
+                ProductParameter(
+                    product_info_id=info_ids[(row['product_id'], row['code_id'])],
+                    parameter_id=parameter_ids[name],
+                    value=value,
+                )
+                for row in rows
+                for name, value in row['parameters'].items()
+            ],
+            update_conflicts=True,
+            unique_fields=['product_info', 'parameter'],
+            update_fields=['value'],
+        )
+
+        update_search_index(ProductInfo.objects.filter(pk__in=info_ids.values()))
+        update_product_cards({row['product_id'] for row in rows})
+        product_infos_changed.send(sender=ProductInfo, product_infos=list(info_ids.values()))
+
+    def _get_category_ids(self, names):
+        missing = names - self._category_ids.keys()
+        if missing:
+            Category.objects.bulk_create([Category(name=name) for name in missing], ignore_conflicts=True)
+            found = dict(Category.objects.filter(name__in=missing).values_list('name', 'id'))
+            Category.shops.through.objects.bulk_create(
+                [Category.shops.through(category_id=pk, shop_id=self.shop.id) for pk in found.values()],
+                ignore_conflicts=True,
+            )
+            self._category_ids.update(found)
+        return self._category_ids
+
+    def _get_parameter_ids(self, names):
+        missing = names - self._parameter_ids.keys()
+        if missing:
+            self._parameter_ids.update(self._find_parameters(missing))
+            created = missing - self._parameter_ids.keys()
+            Parameter.objects.bulk_create([Parameter(name=name) for name in created])
+            self._parameter_ids.update(self._find_parameters(created))
+        return self._parameter_ids
+
+    @staticmethod
+    def _find_parameters(names):
+        found = {}
+        for name, pk in Parameter.objects.filter(name__in=names).order_by('id').values_list('name', 'id'):
+            found.setdefault(name, pk)
+        return found
+
+    @staticmethod
+    def _find_products(keys):
+        found = {}
+        products = Product.objects.filter(name__in={name for name, _ in keys}).order_by('id')
+        for name, category_id, pk in products.values_list('name', 'category_id', 'id'):
+            if (name, category_id) in keys:
+                found.setdefault((name, category_id), pk)
+        return found
+
+    def _get_product_ids(self, keys):
+        product_ids = self._find_products(keys)
+        missing = keys - product_ids.keys()
+        if missing:
+            Product.objects.bulk_create([Product(name=name, category_id=category_id) for name, category_id in missing])
+            product_ids.update(self._find_products(missing))
+        return product_ids
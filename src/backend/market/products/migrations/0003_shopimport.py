@@ -0,0 +1,37 @@
+# Generated by Django 4.2.11 on 2026-10-18 00:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('products', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShopImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='imports/%Y/%m/%d/', verbose_name='Price list')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='Content type')),
+                ('status', models.TextField(choices=[('PENDING', 'В очереди'), ('RUNNING', 'Выполняется'), ('DONE', 'Завершен'), ('FAILED', 'Ошибка')], default='PENDING', verbose_name='Status')),
+                ('rows', models.PositiveIntegerField(default=0, verbose_name='Rows processed')),
+                ('imported', models.PositiveIntegerField(default=0, verbose_name='Rows imported')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='Errors')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('owner', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='shop_imports', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='imports', to='products.shop', verbose_name='Shop')),
+            ],
+            options={
+                'verbose_name': 'Shop import',
+                'verbose_name_plural': 'List of shop imports',
+                'ordering': ('-created_at',),
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_shopimport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productinfo',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Updated at'),
+            preserve_default=False,
+        ),
+    ]
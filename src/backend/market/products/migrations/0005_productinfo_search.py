@@ -0,0 +1,75 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:40
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+INDEXES = (
+    (
+        'products_productinfo_search_vector_gin',
+        'ON products_productinfo USING gin (search_vector)',
+    ),
+    (
+        'products_productinfo_search_document_trgm',
+        'ON products_productinfo USING gin (UPPER(search_document::text) gin_trgm_ops)',
+    ),
+    (
+        'products_product_name_trgm',
+        'ON products_product USING gin (UPPER(name::text) gin_trgm_ops)',
+    ),
+)
+
+
+def create_indexes(apps, schema_editor):
+    """GIN indexes exist only on PostgreSQL, other databases fall back to plain scans."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, definition in INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} {definition}')
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def build_search_documents(apps, schema_editor):
+    ProductInfo = apps.get_model('products', 'ProductInfo')
+    infos = ProductInfo.objects.select_related('product__category').prefetch_related('product_parameters')
+    for info in infos.iterator(chunk_size=1000):
+        parts = [info.product.name, info.model]
+        if info.product.category is not None:
+            parts.append(info.product.category.name)
+        parts += [item.value for item in info.product_parameters.all()]
+        ProductInfo.objects.filter(pk=info.pk).update(search_document=' '.join(part for part in parts if part).lower())
+
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "UPDATE products_productinfo SET search_vector = to_tsvector('simple', search_document)"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_productinfo_updated_at'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='productinfo',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Search document'),
+        ),
+        migrations.AddField(
+            model_name='productinfo',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Search vector'),
+        ),
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-18 00:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_productinfo_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productparameter',
+            index=models.Index(fields=['parameter', 'value'], name='product_parameter_value_idx'),
+        ),
+    ]
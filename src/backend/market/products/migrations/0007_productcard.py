@@ -0,0 +1,26 @@
+# Generated by Django 4.2.11 on 2026-10-18 00:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_productparameter_value_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCard',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='products.product', verbose_name='Product')),
+                ('offers', models.JSONField(default=list, verbose_name='Offers')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+            ],
+            options={
+                'verbose_name': 'Product card',
+                'verbose_name_plural': 'List of product cards',
+            },
+        ),
+    ]
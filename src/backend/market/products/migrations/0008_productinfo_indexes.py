@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-18 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_productcard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productinfo',
+            index=models.Index(fields=['shop', 'id'], name='product_info_shop_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productinfo',
+            index=models.Index(fields=['price', 'id'], name='product_info_price_idx'),
+        ),
+    ]
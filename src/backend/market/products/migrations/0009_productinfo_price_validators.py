@@ -0,0 +1,24 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:42
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_productinfo_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='productinfo',
+            name='price',
+            field=models.DecimalField(blank=True, decimal_places=2, default=0, max_digits=12, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Цена'),
+        ),
+        migrations.AlterField(
+            model_name='productinfo',
+            name='price_rrc',
+            field=models.DecimalField(blank=True, decimal_places=2, default=0, max_digits=12, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Рекомендуемая розничная цена'),
+        ),
+    ]
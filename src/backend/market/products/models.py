@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.contrib.postgres import validators
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -74,6 +75,12 @@ class ProductInfo(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['product', 'shop', 'code_id'], name='unique_product_info'),
         ]
+        indexes = [
+            # product's details of the shop in the order of ids: shop filters and export
+            models.Index(fields=['shop', 'id'], name='product_info_shop_idx'),
+            # ordering by price with the keyset pagination
+            models.Index(fields=['price', 'id'], name='product_info_price_idx'),
+        ]
 
     product = models.ForeignKey(
         Product,
@@ -111,7 +118,7 @@ class ProductInfo(models.Model):
         blank=True,
         default=0,
         max_digits=12,
-        decimal_places=2,
+        decimal_places=2,        validators=[validators.MinValueValidator(0)],
     )
 
     price_rrc = models.DecimalField(
@@ -120,7 +127,7 @@ class ProductInfo(models.Model):
         blank=True,
         default=0,
         max_digits=12,
-        decimal_places=2,
+        decimal_places=2,        validators=[validators.MinValueValidator(0)],
     )
 
     parameters = models.ManyToManyField(
@@ -131,6 +138,16 @@ class ProductInfo(models.Model):
 
     )
 
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_('Updated at')
+    )
+
+    # Maintained by `products.search.update_search_index`, indexed with pg_trgm and GIN on PostgreSQL
+    # by migration 0005 only, not in `Meta.indexes`: sqlite would create them on every rebuild of the table
+    search_document = models.TextField(verbose_name=_('Search document'), blank=True, default='', editable=False)
+    search_vector = SearchVectorField(verbose_name=_('Search vector'), null=True, editable=False)
+
     def __str__(self):
         return f'Товар {self.product.name} {self.model}'
 
@@ -156,6 +173,9 @@ class ProductParameter(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['product_info', 'parameter'], name='unique_product_parameter'),
         ]
+        indexes = [
+            models.Index(fields=['parameter', 'value'], name='product_parameter_value_idx'),
+        ]
 
     product_info = models.ForeignKey(
         ProductInfo,
@@ -172,4 +192,83 @@ class ProductParameter(models.Model):
         on_delete=models.CASCADE
     )
 
-    value = models.CharField(verbose_name='Значение', max_length=100)
\ No newline at end of file
+    value = models.CharField(verbose_name='Значение', max_length=100)
+
+
+class ProductCard(models.Model):
+    """ Карточка товара: все предложения магазинов с ценами и параметрами одним документом. """
+
+    class Meta:
+        verbose_name = _('Product card')
+        verbose_name_plural = _('List of product cards')
+
+    product = models.OneToOneField(
+        Product,
+        verbose_name=_('Product'),
+        related_name='card',
+        primary_key=True,
+        on_delete=models.CASCADE
+    )
+
+    offers = models.JSONField(verbose_name=_('Offers'), default=list)
+
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated at'))
+
+    def __str__(self):
+        return str(self.product_id)
+
+
+class ImportStatus(models.TextChoices):
+    """ Статус импорта """
+
+    PENDING = 'PENDING', 'В очереди'
+    RUNNING = 'RUNNING', 'Выполняется'
+    DONE = 'DONE', 'Завершен'
+    FAILED = 'FAILED', 'Ошибка'
+
+
+class ShopImport(models.Model):
+    """ Фоновый импорт прайс-листа магазина. """
+
+    class Meta:
+        verbose_name = _('Shop import')
+        verbose_name_plural = _('List of shop imports')
+        ordering = ('-created_at',)
+
+    shop = models.ForeignKey(
+        Shop,
+        verbose_name=_('Shop'),
+        related_name='imports',
+        on_delete=models.CASCADE
+    )
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name=_('User'),
+        related_name='shop_imports',
+        null=True,
+        on_delete=models.SET_NULL
+    )
+
+    file = models.FileField(verbose_name=_('Price list'), upload_to='imports/%Y/%m/%d/')
+
+    content_type = models.CharField(verbose_name=_('Content type'), max_length=100, blank=True)
+
+    status = models.TextField(
+        choices=ImportStatus.choices,
+        verbose_name=_('Status'),
+        default=ImportStatus.PENDING
+    )
+
+    rows = models.PositiveIntegerField(verbose_name=_('Rows processed'), default=0)
+
+    imported = models.PositiveIntegerField(verbose_name=_('Rows imported'), default=0)
+
+    errors = models.JSONField(verbose_name=_('Errors'), default=list, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created at'))
+
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated at'))
+
+    def __str__(self):
+        return f'{self.shop} {self.status} - {self.created_at}'
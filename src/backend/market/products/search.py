@@ -0,0 +1,39 @@
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import connection
+from django.db.models import Prefetch
+
+from products.models import ProductInfo, ProductParameter
+
+
+def build_search_document(info):
+    """
+    Searchable text of product's details: product and category names, model and parameter values.
+    Text is lowercased, so the substring search is case-insensitive on SQLite for non-ascii text too.
+    """
+    parts = [info.product.name, info.model]
+    if info.product.category is not None:
+        parts.append(info.product.category.name)
+    parts += [item.value for item in info.product_parameters.all()]
+    return ' '.join(part for part in parts if part).lower()
+
+
+def update_search_index(queryset, chunk_size=1000):
+    """
+    Rebuild search documents of product's details and, on PostgreSQL, their full-text vectors.
+    Bulk queries are used, so no signals are sent and `updated_at` is kept.
+    """
+    infos = queryset.select_related('product__category').prefetch_related(
+        Prefetch('product_parameters', queryset=ProductParameter.objects.order_by('id'))
+    ).order_by()
+    infos = infos.iterator(chunk_size=chunk_size)
+    while chunk := list(islice(infos, chunk_size)):
+        for info in chunk:
+            info.search_document = build_search_document(info)
+        ProductInfo.objects.bulk_update(chunk, ['search_document'])
+        if connection.vendor == 'postgresql':
+            ProductInfo.objects.filter(pk__in=[info.pk for info in chunk]).update(
+                search_vector=SearchVector('search_document', config=settings.PRODUCT_SEARCH_CONFIG)
+            )
@@ -1,10 +1,11 @@
 from rest_framework import serializers
 
-from products.models import Product, ProductInfo, Parameter, ProductParameter, Category, Shop
+from products.models import Product, ProductInfo, Parameter, ProductParameter, Category, Shop, ShopImport
 from users.serializers import UserSerializer
+from utils.sparse import SparseFieldsMixin
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer для товаров
     """
@@ -15,7 +16,7 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'category',)
 
 
-class ParameterSerializer(serializers.ModelSerializer):
+class ParameterSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer для параметров
     """
@@ -24,7 +25,7 @@ class ParameterSerializer(serializers.ModelSerializer):
         fields = ('id', 'name',)
 
 
-class ProductParameterSerializer(serializers.ModelSerializer):
+class ProductParameterSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer для параметров товара
     """
@@ -36,7 +37,7 @@ class ProductParameterSerializer(serializers.ModelSerializer):
         fields = ('id', 'parameter', 'value', 'parameter_id',)
 
 
-class ProductInfoSerializer(serializers.ModelSerializer):
+class ProductInfoSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer для информации о товаре
     """
@@ -122,7 +123,7 @@ class ProductInfoSerializer(serializers.ModelSerializer):
         return data
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer для категории
     """
@@ -131,7 +132,7 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ('id', 'name', )
 
 
-class ShopSerializer(serializers.ModelSerializer):
+class ShopSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer для магазина
     """
@@ -146,3 +147,13 @@ class ShopSerializer(serializers.ModelSerializer):
         validated_data['owner'] = self.context["request"].user
         validated_data['owner'].is_supplier = True
         return super().create(validated_data)
+
+
+class ShopImportSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializer для фонового импорта магазина
+    """
+    class Meta:
+        model = ShopImport
+        fields = ('id', 'status', 'rows', 'imported', 'errors', 'created_at', 'updated_at',)
+        read_only_fields = fields
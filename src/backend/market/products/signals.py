@@ -0,0 +1,145 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from products.cards import update_product_cards
+from products.models import Category, Parameter, Product, ProductCard, ProductInfo, ProductParameter, Shop
+from products.search import update_search_index
+from users.models import Contact, UserProfile
+from utils.cache import bump_version
+
+CATALOG_MODELS = (Shop, Category, Product, ProductInfo, Parameter, ProductParameter, Contact, UserProfile)
+
+# Sent by bulk writes of product's details, which send no model signals, with ids of `product_infos`
+product_infos_changed = Signal()
+
+
+def invalidate_catalog(sender, **kwargs):
+    """Catalog responses are cached by model versions, see `utils.cache.CachedResponseMixin`."""
+    bump_version(sender)
+
+
+# receivers are connected per model: receivers without a sender run on every write of the project
+# and a `post_delete` receiver disables fast deletes of all the models
+for model in CATALOG_MODELS:
+    post_save.connect(invalidate_catalog, sender=model, dispatch_uid=f'invalidate_catalog_{model._meta.label_lower}')
+    post_delete.connect(invalidate_catalog, sender=model, dispatch_uid=f'invalidate_catalog_{model._meta.label_lower}')
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_catalog_users(sender, **kwargs):
+    # login updates only last login of the user, which is not in the catalog
+    if kwargs.get('update_fields') != frozenset({'last_login'}):
+        bump_version(sender)
+
+
+@receiver(m2m_changed, sender=Category.shops.through)
+def invalidate_category_shops(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version(Category, Shop)
+
+
+@receiver(post_save, sender=ProductInfo)
+def index_product_info(sender, instance, **kwargs):
+    update_search_index(ProductInfo.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=ProductParameter)
+@receiver(post_delete, sender=ProductParameter)
+def index_product_parameter(sender, instance, **kwargs):
+    update_search_index(ProductInfo.objects.filter(pk=instance.product_info_id))
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, created, **kwargs):
+    if not created:
+        update_search_index(ProductInfo.objects.filter(product=instance))
+
+
+@receiver(post_save, sender=Category)
+def index_category(sender, instance, created, **kwargs):
+    if not created:
+        update_search_index(ProductInfo.objects.filter(product__category=instance))
+
+
+def touch_product_infos(product_infos):
+    """Validators of product's details are built from `updated_at`, nested objects change it too."""
+    product_infos.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=ProductParameter)
+@receiver(post_delete, sender=ProductParameter)
+def touch_product_parameter(sender, instance, **kwargs):
+    touch_product_infos(ProductInfo.objects.filter(pk=instance.product_info_id))
+
+
+@receiver(post_save, sender=Product)
+def touch_product(sender, instance, created, **kwargs):
+    if not created:
+        touch_product_infos(ProductInfo.objects.filter(product=instance))
+
+
+@receiver(post_save, sender=Category)
+def touch_category(sender, instance, created, **kwargs):
+    if not created:
+        touch_product_infos(ProductInfo.objects.filter(product__category=instance))
+
+
+@receiver(post_save, sender=Parameter)
+def touch_parameter(sender, instance, created, **kwargs):
+    if not created:
+        touch_product_infos(ProductInfo.objects.filter(product_parameters__parameter=instance))
+
+
+@receiver(pre_save, sender=ProductInfo)
+def remember_card_product(sender, instance, update_fields=None, **kwargs):
+    """Product's details may be moved to another product, card of the previous one is rebuilt too."""
+    instance._card_product_ids = {instance.product_id}
+    if instance.pk is not None and (update_fields is None or 'product' in update_fields):
+        instance._card_product_ids.update(
+            ProductInfo.objects.filter(pk=instance.pk).values_list('product_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=ProductInfo)
+def update_card_product_info(sender, instance, **kwargs):
+    update_product_cards(getattr(instance, '_card_product_ids', None) or [instance.product_id])
+
+
+@receiver(post_save, sender=ProductParameter)
+def update_card_product_parameter(sender, instance, **kwargs):
+    update_product_cards(ProductInfo.objects.filter(pk=instance.product_info_id).values('product_id'))
+
+
+@receiver(post_save, sender=Product)
+def update_card_product(sender, instance, created, **kwargs):
+    if not created:
+        update_product_cards([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def update_card_category(sender, instance, created, **kwargs):
+    if not created:
+        update_product_cards(Product.objects.filter(category=instance).values('pk'))
+
+
+@receiver(post_save, sender=Parameter)
+def update_card_parameter(sender, instance, created, **kwargs):
+    if not created:
+        update_product_cards(ProductInfo.objects.filter(product_parameters__parameter=instance).values('product_id'))
+
+
+@receiver(post_delete, sender=ProductInfo)
+def drop_card_product_info(sender, instance, **kwargs):
+    """
+    Deletions may cascade from the product itself, so the card is dropped instead of being rebuilt
+    and it is built again on the next read.
+    """
+    ProductCard.objects.filter(pk=instance.product_id).delete()
+
+
+@receiver(post_delete, sender=ProductParameter)
+def drop_card_product_parameter(sender, instance, **kwargs):
+    ProductCard.objects.filter(product__product_infos=instance.product_info_id).delete()
@@ -0,0 +1,37 @@
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from products.importers import PriceListError, ShopImporter, read_price_list
+from products.models import ImportStatus, ShopImport
+
+
+@shared_task(ignore_result=True)
+def import_shop_data(job_id):
+    """Run shop import job and store its progress and result in the job, the price list is deleted after it."""
+    job = ShopImport.objects.select_related('shop').get(pk=job_id)
+    ShopImport.objects.filter(pk=job.pk).update(status=ImportStatus.RUNNING, updated_at=timezone.now())
+
+    def progress(importer):
+        ShopImport.objects.filter(pk=job.pk).update(
+            rows=importer.rows, imported=importer.imported, updated_at=timezone.now()
+        )
+
+    importer = ShopImporter(job.shop)
+    job.status = ImportStatus.DONE
+    try:
+        with job.file.open('rb') as f:
+            importer.run(read_price_list(f, content_type=job.content_type, filename=job.file.name), progress)
+    except PriceListError as e:
+        job.status = ImportStatus.FAILED
+        importer.errors.append({'error': str(e)})
+    except Exception:
+        job.status = ImportStatus.FAILED
+        importer.errors.append({'error': 'Internal error.'})
+        raise
+    finally:
+        job.rows = importer.rows
+        job.imported = importer.imported
+        job.errors = importer.errors[:settings.SHOP_IMPORT_MAX_ERRORS]
+        job.file.delete(save=False)
+        job.save(update_fields=['status', 'rows', 'imported', 'errors', 'file', 'updated_at'])
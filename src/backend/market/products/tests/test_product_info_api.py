@@ -1,4 +1,6 @@
 import decimal
+import json
+from base64 import urlsafe_b64encode
 
 import pytest
 from rest_framework import status
@@ -496,3 +498,249 @@ def test_delete_order_for_supplier_client(api_client, product_info_factory):
     url = reverse("products-info-detail", kwargs={'pk': info.id})
     resp = client.delete(url)
     assert resp.status_code == status.HTTP_204_NO_CONTENT
+
+
+@pytest.mark.django_db
+def test_list_info_keyset_pagination(api_client, product_info_factory):
+    # arrange
+    client, user = api_client()
+    # prices repeat so the pages must be split on the id tie-breaker
+    info = [product_info_factory(price=i % 3) for i in range(25)]
+    url = reverse("products-info-list")
+    expected = [obj.id for obj in sorted(info, key=lambda obj: (-obj.price, -obj.id))]
+
+    # act: walk forward
+    ids, pages, next_url = [], [], url + '?ordering=-price'
+    while next_url:
+        resp = client.get(next_url)
+        assert resp.status_code == status.HTTP_200_OK
+        resp_json = resp.json()
+        assert 'count' not in resp_json
+        pages.append(resp_json)
+        ids += [item['id'] for item in resp_json['results']]
+        next_url = resp_json['next']
+
+    # assert
+    assert ids == expected
+    assert len(pages) == 3
+    assert pages[0]['previous'] is None
+
+    # act: walk back from the last page
+    resp = client.get(pages[-1]['previous'])
+    assert resp.status_code == status.HTTP_200_OK
+    assert [item['id'] for item in resp.json()['results']] == expected[10:20]
+
+
+@pytest.mark.django_db
+def test_list_info_invalid_cursor(api_client):
+    # arrange
+    client, user = api_client()
+    url = reverse("products-info-list")
+
+    # act
+    resp = client.get(url, {'cursor': 'invalid'})
+
+    # assert
+    assert resp.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_list_info_tampered_cursor(api_client, product_info_factory):
+    # arrange: cursor decodes, but its values are not values of the ordering fields
+    client, user = api_client()
+    product_info_factory()
+    url = reverse("products-info-list")
+
+    for values in (['abc', 1], [100, 'x']):
+        cursor = urlsafe_b64encode(json.dumps({'v': values, 'r': False}).encode()).decode()
+
+        # act
+        resp = client.get(url, {'cursor': cursor, 'ordering': 'price'})
+
+        # assert
+        assert resp.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_retrieve_info_conditional_get(api_client, product_info_factory, product_parameter_factory):
+    # arrange
+    client, _ = api_client()
+    info = product_info_factory()
+    url = reverse("products-info-detail", kwargs={'pk': info.id})
+    resp = client.get(url)
+    etag, last_modified = resp['ETag'], resp['Last-Modified']
+
+    # act
+    resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    # assert
+    assert resp.status_code == status.HTTP_304_NOT_MODIFIED
+    assert resp['ETag'] == etag
+    assert not resp.content
+
+    # act
+    resp = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    # assert
+    assert resp.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # act: changed object
+    info.price = 5000
+    info.save()
+    resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp['ETag'] != etag
+    assert decimal.Decimal(resp.json()['price']) == info.price
+
+    # act: changed nested objects
+    product_parameter = product_parameter_factory(product_info=info)
+    for nested, field in ((info.product, 'name'), (product_parameter, 'value'), (product_parameter.parameter, 'name')):
+        etag = client.get(url)['ETag']
+        setattr(nested, field, 'changed')
+        nested.save()
+        resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        # assert
+        assert resp.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_list_info_conditional_get(api_client, product_info_factory):
+    # arrange
+    client, _ = api_client()
+    info = product_info_factory(_quantity=3)
+    url = reverse("products-info-list")
+    etag = client.get(url)['ETag']
+
+    # act
+    resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    # assert
+    assert resp.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # act: removed object
+    info[1].delete()
+    resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert len(resp.json()['results']) == 2
+
+
+@pytest.mark.django_db
+def test_search_info_by_product_category_and_parameters(api_client, product_info_factory, product_factory,
+                                                        category_factory, product_parameter_factory):
+    # arrange
+    client, user = api_client()
+    category = category_factory(name='Смартфоны')
+    info = product_info_factory(model='apple/iphone', product=product_factory(name='iPhone XR', category=category))
+    product_info_factory(model='samsung/galaxy')
+    parameter = product_parameter_factory(product_info=info, value='Золотистый')
+    url = reverse("products-info-list")
+
+    for terms in ('iphone xr', 'СМАРТФОН', 'золот', 'APPLE/'):
+        # act
+        resp = client.get(url, {'search': terms})
+
+        # assert
+        assert resp.status_code == status.HTTP_200_OK
+        assert [item['id'] for item in resp.json()['results']] == [info.id], terms
+
+    # act: index follows the changes of the catalog
+    parameter.value = 'Черный'
+    parameter.save()
+    category.name = 'Телефоны'
+    category.save()
+
+    # assert
+    assert not client.get(url, {'search': 'золот'}).json()['results']
+    assert client.get(url, {'search': 'черн'}).json()['results'][0]['id'] == info.id
+    assert client.get(url, {'search': 'телефон'}).json()['results'][0]['id'] == info.id
+
+
+@pytest.mark.django_db
+def test_filter_info_by_parameters_and_facets(api_client, product_info_factory, parameter_factory,
+                                              product_parameter_factory):
+    # arrange
+    client, user = api_client()
+    color, memory = parameter_factory(name='Цвет'), parameter_factory(name='Память')
+    infos = product_info_factory(_quantity=4)
+    for info, (color_value, memory_value) in zip(infos, [('черный', '64'), ('черный', '256'),
+                                                         ('белый', '256'), ('белый', '64')]):
+        product_parameter_factory(product_info=info, parameter=color, value=color_value)
+        product_parameter_factory(product_info=info, parameter=memory, value=memory_value)
+    url = reverse("products-info-list")
+    facets_url = reverse("products-info-facets")
+
+    # act: values of one parameter are joined with OR, parameters with AND
+    resp = client.get(url, {'param': [f'{color.id}:черный', f'{color.id}:белый', f'{memory.id}:256']})
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert sorted(item['id'] for item in resp.json()['results']) == [infos[1].id, infos[2].id]
+
+    # act
+    resp = client.get(facets_url, {'param': f'{color.id}:черный'})
+
+    # assert: selected parameter keeps counts of other values
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json() == [
+        {'id': memory.id, 'name': 'Память', 'values': [{'value': '256', 'count': 1}, {'value': '64', 'count': 1}]},
+        {'id': color.id, 'name': 'Цвет', 'values': [{'value': 'белый', 'count': 2}, {'value': 'черный', 'count': 2}]},
+    ]
+
+    # act
+    infos[0].model = 'apple/iphone'
+    infos[0].save()
+    resp = client.get(facets_url, {'model': infos[0].model})
+
+    # assert: other filters are applied
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json() == [
+        {'id': memory.id, 'name': 'Память', 'values': [{'value': '64', 'count': 1}]},
+        {'id': color.id, 'name': 'Цвет', 'values': [{'value': 'черный', 'count': 1}]},
+    ]
+
+
+@pytest.mark.django_db
+def test_filter_info_by_invalid_parameter(api_client):
+    # arrange
+    client, user = api_client()
+
+    for url in (reverse("products-info-list"), reverse("products-info-facets")):
+        # act
+        resp = client.get(url, {'param': 'color'})
+
+        # assert
+        assert resp.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'param' in resp.json()
+
+
+@pytest.mark.django_db
+def test_list_info_sparse_fieldsets(api_client, product_info_factory, product_parameter_factory,
+                                    django_assert_max_num_queries):
+    # arrange
+    client, user = api_client()
+    infos = product_info_factory(_quantity=3)
+    for info in infos:
+        product_parameter_factory(product_info=info)
+    url = reverse("products-info-list")
+
+    # act: no joins and prefetches for ids and prices
+    with django_assert_max_num_queries(2):
+        resp = client.get(url, {'fields': 'id,price'})
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert all(set(item) == {'id', 'price'} for item in resp.json()['results'])
+
+    # act: dotted path expands the nested field
+    resp = client.get(url, {'fields': 'id,product.name'})
+
+    # assert
+    assert resp.json()['results'][0] == {'id': infos[0].id, 'product': {'name': infos[0].product.name}}
+
+    # act: not expanded nested fields are rendered as ids
+    resp = client.get(url, {'expand': 'product', 'omit': 'product.category,model'})
+
+    # assert
+    item = resp.json()['results'][0]
+    assert 'model' not in item
+    assert item['product'] == {'id': infos[0].product.id, 'name': infos[0].product.name}
+    assert item['product_parameters'] == [infos[0].product_parameters.get().id]
@@ -2,6 +2,8 @@ import pytest
 from rest_framework import status
 from rest_framework.reverse import reverse
 
+from products.models import Product
+
 
 @pytest.mark.django_db
 def test_retrieve_product_for_unauthorized_client(product_factory, api_client):
@@ -72,6 +74,77 @@ def test_filter_category_products(api_client, product_factory, category_factory)
     assert resp_json[0]['category'] == instance.category.name
 
 
+@pytest.mark.django_db
+def test_search_products(api_client, product_factory):
+    # arrange
+    client, _ = api_client()
+    instance = product_factory(name='Смартфон Apple iPhone XR')
+    product_factory(name='Телевизор LG')
+    url = reverse("products-list")
+
+    # act
+    resp = client.get(url, {'search': 'iphone'})
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    resp_json = resp.json()['results']
+    assert len(resp_json) == 1
+    assert resp_json[0]['id'] == instance.id
+
+
+@pytest.mark.django_db
+def test_list_products_cache(api_client, product_factory, category_factory, django_capture_on_commit_callbacks):
+    # arrange
+    client, _ = api_client()
+    instance = product_factory(name='product', category=category_factory(name='category'))
+    url = reverse("products-list")
+    assert client.get(url).json()['results'][0]['name'] == 'product'
+
+    # act: queryset update sends no signals, so the cached response is served
+    Product.objects.filter(id=instance.id).update(name='changed')
+    resp = client.get(url)
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json()['results'][0]['name'] == 'product'
+
+    # act: writes through the ORM invalidate the cache after the commit
+    instance.category.name = 'new category'
+    with django_capture_on_commit_callbacks() as callbacks:
+        instance.category.save()
+    assert client.get(url).json()['results'][0]['category'] == 'category'
+    for callback in callbacks:
+        callback()
+    resp = client.get(url)
+
+    # assert
+    assert resp.json()['results'][0]['name'] == 'changed'
+    assert resp.json()['results'][0]['category'] == 'new category'
+
+    # retrieve is cached by pk
+    detail_url = reverse("products-detail", kwargs={'pk': instance.id})
+    assert client.get(detail_url).json()['name'] == 'changed'
+    with django_capture_on_commit_callbacks(execute=True):
+        instance.delete()
+    assert client.get(detail_url).status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_list_products_cache_checks_authentication(api_client, product_factory):
+    # arrange
+    client, _ = api_client()
+    product_factory()
+    url = reverse("products-list")
+    assert client.get(url).status_code == status.HTTP_200_OK
+
+    # act
+    client, _ = api_client(is_auth=False)
+    resp = client.get(url)
+
+    # assert
+    assert resp.status_code == status.HTTP_401_UNAUTHORIZED
+
+
 @pytest.mark.django_db
 def test_create_product_for_unauthorized_client(api_client):
     # arrange
@@ -264,3 +337,41 @@ def test_retrieve_product_detailed_for_authorized_client(product_factory, api_cl
     for i, info in enumerate(product_infos):
         resp_json[i]['id'] = info.id
 
+
+
+@pytest.mark.django_db
+def test_retrieve_product_detailed_from_card(product_factory, api_client, product_info_factory, category_factory,
+                                             product_parameter_factory, django_assert_num_queries):
+    # arrange
+    client, _ = api_client()
+    product = product_factory(category=category_factory(name='Смартфоны'))
+    info, other = product_info_factory(_quantity=2, product=product)
+    parameter = product_parameter_factory(product_info=info, value='256')
+    url = reverse("products-detailed", kwargs={'pk': product.id})
+    client.get(url)
+
+    # act: card is read by the primary key, the token is authenticated from the cache
+    with django_assert_num_queries(1):
+        resp = client.get(url)
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert [item['id'] for item in resp.json()] == [info.id, other.id]
+    assert resp.json()[0]['product'] == {'id': product.id, 'name': product.name, 'category': 'Смартфоны'}
+    assert resp.json()[0]['product_parameters'][0]['value'] == '256'
+
+    # act: card follows the changes of the catalog
+    parameter.value = '512'
+    parameter.save()
+    parameter.parameter.name = 'Память'
+    parameter.parameter.save()
+    info.price = 100
+    info.save()
+    other.delete()
+
+    # assert
+    resp_json = client.get(url).json()
+    assert [item['id'] for item in resp_json] == [info.id]
+    assert resp_json[0]['price'] == '100.00'
+    assert resp_json[0]['product_parameters'][0]['value'] == '512'
+    assert resp_json[0]['product_parameters'][0]['parameter']['name'] == 'Память'
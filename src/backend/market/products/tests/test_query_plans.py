@@ -0,0 +1,33 @@
+import pytest
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from products.exporters import ShopExporter
+
+
+@pytest.mark.django_db
+def test_product_info_ordering_by_price_uses_index(api_client, product_info_factory, assert_no_seq_scan):
+    # arrange
+    client, _ = api_client()
+    product_info_factory(_quantity=3)
+
+    # act
+    resp = assert_no_seq_scan(
+        lambda: client.get(reverse("products-info-list"), {'ordering': 'price'}), 'products_productinfo'
+    )
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_shop_export_uses_index(product_info_factory, shop_factory, assert_no_seq_scan):
+    # arrange
+    shop = shop_factory()
+    product_info_factory(_quantity=3, shop=shop)
+
+    # act
+    infos = assert_no_seq_scan(lambda: list(ShopExporter(shop).get_queryset()[:10]), 'products_productinfo')
+
+    # assert
+    assert len(infos) == 3
@@ -1,10 +1,15 @@
+import decimal
 import os
 
 import pytest
 from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework import status
 from rest_framework.reverse import reverse
 
+from products.models import ImportStatus, Parameter, Product, ProductInfo, ProductParameter, ShopImport
+from products.throttles import ShopImportRateThrottle
+
 
 @pytest.mark.django_db
 def test_shop_import_data_for_unauthorized(api_client, shop_factory):
@@ -108,6 +113,75 @@ def test_export_shop_data_permissions(api_client, shop_factory):
     assert resp.status_code == status.HTTP_200_OK
 
 
+@pytest.mark.django_db
+def test_shop_import_quota(api_client, shop_factory, monkeypatch, settings):
+    # arrange: the bucket of 3 tokens, the price list of 2007 bytes costs 2 tokens
+    monkeypatch.setitem(ShopImportRateThrottle.THROTTLE_RATES, 'shop_import', '3/hour')
+    settings.SHOP_QUOTA_BYTES_PER_TOKEN = 1024
+    client, user = api_client(is_supplier=True)
+    admin_client, admin = api_client(is_staff=True)
+    other_client, other = api_client(is_supplier=True)
+    url = reverse("shops-import-data", kwargs={'pk': user.shop.id})
+    file_path = os.path.join(settings.BASE_DIR, 'tests', 'backend_app', 'shop1.yaml')
+    with open(file_path, "r", encoding='utf-8') as f:
+        data = f.read()
+
+    # act
+    resp = client.put(url, data, content_type='application/yaml')
+    # not owner does not spend the quota of the shop
+    other_resp = other_client.put(url, data, content_type='application/yaml')
+    # owner and admin share the quota of the shop
+    throttled_resp = admin_client.put(url, data, content_type='application/yaml')
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp['RateLimit-Limit'] == '3'
+    assert resp['RateLimit-Remaining'] == '1'
+    assert resp['RateLimit-Reset'] == '2400'
+    assert other_resp.status_code == status.HTTP_403_FORBIDDEN
+    assert throttled_resp.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert throttled_resp['RateLimit-Remaining'] == '1'
+    assert int(throttled_resp['Retry-After']) == 1200
+
+
+@pytest.mark.django_db
+def test_shop_import_above_quota_leaves_debt(api_client, monkeypatch, settings):
+    # arrange: the bucket of 3 tokens, the price list of 2007 bytes costs 4 tokens
+    monkeypatch.setitem(ShopImportRateThrottle.THROTTLE_RATES, 'shop_import', '3/hour')
+    settings.SHOP_QUOTA_BYTES_PER_TOKEN = 512
+    client, user = api_client(is_supplier=True)
+    url = reverse("shops-import-data", kwargs={'pk': user.shop.id})
+    file_path = os.path.join(settings.BASE_DIR, 'tests', 'backend_app', 'shop1.yaml')
+    with open(file_path, "r", encoding='utf-8') as f:
+        data = f.read()
+
+    # act
+    resp = client.put(url, data, content_type='application/yaml')
+    throttled_resp = client.put(url, data, content_type='application/yaml')
+
+    # assert: the import takes the full bucket and the next one waits for the token above it too
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp['RateLimit-Remaining'] == '0'
+    assert throttled_resp.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(throttled_resp['Retry-After']) == 4800
+
+
+@pytest.mark.django_db
+def test_shop_import_requires_content_length(api_client):
+    # arrange
+    client, user = api_client(is_supplier=True)
+    url = reverse("shops-import-data", kwargs={'pk': user.shop.id})
+
+    # act: chunked upload without the length
+    resp = client.put(
+        url, 'shops: []', content_type='application/yaml', CONTENT_LENGTH='',
+        HTTP_TRANSFER_ENCODING='chunked'
+    )
+
+    # assert
+    assert resp.status_code == status.HTTP_411_LENGTH_REQUIRED
+
+
 @pytest.mark.django_db
 def test_import_export_shop_data(api_client):
     # arrange
@@ -124,6 +198,276 @@ def test_import_export_shop_data(api_client):
     assert resp.status_code == status.HTTP_200_OK
 
 
+@pytest.mark.django_db
+def test_import_shop_data_creates_catalog(api_client):
+    # arrange
+    client, user = api_client(is_supplier=True)
+    url = reverse("shops-import-data", kwargs={'pk': user.shop.id})
+    file_path = os.path.join(settings.BASE_DIR, 'tests', 'backend_app', 'shop1.yaml')
+    with open(file_path, "r", encoding='utf-8') as f:
+        data = f.read()
+
+    # act
+    resp = client.put(url, data, content_type='application/yaml')
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json() == {'rows': 5, 'imported': 5, 'errors': []}
+    user.shop.refresh_from_db()
+    assert user.shop.name == 'Связной'
+    assert ProductInfo.objects.filter(shop=user.shop).count() == 5
+    assert ProductParameter.objects.filter(product_info__shop=user.shop).count() == 18
+    assert set(user.shop.categories.values_list('name', flat=True)) == {'Смартфоны', 'Аксессуары'}
+    info = ProductInfo.objects.get(shop=user.shop, code_id=4216292)
+    assert info.product.name == 'Смартфон Apple iPhone XS Max 512GB (золотистый)'
+    assert info.product.category.name == 'Смартфоны'
+    assert info.price == decimal.Decimal(110000)
+    assert info.product_parameters.get(parameter__name='Цвет').value == 'золотистый'
+
+    # act: import again with updated price
+    resp = client.put(url, data.replace('price: 110000', 'price: 99000'), content_type='application/yaml')
+
+    # assert: rows are updated and not duplicated
+    assert resp.status_code == status.HTTP_200_OK
+    assert ProductInfo.objects.filter(shop=user.shop).count() == 5
+    assert Product.objects.count() == 5
+    assert Parameter.objects.filter(name='Цвет').count() == 1
+    assert ProductParameter.objects.filter(product_info__shop=user.shop).count() == 18
+    info.refresh_from_db()
+    assert info.price == decimal.Decimal(99000)
+
+
+@pytest.mark.django_db
+def test_import_shop_data_from_csv_file(api_client):
+    # arrange
+    client, user = api_client(is_supplier=True)
+    url = reverse("shops-import-data", kwargs={'pk': user.shop.id})
+    upload = SimpleUploadedFile(
+        'price.csv',
+        'id,category,name,model,price,price_rrc,quantity,Цвет\n'
+        '1,Телевизоры,Телевизор LG,lg/tv,50000,55000,3,черный\n'
+        ',Телевизоры,Без кода,lg/tv,1,1,1,\n'.encode('utf-8'),
+        content_type='text/csv'
+    )
+
+    # act
+    resp = client.put(url, {'file': upload}, format='multipart')
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    resp_json = resp.json()
+    assert resp_json['rows'] == 2
+    assert resp_json['imported'] == 1
+    assert resp_json['errors'][0]['row'] == 2
+    info = ProductInfo.objects.get(shop=user.shop)
+    assert info.product.category.name == 'Телевизоры'
+    assert info.product_parameters.get().value == 'черный'
+
+
+@pytest.mark.django_db
+def test_import_shop_data_validates_quantity_by_model(api_client):
+    # arrange: quantity of product's details is from 1 to 10000
+    client, user = api_client(is_supplier=True)
+    url = reverse("shops-import-data", kwargs={'pk': user.shop.id})
+    data = (
+        'id,category,name,model,price,price_rrc,quantity\n'
+        '1,Телевизоры,Телевизор LG,lg/tv,50000,55000,0\n'
+        '2,Телевизоры,Телевизор LG,lg/tv,50000,55000,10001\n'
+        '3,Телевизоры,Телевизор LG,lg/tv,50000,55000,10000\n'
+    )
+
+    # act
+    resp = client.put(url, data, content_type='text/csv')
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    resp_json = resp.json()
+    assert resp_json['imported'] == 1
+    assert [error['row'] for error in resp_json['errors']] == [1, 2]
+    assert ProductInfo.objects.get(shop=user.shop).quantity == 10000
+
+
+@pytest.mark.django_db
+def test_import_shop_data_rejects_negative_price(api_client):
+    # arrange
+    client, user = api_client(is_supplier=True)
+    url = reverse("shops-import-data", kwargs={'pk': user.shop.id})
+    data = (
+        'id,category,name,model,price,price_rrc,quantity\n'
+        '1,Телевизоры,Телевизор LG,lg/tv,-1,55000,1\n'
+        '2,Телевизоры,Телевизор LG,lg/tv,50000,-0.01,1\n'
+    )
+
+    # act
+    resp = client.put(url, data, content_type='text/csv')
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    resp_json = resp.json()
+    assert resp_json['imported'] == 0
+    assert [error['row'] for error in resp_json['errors']] == [1, 2]
+    assert not ProductInfo.objects.filter(shop=user.shop).exists()
+
+
+@pytest.mark.django_db
+def test_import_shop_data_rejects_oversized_price(api_client):
+    # arrange: prices have at most 12 digits with 2 decimal places
+    client, user = api_client(is_supplier=True)
+    url = reverse("shops-import-data", kwargs={'pk': user.shop.id})
+    data = (
+        'id,category,name,model,price,price_rrc,quantity\n'
+        '1,Телевизоры,Телевизор LG,lg/tv,10000000000,1,1\n'
+        '2,Телевизоры,Телевизор LG,lg/tv,9999999999.99,1,1\n'
+    )
+
+    # act
+    resp = client.put(url, data, content_type='text/csv')
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    resp_json = resp.json()
+    assert resp_json['imported'] == 1
+    assert [error['row'] for error in resp_json['errors']] == [1]
+    assert ProductInfo.objects.get(shop=user.shop).price == decimal.Decimal('9999999999.99')
+
+
+@pytest.mark.django_db
+def test_import_shop_data_validate_format(api_client):
+    # arrange
+    client, user = api_client(is_supplier=True)
+    url = reverse("shops-import-data", kwargs={'pk': user.shop.id})
+
+    # unsupported content type
+    resp = client.put(url, 'data', content_type='text/plain')
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+    # broken document
+    resp = client.put(url, 'goods: [', content_type='application/yaml')
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_export_shop_data_formats(api_client, shop_factory):
+    # arrange
+    client, user = api_client(is_supplier=True)
+    url = reverse("shops-import-data", kwargs={'pk': user.shop.id})
+    file_path = os.path.join(settings.BASE_DIR, 'tests', 'backend_app', 'shop1.yaml')
+    with open(file_path, "r", encoding='utf-8') as f:
+        resp = client.put(url, f.read(), content_type='application/yaml')
+    assert resp.status_code == status.HTTP_200_OK
+    url = reverse("shops-export-data", kwargs={'pk': user.shop.id})
+
+    for file_format, content_type in (('yaml', 'application/yaml'), ('csv', 'text/csv'),
+                                      ('ndjson', 'application/x-ndjson')):
+        # act
+        resp = client.get(url, {'file_format': file_format})
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp['Content-Type'] == content_type
+        data = b''.join(resp.streaming_content)
+
+        # assert: exported file imports into another shop with the same data
+        admin, _ = api_client(is_staff=True)
+        shop = shop_factory()
+        resp = admin.put(
+            reverse("shops-import-data", kwargs={'pk': shop.id}), data, content_type=content_type
+        )
+        assert resp.status_code == status.HTTP_200_OK
+        assert resp.json() == {'rows': 5, 'imported': 5, 'errors': []}
+        assert ProductParameter.objects.filter(product_info__shop=shop).count() == 18
+        info = ProductInfo.objects.get(shop=shop, code_id=4216292)
+        assert info.price == decimal.Decimal(110000)
+        assert info.product.category.name == 'Смартфоны'
+        assert info.product_parameters.get(parameter__name='Цвет').value == 'золотистый'
+
+    # unsupported format
+    resp = client.get(url, {'file_format': 'xml'})
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_shop_import_job_permissions(api_client, shop_factory, settings, tmp_path):
+    # arrange
+    settings.MEDIA_ROOT = tmp_path
+    shop = shop_factory()
+    url = reverse("shops-imports", kwargs={'pk': shop.id})
+
+    # unauthorized
+    client, _ = api_client(is_auth=False)
+    assert client.post(url, 'goods: []', content_type='application/yaml').status_code == status.HTTP_401_UNAUTHORIZED
+
+    # for non supplier
+    client, _ = api_client()
+    assert client.post(url, 'goods: []', content_type='application/yaml').status_code == status.HTTP_403_FORBIDDEN
+
+    # for supplier not owner
+    client, _ = api_client(is_supplier=True)
+    assert client.post(url, 'goods: []', content_type='application/yaml').status_code == status.HTTP_403_FORBIDDEN
+
+    # for admin
+    client, _ = api_client(is_staff=True)
+    assert client.post(url, 'goods: []', content_type='application/yaml').status_code == status.HTTP_202_ACCEPTED
+
+
+@pytest.mark.django_db
+def test_shop_import_job(api_client, settings, tmp_path, django_capture_on_commit_callbacks):
+    # arrange
+    settings.MEDIA_ROOT = tmp_path
+    client, user = api_client(is_supplier=True)
+    url = reverse("shops-imports", kwargs={'pk': user.shop.id})
+    file_path = os.path.join(settings.BASE_DIR, 'tests', 'backend_app', 'shop1.yaml')
+
+    # act: the job is queued on commit, celery runs tasks eagerly in tests
+    with open(file_path, "rb") as f, django_capture_on_commit_callbacks(execute=True):
+        resp = client.post(url, {'file': f}, format='multipart')
+
+    # assert
+    assert resp.status_code == status.HTTP_202_ACCEPTED
+    resp_json = resp.json()
+    job = ShopImport.objects.get(id=resp_json['id'])
+    assert job.owner == user
+    assert resp['Location'].endswith(reverse("shops-import-job", kwargs={'pk': user.shop.id, 'job_id': job.id}))
+    assert resp_json['status'] == ImportStatus.PENDING
+    assert ProductInfo.objects.filter(shop=user.shop).count() == 5
+    # the price list is deleted after the job
+    assert not job.file
+    assert not any(path.is_file() for path in tmp_path.rglob('*'))
+
+    # retrieve job
+    resp = client.get(resp['Location'])
+    assert resp.status_code == status.HTTP_200_OK
+    resp_json = resp.json()
+    assert resp_json['status'] == ImportStatus.DONE
+    assert resp_json['rows'] == 5
+    assert resp_json['imported'] == 5
+
+    # job of another shop
+    other_client, other_user = api_client(is_supplier=True)
+    url = reverse("shops-import-job", kwargs={'pk': other_user.shop.id, 'job_id': job.id})
+    assert other_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_shop_import_job_failed(api_client, settings, tmp_path, django_capture_on_commit_callbacks):
+    # arrange
+    settings.MEDIA_ROOT = tmp_path
+    client, user = api_client(is_supplier=True)
+    url = reverse("shops-imports", kwargs={'pk': user.shop.id})
+
+    # unsupported format is rejected before queueing
+    resp = client.post(url, 'data', content_type='text/plain')
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert not ShopImport.objects.exists()
+
+    # broken document fails the job
+    with django_capture_on_commit_callbacks(execute=True):
+        resp = client.post(url, 'goods: [', content_type='application/yaml')
+    assert resp.status_code == status.HTTP_202_ACCEPTED
+    resp_json = client.get(resp['Location']).json()
+    assert resp_json['status'] == ImportStatus.FAILED
+    assert resp_json['errors']
+    assert not ShopImport.objects.get().file
+
+
 @pytest.mark.django_db
 def test_retrieve_shop_for_unauthorized_client(shop_factory, api_client):
     # arrange
@@ -317,3 +661,25 @@ def test_delete_shop_for_admin_client(api_client, shop_factory):
     url = reverse("shops-detail", kwargs={'pk': shop.id})
     resp = client.delete(url, format='json')
     assert resp.status_code == status.HTTP_204_NO_CONTENT
+
+
+@pytest.mark.django_db
+def test_list_shops_sparse_fieldsets(api_client, shop_factory):
+    # arrange
+    client, user = api_client()
+    shop = shop_factory(owner=user)
+    url = reverse("shops-detail", kwargs={'pk': shop.id})
+
+    # act: owner is rendered by id unless it is expanded
+    resp = client.get(url, {'fields': 'id,owner'})
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json() == {'id': shop.id, 'owner': user.id}
+
+    # act
+    resp = client.get(url, {'fields': 'id,owner', 'expand': 'owner', 'omit': 'owner.contacts,owner.profile'})
+
+    # assert
+    assert resp.json()['owner']['email'] == user.email
+    assert 'contacts' not in resp.json()['owner']
@@ -1,9 +1,60 @@
-from rest_framework.throttling import UserRateThrottle
+import math
 
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
 
-class ShopImportRateThrottle(UserRateThrottle):
+from products.models import ProductInfo
+from utils.throttling import TokenBucketThrottle
+
+
+class ShopQuotaThrottle(TokenBucketThrottle):
+    """
+    Token bucket of the shop in the url, the owner and staff share one quota of the shop.
+    Other users are denied by permissions and spend only their own bucket.
+    """
+
+    @staticmethod
+    def get_shop_id(view):
+        return view.kwargs.get(view.lookup_url_kwarg or view.lookup_field)
+
+    def get_ident_of(self, request, view):
+        shop_id = self.get_shop_id(view)
+        shop = getattr(request.user, 'shop', None)
+        if request.user.is_staff or (shop is not None and str(shop.pk) == str(shop_id)):
+            return f'shop:{shop_id}'
+        return super().get_ident_of(request, view)
+
+
+class LengthRequired(APIException):
+    status_code = status.HTTP_411_LENGTH_REQUIRED
+    default_detail = 'Укажите длину тела запроса в заголовке Content-Length.'
+    default_code = 'length_required'
+
+
+class ShopImportRateThrottle(ShopQuotaThrottle):
+    """
+    Import costs a token per `SHOP_QUOTA_BYTES_PER_TOKEN` of the request body.
+    The body is never read beyond `Content-Length`, so chunked requests without it are rejected
+    instead of being charged as empty ones.
+    """
     scope = 'shop_import'
 
+    def get_cost(self, request, view):
+        length = request.META.get('CONTENT_LENGTH') or ('' if 'HTTP_TRANSFER_ENCODING' in request.META else '0')
+        try:
+            size = int(length)
+        except ValueError:
+            raise LengthRequired()
+        return math.ceil(size / settings.SHOP_QUOTA_BYTES_PER_TOKEN)
 
-class ShopExportRateThrottle(UserRateThrottle):
+
+class ShopExportRateThrottle(ShopQuotaThrottle):
+    """Export costs a token per `SHOP_QUOTA_ROWS_PER_TOKEN` of shop's product details."""
     scope = 'shop_export'
+
+    def get_cost(self, request, view):
+        shop_id = self.get_shop_id(view)
+        if not str(shop_id).isdigit():
+            return 1
+        return math.ceil(ProductInfo.objects.filter(shop_id=shop_id).count() / settings.SHOP_QUOTA_ROWS_PER_TOKEN)
@@ -1,22 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.db import transaction
 from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema_view, extend_schema
+from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiParameter
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, OR
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 
-from products.filters import ProductInfoFilter
-from products.models import Product, ProductInfo, ProductParameter, Parameter, Category, Shop
-from products.permissions import IsNotSupplier
+from products.cards import get_product_card
+from products.exporters import ShopExporter
+from products.filters import FullTextSearchFilter, ProductInfoFilter, ProductParameterFilterBackend
+from products.importers import PriceListError, ShopImporter, get_reader, read_price_list
+from products.models import Product, ProductInfo, ProductParameter, Parameter, Category, Shop, ShopImport
+from products.permissions import IsNotSupplier, ShopImportExportPermission
 from products.serializers import (
     ProductSerializer,
     ProductInfoSerializer,
     ParameterSerializer,
     CategorySerializer,
-    ShopSerializer
+    ShopSerializer,
+    ShopImportSerializer
 )
+from products.tasks import import_shop_data
+from products.throttles import ShopExportRateThrottle, ShopImportRateThrottle
+from users.models import Contact, UserProfile
 from users.permissions import IsSupplier, IsNotAdmin, IsOwnerUser
+from utils.cache import CachedResponseMixin
+from utils.conditional import ConditionalGetMixin
+from utils.pagination import KeysetPagination
+from utils.sparse import SPARSE_FIELDSET_PARAMETERS, SparseQuerysetMixin
+from utils.throttling import RateLimitHeadersMixin
 
 
 @extend_schema_view(
@@ -48,23 +67,24 @@ from users.permissions import IsSupplier, IsNotAdmin, IsOwnerUser
         description="Return advanced information about product.",
     ),
 )
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """
     Viewset for products
     """
+    # safe requests with signed access tokens read the user from the claims, see `SignedTokenAuthentication`
+    authenticate_by_claims = ('list', 'retrieve', 'detailed')
+    cache_models = (Product, Category)
     queryset = Product.objects.all()
     permission_classes = [IsAuthenticated]
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    search_fields = ['name']
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
+    search_document = 'name'
     filterset_fields = ('category',)
 
     @action(detail=True, methods=['get'])
     def detailed(self, request, pk):
-        instances = ProductInfo.objects.filter(product=pk)
-        serializer = ProductInfoSerializer(instances, many=True)
-
-        return Response(data=serializer.data, status=status.HTTP_200_OK)
+        """Offers of the product from its card, see `products.cards`."""
+        return Response(data=get_product_card(pk), status=status.HTTP_200_OK)
 
     def get_permissions(self):
         """Define action access."""
@@ -80,10 +100,12 @@ class ProductViewSet(viewsets.ModelViewSet):
     list=extend_schema(
         summary="List all the product's information.",
         description="Return a list of all information about the product.",
+        parameters=SPARSE_FIELDSET_PARAMETERS,
     ),
     retrieve=extend_schema(
         summary="Retrieve order.",
         description="Get the detail of specific information about the product.",
+        parameters=SPARSE_FIELDSET_PARAMETERS,
     ),
     create=extend_schema(
         summary="Create product's information.",
@@ -99,25 +121,44 @@ class ProductViewSet(viewsets.ModelViewSet):
     destroy=extend_schema(
         summary="Delete product's information..",
         description="Delete product's information by id.",
-    )
+    ),
+    facets=extend_schema(
+        summary="Parameter facets.",
+        description="Return value counts of every parameter for the current filters.",
+    ),
 )
-class ProductInfoViewSet(viewsets.ModelViewSet):
+class ProductInfoViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     """
     Viewset для информации о продукте.
     """
+    authenticate_by_claims = ('list', 'retrieve', 'facets')
     product_parameter_set = ProductParameter.objects.select_related('parameter')
-    queryset = ProductInfo.objects.select_related('product', 'shop').prefetch_related(
-        Prefetch('product_parameters', queryset=product_parameter_set))
+    queryset = ProductInfo.objects.all()
+    sparse_select_related = {'product': 'product', 'product.category': 'product__category'}
+    sparse_prefetch_related = {'product_parameters': Prefetch('product_parameters', queryset=product_parameter_set)}
 
     permission_classes = [IsAuthenticated]
     serializer_class = ProductInfoSerializer
+    pagination_class = KeysetPagination
 
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, filters.SearchFilter]
-    ordering_fields = ['price', 'price_rcc', 'quantity']
-    search_fields = ['model']
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter, ProductParameterFilterBackend]
+    ordering_fields = ['price', 'price_rrc', 'quantity']
+    search_document = 'search_document'
+    search_vector = 'search_vector'
 
     filterset_class = ProductInfoFilter
 
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Value counts of parameters for the current filters."""
+        backend = ProductParameterFilterBackend()
+        queryset = ProductInfo.objects.all()
+        for backend_class in self.filter_backends:
+            if backend_class is not ProductParameterFilterBackend:
+                queryset = backend_class().filter_queryset(request, queryset, self)
+
+        return Response(data=backend.get_facets(request, queryset), status=status.HTTP_200_OK)
+
     def get_permissions(self):
         """Получение прав для действий."""
         if self.action in ['create', "partial_update", "update", 'destroy']:
@@ -151,10 +192,12 @@ class ProductInfoViewSet(viewsets.ModelViewSet):
         description="Delete parameter by id.",
     )
 )
-class ParameterViewSet(viewsets.ModelViewSet):
+class ParameterViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """
     Viewset for parameters
     """
+    authenticate_by_claims = ('list', 'retrieve')
+    cache_models = (Parameter,)
     queryset = Parameter.objects.all()
     permission_classes = [IsAuthenticated]
     serializer_class = ParameterSerializer
@@ -196,8 +239,10 @@ class ParameterViewSet(viewsets.ModelViewSet):
         description="Delete category by id.",
     )
 )
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """Viewset for categories"""
+    authenticate_by_claims = ('list', 'retrieve')
+    cache_models = (Category,)
     queryset = Category.objects.all()
     permission_classes = [IsAuthenticated]
     serializer_class = CategorySerializer
@@ -218,10 +263,12 @@ class CategoryViewSet(viewsets.ModelViewSet):
     list=extend_schema(
         summary="List all the shops.",
         description="Return a list of all shops.",
+        parameters=SPARSE_FIELDSET_PARAMETERS,
     ),
     retrieve=extend_schema(
         summary="Retrieve shop.",
         description="Get the detail of specific shop.",
+        parameters=SPARSE_FIELDSET_PARAMETERS,
     ),
     create=extend_schema(
         summary="Create shop.",
@@ -245,18 +292,107 @@ class CategoryViewSet(viewsets.ModelViewSet):
     export_data=extend_schema(
         summary="Export data.",
         description="Return shop's data.",
-    )
+        parameters=[
+            OpenApiParameter('file_format', enum=list(ShopExporter.formats), default='yaml'),
+        ],
+    ),
+    imports=extend_schema(
+        summary="Start import.",
+        description="Queue background import of shop's data from file and return the import job.",
+        responses={202: ShopImportSerializer},
+    ),
+    import_job=extend_schema(
+        summary="Retrieve import.",
+        description="Get status, processed rows and errors of a background import job.",
+        responses={200: ShopImportSerializer},
+    ),
 )
-class ShopViewSet(viewsets.ModelViewSet):
+class ShopViewSet(RateLimitHeadersMixin, CachedResponseMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     """
     Viewset для магазина.
     """
+    authenticate_by_claims = ('list', 'retrieve')
+    cache_models = (Shop, get_user_model(), Contact, UserProfile)
     queryset = Shop.objects.all()
+    sparse_select_related = {'owner': 'owner', 'owner.contacts': 'owner__contacts', 'owner.profile': 'owner__profile'}
     permission_classes = [IsAuthenticated]
     serializer_class = ShopSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     search_fields = ['name']
 
+    @staticmethod
+    def get_price_list_upload(request):
+        """
+        Price list is taken from the request body or from the multipart `file` field.
+        Format is yaml, json, ndjson or csv and is taken from the content type or from the file name.
+        """
+        if request.content_type.startswith('multipart/form-data'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                raise ParseError('File is required.')
+            return upload, upload.content_type, upload.name
+        return request.stream, request.content_type, None
+
+    @action(detail=True, methods=['put'], throttle_classes=[ShopImportRateThrottle])
+    def import_data(self, request, pk=None):
+        """Import price list in the request."""
+        shop = self.get_object()
+        stream, content_type, filename = self.get_price_list_upload(request)
+
+        importer = ShopImporter(shop)
+        try:
+            importer.run(read_price_list(stream, content_type=content_type, filename=filename))
+        except PriceListError as e:
+            raise ParseError(str(e))
+
+        return Response(
+            data={'rows': importer.rows, 'imported': importer.imported, 'errors': importer.errors},
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=True, methods=['get'], throttle_classes=[ShopExportRateThrottle])
+    def export_data(self, request, pk=None):
+        """Stream shop's data as yaml, csv or ndjson chosen by the `file_format` query parameter."""
+        shop = self.get_object()
+        file_format = request.query_params.get('file_format', 'yaml')
+        if file_format not in ShopExporter.formats:
+            raise ParseError(f'Unsupported file format: {file_format}.')
+
+        response = StreamingHttpResponse(
+            ShopExporter(shop).export(file_format), content_type=ShopExporter.formats[file_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="shop-{shop.id}.{file_format}"'
+        return response
+
+    @action(detail=True, methods=['post'], throttle_classes=[ShopImportRateThrottle])
+    def imports(self, request, pk=None):
+        """Save price list and import it in the celery worker."""
+        shop = self.get_object()
+        stream, content_type, filename = self.get_price_list_upload(request)
+        try:
+            get_reader(content_type, filename)
+        except PriceListError as e:
+            raise ParseError(str(e))
+        if stream is None:
+            raise ParseError('Price list is empty.')
+
+        job = ShopImport(shop=shop, owner=request.user, content_type=content_type or '')
+        job.file.save(filename or 'price-list', File(stream), save=True)
+        # the worker may read the job only after it is committed
+        transaction.on_commit(lambda: import_shop_data.delay(job.id))
+
+        return Response(
+            data=ShopImportSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': reverse('shops-import-job', kwargs={'pk': shop.id, 'job_id': job.id}, request=request)}
+        )
+
+    @action(detail=True, methods=['get'], url_path=r'imports/(?P<job_id>\d+)')
+    def import_job(self, request, pk=None, job_id=None):
+        shop = self.get_object()
+        job = get_object_or_404(ShopImport, shop=shop, pk=job_id)
+        return Response(data=ShopImportSerializer(job).data, status=status.HTTP_200_OK)
+
     def get_permissions(self):
         """Получение прав для действий."""
         if self.action == "create":
@@ -265,5 +401,7 @@ class ShopViewSet(viewsets.ModelViewSet):
             return [IsAuthenticated(), IsSupplier(), IsOwnerUser(), IsNotAdmin()]
         elif self.action == "destroy":
             return [IsAuthenticated(), OR(IsAdminUser(), IsSupplier())]
+        elif self.action in ["import_data", "export_data", "imports", "import_job"]:
+            return [IsAuthenticated(), ShopImportExportPermission()]
         else:
             return super(ShopViewSet, self).get_permissions()
@@ -0,0 +1,32 @@
+from django_filters import rest_framework as filters, DateFromToRangeFilter
+
+from reports.models import CategoryDailySales, ProductDailySales, ShopDailySales
+
+
+class DailySalesFilter(filters.FilterSet):
+    """
+    Фильтры продаж по диапазону дат: `?date_after=2024-01-01&date_before=2024-01-31`.
+    """
+
+    date = DateFromToRangeFilter()
+
+
+class ShopDailySalesFilter(DailySalesFilter):
+
+    class Meta:
+        model = ShopDailySales
+        fields = ['date', 'shop']
+
+
+class ProductDailySalesFilter(DailySalesFilter):
+
+    class Meta:
+        model = ProductDailySales
+        fields = ['date', 'shop', 'product']
+
+
+class CategoryDailySalesFilter(DailySalesFilter):
+
+    class Meta:
+        model = CategoryDailySales
+        fields = ['date', 'shop', 'category']
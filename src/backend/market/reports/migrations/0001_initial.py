@@ -0,0 +1,95 @@
+# Generated by Django 4.2.11 on 2026-10-18 00:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0007_productcard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollupRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True, verbose_name='Начало')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Окончание')),
+                ('days', models.PositiveIntegerField(default=0, verbose_name='Пересчитано дней')),
+            ],
+            options={
+                'verbose_name': 'Пересчет продаж',
+                'verbose_name_plural': 'Пересчеты продаж',
+                'ordering': ('-started_at',),
+            },
+        ),
+        migrations.CreateModel(
+            name='ShopDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True, verbose_name='Дата')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка')),
+                ('units', models.PositiveIntegerField(default=0, verbose_name='Продано единиц')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Количество заказов')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='products.shop', verbose_name='Магазин')),
+            ],
+            options={
+                'verbose_name': 'Продажи магазина за день',
+                'verbose_name_plural': 'Продажи магазинов по дням',
+                'ordering': ('-date',),
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True, verbose_name='Дата')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка')),
+                ('units', models.PositiveIntegerField(default=0, verbose_name='Продано единиц')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Количество заказов')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='products.product', verbose_name='Товар')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_daily_sales', to='products.shop', verbose_name='Магазин')),
+            ],
+            options={
+                'verbose_name': 'Продажи товара за день',
+                'verbose_name_plural': 'Продажи товаров по дням',
+                'ordering': ('-date',),
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CategoryDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True, verbose_name='Дата')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка')),
+                ('units', models.PositiveIntegerField(default=0, verbose_name='Продано единиц')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Количество заказов')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='products.category', verbose_name='Категория')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_daily_sales', to='products.shop', verbose_name='Магазин')),
+            ],
+            options={
+                'verbose_name': 'Продажи категории за день',
+                'verbose_name_plural': 'Продажи категорий по дням',
+                'ordering': ('-date',),
+                'abstract': False,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shopdailysales',
+            constraint=models.UniqueConstraint(fields=('shop', 'date'), name='unique_shop_daily_sales'),
+        ),
+        migrations.AddConstraint(
+            model_name='productdailysales',
+            constraint=models.UniqueConstraint(fields=('shop', 'product', 'date'), name='unique_product_daily_sales'),
+        ),
+        migrations.AddConstraint(
+            model_name='categorydailysales',
+            constraint=models.UniqueConstraint(fields=('shop', 'category', 'date'), name='unique_category_daily_sales'),
+        ),
+    ]
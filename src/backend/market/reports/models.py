@@ -0,0 +1,80 @@
+from django.db import models
+
+from products.models import Category, Product, Shop
+
+
+class DailySales(models.Model):
+    """ Продажи за день, см. `reports.rollups`. """
+
+    class Meta:
+        abstract = True
+        ordering = ('-date',)
+
+    date = models.DateField(db_index=True, verbose_name='Дата')
+
+    revenue = models.DecimalField(default=0, max_digits=14, decimal_places=2, verbose_name='Выручка')
+
+    units = models.PositiveIntegerField(default=0, verbose_name='Продано единиц')
+
+    orders = models.PositiveIntegerField(default=0, verbose_name='Количество заказов')
+
+
+class ShopDailySales(DailySales):
+
+    class Meta(DailySales.Meta):
+        verbose_name = 'Продажи магазина за день'
+        verbose_name_plural = 'Продажи магазинов по дням'
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'date'], name='unique_shop_daily_sales'),
+        ]
+
+    shop = models.ForeignKey(Shop, verbose_name='Магазин', related_name='daily_sales', on_delete=models.CASCADE)
+
+
+class ProductDailySales(DailySales):
+
+    class Meta(DailySales.Meta):
+        verbose_name = 'Продажи товара за день'
+        verbose_name_plural = 'Продажи товаров по дням'
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'product', 'date'], name='unique_product_daily_sales'),
+        ]
+
+    shop = models.ForeignKey(Shop, verbose_name='Магазин', related_name='product_daily_sales', on_delete=models.CASCADE)
+
+    product = models.ForeignKey(Product, verbose_name='Товар', related_name='daily_sales', on_delete=models.CASCADE)
+
+
+class CategoryDailySales(DailySales):
+
+    class Meta(DailySales.Meta):
+        verbose_name = 'Продажи категории за день'
+        verbose_name_plural = 'Продажи категорий по дням'
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'category', 'date'], name='unique_category_daily_sales'),
+        ]
+
+    shop = models.ForeignKey(
+        Shop, verbose_name='Магазин', related_name='category_daily_sales', on_delete=models.CASCADE
+    )
+
+    # Products without category are counted in the rows without category
+    category = models.ForeignKey(
+        Category, verbose_name='Категория', related_name='daily_sales', null=True, blank=True,
+        on_delete=models.CASCADE
+    )
+
+
+class SalesRollupRun(models.Model):
+    """ Запуски пересчета продаж, следующий запуск пересчитывает дни заказов, измененных после начала последнего. """
+
+    class Meta:
+        verbose_name = 'Пересчет продаж'
+        verbose_name_plural = 'Пересчеты продаж'
+        ordering = ('-started_at',)
+
+    started_at = models.DateTimeField(auto_now_add=True, verbose_name='Начало')
+
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Окончание')
+
+    days = models.PositiveIntegerField(default=0, verbose_name='Пересчитано дней')
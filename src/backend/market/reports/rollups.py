@@ -0,0 +1,98 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from orders.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatus
+from reports.models import CategoryDailySales, ProductDailySales, SalesRollupRun, ShopDailySales
+
+# Orders which are counted as sales
+SALES_STATUSES = [status for status in OrderStatus.values if status not in (OrderStatus.BASKET, OrderStatus.CANCELLED)]
+
+# Rollup models with their dimensions and lookups of the dimensions from order items
+ROLLUPS = (
+    (ShopDailySales, {'shop_id': 'product_info__shop_id'}),
+    (ProductDailySales, {'shop_id': 'product_info__shop_id', 'product_id': 'product_info__product_id'}),
+    (CategoryDailySales, {'shop_id': 'product_info__shop_id', 'category_id': 'product_info__product__category_id'}),
+)
+
+
+def _day_ranges(dates):
+    """Ranges of `created_at` of the days in the current time zone, adjacent days are merged."""
+    ranges = []
+    for day in sorted(dates):
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    return ranges
+
+
+def aggregate_sales(items, dates, dimensions):
+    """Revenue, units and orders of the order items on the days grouped by the day and dimensions."""
+    created = reduce(or_, [
+        Q(order__created_at__gte=start, order__created_at__lt=end) for start, end in _day_ranges(dates)
+    ])
+    return items.filter(created, order__status__in=SALES_STATUSES).annotate(
+        date=TruncDate('order__created_at')
+    ).order_by().values('date', **{name: F(lookup) for name, lookup in dimensions.items()}).annotate(
+        revenue=Sum(F('quantity') * F('price'), output_field=DecimalField(max_digits=14, decimal_places=2)),
+        units=Sum('quantity'),
+        orders=Count('order', distinct=True),
+    )
+
+
+@transaction.atomic
+def rebuild_sales_rollups(dates):
+    """
+    Replace rollup rows of the days with sales of the current and archived orders.
+    Revenue is counted at the prices of the confirmation of the orders.
+    """
+    for model, dimensions in ROLLUPS:
+        rows = defaultdict(lambda: {'revenue': 0, 'units': 0, 'orders': 0})
+        for items in (OrderItem.objects.all(), ArchivedOrderItem.objects.all()):
+            for row in aggregate_sales(items, dates, dimensions):
+                totals = rows[(row['date'],) + tuple(row[name] for name in dimensions)]
+                for name in totals:
+                    totals[name] += row[name]
+
+        model.objects.filter(date__in=dates).delete()
+        model.objects.bulk_create([
+            model(date=key[0], **dict(zip(dimensions, key[1:])), **totals) for key, totals in rows.items()
+        ], batch_size=1000)
+
+
+def update_sales_rollups():
+    """
+    Rebuild rollups of the days with orders changed since the start of the last finished run,
+    every order change updates its `updated_at`. The first run rebuilds all the days.
+    Days are rebuilt by `SALES_ROLLUP_DAYS_PER_BATCH` in one transaction. Return the number of rebuilt days.
+    """
+    last = SalesRollupRun.objects.filter(finished_at__isnull=False).first()
+    run = SalesRollupRun.objects.create()
+
+    # orders changed before the next run may already be moved to the archive
+    sources = [Order.objects.exclude(status=OrderStatus.BASKET), ArchivedOrder.objects.all()]
+    if last is not None:
+        # overlap covers transactions which were committed after the start of the last run
+        since = last.started_at - timedelta(seconds=settings.SALES_ROLLUP_OVERLAP)
+        sources = [orders.filter(updated_at__gte=since) for orders in sources]
+    dates = set().union(*[orders.dates('created_at', 'day') for orders in sources])
+
+    dates = sorted(dates)
+    batch_size = settings.SALES_ROLLUP_DAYS_PER_BATCH
+    for i in range(0, len(dates), batch_size):
+        rebuild_sales_rollups(dates[i:i + batch_size])
+
+    run.days = len(dates)
+    run.finished_at = timezone.now()
+    run.save(update_fields=['days', 'finished_at'])
+    return len(dates)
@@ -0,0 +1,31 @@
+from rest_framework import serializers
+
+from reports.models import CategoryDailySales, ProductDailySales, ShopDailySales
+
+DAILY_SALES_FIELDS = ('date', 'shop', 'shop_name', 'revenue', 'units', 'orders')
+
+
+class ShopDailySalesSerializer(serializers.ModelSerializer):
+    shop_name = serializers.CharField(source='shop.name', read_only=True)
+
+    class Meta:
+        model = ShopDailySales
+        fields = DAILY_SALES_FIELDS
+
+
+class ProductDailySalesSerializer(serializers.ModelSerializer):
+    shop_name = serializers.CharField(source='shop.name', read_only=True)
+    product_name = serializers.CharField(source='product.name', read_only=True)
+
+    class Meta:
+        model = ProductDailySales
+        fields = DAILY_SALES_FIELDS + ('product', 'product_name')
+
+
+class CategoryDailySalesSerializer(serializers.ModelSerializer):
+    shop_name = serializers.CharField(source='shop.name', read_only=True)
+    category_name = serializers.CharField(source='category.name', read_only=True, default=None)
+
+    class Meta:
+        model = CategoryDailySales
+        fields = DAILY_SALES_FIELDS + ('category', 'category_name')
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from reports.rollups import update_sales_rollups
+
+
+@shared_task(ignore_result=True)
+def update_sales_reports():
+    """Rebuild daily sales rollups of the days with new and changed orders."""
+    update_sales_rollups()
@@ -0,0 +1,4 @@
+# do not delete
+from users.tests import api_client
+from products.tests import product_info_factory, product_factory, shop_factory
+from orders.tests.conftest import order_factory, order_item_factory
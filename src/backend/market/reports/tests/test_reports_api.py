@@ -0,0 +1,134 @@
+import decimal
+from datetime import datetime
+
+import pytest
+from model_bakery import baker
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from orders.archive import archive_orders
+from orders.models import Order, OrderStatus
+from products.models import ProductInfo
+from reports.models import SalesRollupRun
+from reports.rollups import update_sales_rollups
+
+
+@pytest.fixture
+def sales(api_client, order_factory, order_item_factory, product_info_factory, product_factory, shop_factory):
+    """
+    Заказы поставщика и другого магазина за 10 и 11 января.
+    """
+    supplier_client, supplier = api_client(is_supplier=True)
+    first = product_info_factory(shop=supplier.shop, price=100)
+    second = product_info_factory(
+        shop=supplier.shop, price=100, product=product_factory(category=baker.make('Category'))
+    )
+    other = product_info_factory(shop=shop_factory(), price=10)
+
+    def order(day, order_status, lines):
+        instance = order_factory(status=order_status)
+        for info, quantity in lines:
+            # placed orders keep the prices of the confirmation
+            price = info.price if order_status != OrderStatus.BASKET else None
+            order_item_factory(order=instance, product_info=info, quantity=quantity, price=price)
+        created_at = timezone.make_aware(datetime(2024, 1, day, 12))
+        Order.objects.filter(pk=instance.pk).update(created_at=created_at, updated_at=created_at, status=order_status)
+        return instance
+
+    orders = [
+        order(10, OrderStatus.NEW, [(first, 2), (second, 1), (other, 5)]),
+        order(10, OrderStatus.DELIVERED, [(first, 1)]),
+        order(10, OrderStatus.CANCELLED, [(first, 10)]),
+        order(11, OrderStatus.SENT, [(second, 3)]),
+        order(11, OrderStatus.BASKET, [(second, 7)]),
+    ]
+    return supplier_client, supplier, (first, second, other), orders
+
+
+@pytest.mark.django_db
+def test_shop_sales_report(api_client, sales):
+    # arrange
+    supplier_client, supplier, (first, second, other), _ = sales
+    admin_client, _ = api_client(is_staff=True)
+    # sales are counted at the prices of the confirmation
+    ProductInfo.objects.update(price=1)
+    update_sales_rollups()
+    url = reverse("reports-shops-list")
+
+    # act
+    resp = admin_client.get(url, {'date_after': '2024-01-10', 'date_before': '2024-01-10'})
+
+    # assert: cancelled orders and baskets are not sales
+    assert resp.status_code == status.HTTP_200_OK
+    rows = {row['shop']: row for row in resp.json()['results']}
+    assert set(rows) == {supplier.shop.id, other.shop_id}
+    assert decimal.Decimal(rows[supplier.shop.id]['revenue']) == 400
+    assert (rows[supplier.shop.id]['units'], rows[supplier.shop.id]['orders']) == (4, 2)
+    assert decimal.Decimal(rows[other.shop_id]['revenue']) == 50
+
+    # act: supplier sees the sales of the own shop only
+    resp = supplier_client.get(url)
+
+    # assert
+    assert [(row['shop'], row['date'], row['units']) for row in resp.json()['results']] == [
+        (supplier.shop.id, '2024-01-11', 3), (supplier.shop.id, '2024-01-10', 4),
+    ]
+
+
+@pytest.mark.django_db
+def test_product_and_category_sales_report(sales):
+    # arrange
+    supplier_client, supplier, (first, second, other), _ = sales
+    update_sales_rollups()
+
+    # act
+    resp = supplier_client.get(reverse("reports-products-list"), {'product': first.product_id})
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert [(row['date'], row['units'], row['orders']) for row in resp.json()['results']] == [('2024-01-10', 3, 2)]
+
+    # act
+    resp = supplier_client.get(reverse("reports-categories-list"), {'category': second.product.category_id})
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert [(row['date'], row['units']) for row in resp.json()['results']] == [('2024-01-11', 3), ('2024-01-10', 1)]
+
+
+@pytest.mark.django_db
+def test_sales_rollups_are_updated_incrementally(api_client, sales):
+    # arrange
+    supplier_client, supplier, _, orders = sales
+    update_sales_rollups()
+
+    # act: the order of 11 january is cancelled, closed orders are archived
+    Order.objects.filter(pk=orders[3].pk).update(status=OrderStatus.CANCELLED, updated_at=timezone.now())
+    archive_orders(cutoff=timezone.now())
+    days = update_sales_rollups()
+
+    # assert: only the changed day is rebuilt, archived sales are kept
+    assert days == 1
+    resp = supplier_client.get(reverse("reports-shops-list"))
+    assert [(row['date'], row['units']) for row in resp.json()['results']] == [('2024-01-10', 4)]
+
+    # act: rollups are rebuilt from the current and archived orders
+    SalesRollupRun.objects.all().delete()
+    assert update_sales_rollups() == 2
+
+    # assert
+    resp = supplier_client.get(reverse("reports-shops-list"))
+    assert [(row['date'], row['units']) for row in resp.json()['results']] == [('2024-01-10', 4)]
+
+
+@pytest.mark.django_db
+def test_sales_report_permissions(api_client):
+    # arrange
+    client, _ = api_client()
+    anonymous, _ = api_client(is_auth=False)
+    url = reverse("reports-shops-list")
+
+    # assert
+    assert anonymous.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+    assert client.get(url).status_code == status.HTTP_403_FORBIDDEN
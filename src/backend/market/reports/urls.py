@@ -0,0 +1,11 @@
+from rest_framework.routers import DefaultRouter
+
+from reports.views import CategorySalesReportViewSet, ProductSalesReportViewSet, ShopSalesReportViewSet
+
+router = DefaultRouter()
+router.register(r'reports/shops', ShopSalesReportViewSet, basename='reports-shops')
+router.register(r'reports/products', ProductSalesReportViewSet, basename='reports-products')
+router.register(r'reports/categories', CategorySalesReportViewSet, basename='reports-categories')
+
+
+urlpatterns = router.urls
@@ -0,0 +1,58 @@
+from drf_spectacular.utils import extend_schema, extend_schema_view
+from rest_framework import mixins, viewsets
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+
+from reports.filters import CategoryDailySalesFilter, ProductDailySalesFilter, ShopDailySalesFilter
+from reports.models import CategoryDailySales, ProductDailySales, ShopDailySales
+from reports.serializers import CategoryDailySalesSerializer, ProductDailySalesSerializer, ShopDailySalesSerializer
+from users.permissions import IsSupplier
+
+
+class DailySalesViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Отчеты по продажам из дневных агрегатов, см. `reports.rollups`.
+    Администраторы видят продажи всех магазинов, поставщики - только своего магазина.
+    """
+    permission_classes = [IsAuthenticated & (IsAdminUser | IsSupplier)]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(shop__owner=self.request.user)
+        return queryset
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="Daily sales of shops.",
+        description="Return revenue, sold units and orders of shops by days.",
+    ),
+)
+class ShopSalesReportViewSet(DailySalesViewSet):
+    queryset = ShopDailySales.objects.select_related('shop')
+    serializer_class = ShopDailySalesSerializer
+    filterset_class = ShopDailySalesFilter
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="Daily sales of products.",
+        description="Return revenue, sold units and orders of products in shops by days.",
+    ),
+)
+class ProductSalesReportViewSet(DailySalesViewSet):
+    queryset = ProductDailySales.objects.select_related('shop', 'product')
+    serializer_class = ProductDailySalesSerializer
+    filterset_class = ProductDailySalesFilter
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="Daily sales of categories.",
+        description="Return revenue, sold units and orders of categories in shops by days.",
+    ),
+)
+class CategorySalesReportViewSet(DailySalesViewSet):
+    queryset = CategoryDailySales.objects.select_related('shop', 'category')
+    serializer_class = CategoryDailySalesSerializer
+    filterset_class = CategoryDailySalesFilter
@@ -0,0 +1,212 @@
+import time
+from hashlib import sha256
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+from drf_spectacular.plumbing import build_bearer_security_scheme_object
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+from rest_framework.permissions import SAFE_METHODS
+
+from products.models import Shop
+from users.models import UserProfile
+
+ACCESS_TOKEN = 'access'
+REFRESH_TOKEN = 'refresh'
+SIGNED_TOKEN_SALT = 'users.authentication.SignedTokenAuthentication'
+
+
+def _token_cache_key(key):
+    # tokens are not kept in cache keys in clear text
+    return f'auth:token:{sha256(key.encode()).hexdigest()}'
+
+
+def invalidate_tokens(keys):
+    """Drop cached identities of the token keys."""
+    cache.delete_many([_token_cache_key(key) for key in keys])
+
+
+def invalidate_user_tokens(user_id):
+    """Drop cached identities of the user, called when the user, the profile or the shop is changed."""
+    invalidate_tokens(Token.objects.filter(user_id=user_id).values_list('key', flat=True))
+
+
+def _loaded(model, **values):
+    """Instance of the model with the given field values, other fields are read from the database on access."""
+    names = [field.attname for field in model._meta.concrete_fields if field.attname in values]
+    return model.from_db(None, names, [values[name] for name in names])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication which reads token, user, profile and shop of the user with one query
+    and keeps the identity read by permissions in the cache for `AUTH_TOKEN_CACHE_TIMEOUT` seconds.
+
+    Only ids, active, staff and supplier statuses are cached, not the password hash or other fields
+    of the user, which are read from the database on access. Permissions read `request.user.profile`
+    and `request.user.shop` from the cached identity, so authenticated requests run no identity queries
+    while the cache is warm. Cached identities are dropped by signals on commit of logout, token rotation
+    and changes of the user, its profile and shop, see `users.signals`. Updates by querysets send
+    no signals, the timeout limits their staleness.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = _token_cache_key(key)
+        identity = cache.get(cache_key)
+        if identity is None:
+            try:
+                token = Token.objects.select_related('user__profile', 'user__shop').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            user = token.user
+            profile = getattr(user, 'profile', None)
+            shop = getattr(user, 'shop', None)
+            identity = {
+                'uid': user.pk, 'active': user.is_active, 'staff': user.is_staff, 'superuser': user.is_superuser,
+                'profile': profile.pk if profile else None, 'supplier': bool(profile and profile.is_supplier),
+                'shop': shop.pk if shop else None, 'created': token.created,
+            }
+            cache.set(cache_key, identity, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+
+        if not identity['active']:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return self.get_identity_user(identity), _loaded(
+            Token, key=key, user_id=identity['uid'], created=identity['created']
+        )
+
+    @staticmethod
+    def get_identity_user(identity):
+        User = get_user_model()
+        user = _loaded(
+            User, id=identity['uid'], is_active=identity['active'], is_staff=identity['staff'],
+            is_superuser=identity['superuser']
+        )
+        profile = identity['profile'] and _loaded(
+            UserProfile, id=identity['profile'], owner_id=user.pk, is_supplier=identity['supplier']
+        )
+        User.profile.related.set_cached_value(user, profile or None)
+        shop = identity['shop'] and _loaded(Shop, id=identity['shop'], owner_id=user.pk)
+        User.shop.related.set_cached_value(user, shop or None)
+        return user
+
+
+def issue_signed_tokens(user):
+    """
+    Access and refresh tokens of the user signed with `SECRET_KEY`.
+    Access token carries the claims read by permissions: staff and supplier statuses and the shop id.
+    """
+    profile = getattr(user, 'profile', None)
+    shop = getattr(user, 'shop', None)
+    now = int(time.time())
+    claims = {
+        'uid': user.pk,
+        'staff': user.is_staff,
+        'supplier': bool(profile and profile.is_supplier),
+        'shop': shop.pk if shop else None,
+    }
+    return {
+        ACCESS_TOKEN: signing.dumps({
+            **claims, 'typ': ACCESS_TOKEN, 'jti': uuid4().hex, 'exp': now + settings.SIGNED_ACCESS_TOKEN_LIFETIME
+        }, salt=SIGNED_TOKEN_SALT, compress=True),
+        REFRESH_TOKEN: signing.dumps({
+            'uid': user.pk, 'typ': REFRESH_TOKEN, 'jti': uuid4().hex,
+            'exp': now + settings.SIGNED_REFRESH_TOKEN_LIFETIME,
+        }, salt=SIGNED_TOKEN_SALT, compress=True),
+    }
+
+
+def load_signed_token(token, token_type):
+    """Claims of the valid unexpired token of the type."""
+    try:
+        claims = signing.loads(token, salt=SIGNED_TOKEN_SALT)
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+    if claims.get('typ') != token_type:
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+    if claims['exp'] <= time.time():
+        raise exceptions.AuthenticationFailed(_('Token has expired.'))
+    return claims
+
+
+def _revoked_token_cache_key(claims):
+    return f'auth:revoked:{claims["jti"]}'
+
+
+def revoke_signed_token(claims):
+    """Add the token to the revocation list until it expires, return False if it is already revoked."""
+    return cache.add(_revoked_token_cache_key(claims), True, max(1, int(claims['exp'] - time.time())))
+
+
+def is_signed_token_revoked(claims):
+    return cache.get(_revoked_token_cache_key(claims), False)
+
+
+def get_active_user(user_id):
+    """Stored user with the profile and the shop read by permissions."""
+    try:
+        user = get_user_model().objects.select_related('profile', 'shop').get(pk=user_id)
+    except get_user_model().DoesNotExist:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+    return user
+
+
+def get_claimed_user(claims):
+    """Unsaved user with the profile and the shop built from the claims, permissions read them without queries."""
+    User = get_user_model()
+    user = User(pk=claims['uid'], is_staff=claims['staff'], is_active=True)
+    user._state.adding = False
+    User.profile.related.set_cached_value(user, UserProfile(owner=user, is_supplier=claims['supplier']))
+    User.shop.related.set_cached_value(user, Shop(pk=claims['shop'], owner=user) if claims['shop'] else None)
+    return user
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Optional stateless authentication by short-lived signed access tokens: `Authorization: Bearer <token>`.
+
+    Reads by the actions in `authenticate_by_claims` of the view (public catalog) authenticate by the claims
+    of the token without queries to the database or the cache, so a revoked or changed user keeps the access
+    to them until the token expires in `SIGNED_ACCESS_TOKEN_LIFETIME` seconds.
+    Other requests check the revocation list and read the stored user.
+    Tokens are issued, refreshed and revoked by `users.views.SignedTokenViewSet`.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+
+        try:
+            claims = load_signed_token(auth[1].decode(), ACCESS_TOKEN)
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+
+        view = (request.parser_context or {}).get('view')
+        claims_actions = getattr(view, 'authenticate_by_claims', ())
+        if request.method in SAFE_METHODS and getattr(view, 'action', None) in claims_actions:
+            return get_claimed_user(claims), claims
+        if is_signed_token_revoked(claims):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        return get_active_user(claims['uid']), claims
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class SignedTokenScheme(OpenApiAuthenticationExtension):
+    target_class = SignedTokenAuthentication
+    name = 'signedTokenAuth'
+
+    def get_security_definition(self, auto_schema):
+        return build_bearer_security_scheme_object(header_name='Authorization', token_prefix=self.target.keyword)
@@ -2,9 +2,10 @@ from dj_rest_auth.serializers import UserDetailsSerializer
 from rest_framework import serializers
 
 from users.models import UserProfile, Contact
+from utils.sparse import SparseFieldsMixin
 
 
-class ContactSerializer(serializers.ModelSerializer):
+class ContactSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer контактов пользователя.
     """
@@ -13,7 +14,7 @@ class ContactSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     User profile serializer
     """
@@ -22,7 +23,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ('middle_name',)
 
 
-class UserSerializer(UserDetailsSerializer):
+class UserSerializer(SparseFieldsMixin, UserDetailsSerializer):
     """
     Update user profile and contacts.
     """
@@ -45,3 +46,19 @@ class UserSerializer(UserDetailsSerializer):
 
         instance = super().update(instance, validated_data)
         return instance
+
+
+class SignedTokensSerializer(serializers.Serializer):
+    """
+    Signed access and refresh tokens.
+    """
+    access = serializers.CharField(read_only=True)
+    refresh = serializers.CharField(read_only=True)
+
+
+class SignedTokenRefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+
+class SignedTokenRevokeSerializer(SignedTokenRefreshSerializer):
+    access = serializers.CharField(required=False)
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from products.models import Shop
+from users.authentication import invalidate_tokens, invalidate_user_tokens
+from users.models import UserProfile
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    """Logout and token rotation delete the token."""
+    key = instance.key
+    transaction.on_commit(lambda: invalidate_tokens([key]))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user(sender, instance, created, **kwargs):
+    if not created:
+        user_id = instance.pk
+        transaction.on_commit(lambda: invalidate_user_tokens(user_id))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=Shop)
+@receiver(post_delete, sender=Shop)
+def invalidate_owner(sender, instance, **kwargs):
+    """Permissions read the profile and the shop of the cached user."""
+    owner_id = instance.owner_id
+    if owner_id is not None:
+        transaction.on_commit(lambda: invalidate_user_tokens(owner_id))
@@ -8,7 +8,7 @@ from users.models import UserProfile
 
 
 @pytest.fixture
-def api_client(shop_factory):
+def api_client():
     """
     Фикстура для клиента API.
     """
@@ -19,7 +19,7 @@ def api_client(shop_factory):
         user = baker.make(get_user_model(), **kwargs)
         UserProfile.objects.create(owner=user, is_supplier=is_supplier)
         if is_supplier:
-            shop_factory(owner=user)
+            baker.make('shop', owner=user)
         if is_auth:
             token = Token.objects.create(user=user)
             api_client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
@@ -0,0 +1,171 @@
+import pytest
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.reverse import reverse
+
+from users.authentication import _token_cache_key
+
+
+@pytest.mark.django_db
+def test_cached_token_authentication(api_client, django_assert_num_queries):
+    # arrange
+    client, user = api_client(is_supplier=True)
+    url = reverse("reports-shops-list")
+
+    # act: token, user, profile and shop are read with one query
+    with django_assert_num_queries(2):
+        resp = client.get(url)
+    assert resp.status_code == status.HTTP_200_OK
+
+    # assert: then identity is read from the cache, only the count of the empty report is queried
+    with django_assert_num_queries(1):
+        resp = client.get(url)
+    assert resp.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_cached_token_is_invalidated(api_client, django_capture_on_commit_callbacks):
+    # arrange
+    client, user = api_client(is_supplier=True)
+    url = reverse("reports-shops-list")
+    assert client.get(url).status_code == status.HTTP_200_OK
+
+    # act: profile is changed, cached identities are dropped on commit
+    with django_capture_on_commit_callbacks(execute=True):
+        user.profile.is_supplier = False
+        user.profile.save()
+        assert client.get(url).status_code == status.HTTP_200_OK
+
+    # assert
+    assert client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+    # act: user is deactivated
+    with django_capture_on_commit_callbacks(execute=True):
+        user.is_active = False
+        user.save()
+
+    # assert
+    assert client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_cached_token_is_invalidated_on_logout(api_client, django_capture_on_commit_callbacks):
+    # arrange
+    client, user = api_client()
+    url = reverse("orders-list")
+    assert client.get(url).status_code == status.HTTP_200_OK
+
+    # act
+    with django_capture_on_commit_callbacks(execute=True):
+        resp = client.post(reverse("rest_logout"))
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+    assert not Token.objects.filter(user=user).exists()
+    assert client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_cached_token_keeps_identity_only(api_client):
+    # arrange
+    client, user = api_client(is_supplier=True)
+    url = reverse("rest_user_details")
+    assert client.get(url).status_code == status.HTTP_200_OK
+
+    # act
+    cached = cache.get(_token_cache_key(Token.objects.get(user=user).key))
+    resp = client.get(url)
+
+    # assert: the password hash is not cached, other fields of the user are read on access
+    assert user.password not in str(cached)
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.data['email'] == user.email != ''
+
+
+@pytest.mark.django_db
+def test_signed_token_authentication(api_client, django_assert_num_queries):
+    # arrange
+    client, user = api_client(is_supplier=True)
+    resp = client.post(reverse("signed-tokens-list"))
+    assert resp.status_code == status.HTTP_201_CREATED
+    url = reverse("categories-list")
+    assert client.get(url).status_code == status.HTTP_200_OK
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {resp.data["access"]}')
+
+    # act: claims are read from the token and the catalog response from the cache
+    with django_assert_num_queries(0):
+        resp = client.get(url)
+
+    # assert
+    assert resp.status_code == status.HTTP_200_OK
+
+    # act: invalid token
+    client.credentials(HTTP_AUTHORIZATION='Bearer invalid')
+    resp = client.get(url)
+
+    # assert
+    assert resp.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_signed_token_reads_stored_user_outside_catalog(api_client):
+    # arrange
+    client, user = api_client()
+    access = client.post(reverse("signed-tokens-list")).data['access']
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    # act
+    resp = client.get(reverse("rest_user_details"))
+    token_resp = client.post(reverse("signed-tokens-list"))
+
+    # assert: user details are read from the database, access token does not issue new tokens
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.data['email'] == user.email != ''
+    assert resp.data['pk'] == user.pk
+    assert token_resp.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_signed_token_refresh_and_revoke(api_client):
+    # arrange
+    client, user = api_client()
+    tokens = client.post(reverse("signed-tokens-list")).data
+    refresh_url = reverse("signed-tokens-refresh")
+
+    # act
+    resp = client.post(refresh_url, {'refresh': tokens['refresh']})
+    reused_resp = client.post(refresh_url, {'refresh': tokens['refresh']})
+
+    # assert: refresh token is used once
+    assert resp.status_code == status.HTTP_200_OK
+    assert reused_resp.status_code == status.HTTP_401_UNAUTHORIZED
+
+    # act: logout
+    tokens = resp.data
+    resp = client.post(reverse("signed-tokens-revoke"), tokens)
+
+    # assert
+    assert resp.status_code == status.HTTP_204_NO_CONTENT
+    assert client.post(refresh_url, {'refresh': tokens['refresh']}).status_code == status.HTTP_401_UNAUTHORIZED
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+    # revoked token is rejected outside the catalog, catalog reads trust the token until it expires
+    assert client.get(reverse("orders-list")).status_code == status.HTTP_401_UNAUTHORIZED
+    assert client.get(reverse("categories-list")).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_revoked_signed_token_can_not_export_shop_data(api_client):
+    # arrange
+    client, user = api_client(is_supplier=True)
+    tokens = client.post(reverse("signed-tokens-list")).data
+    client.post(reverse("signed-tokens-revoke"), tokens)
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+
+    # act
+    export_resp = client.get(reverse("shops-export-data", kwargs={'pk': user.shop.id}))
+    list_resp = client.get(reverse("shops-list"))
+
+    # assert: only the public reads of the shops trust the claims of the token
+    assert export_resp.status_code == status.HTTP_401_UNAUTHORIZED
+    assert list_resp.status_code == status.HTTP_200_OK
@@ -1,9 +1,10 @@
 from rest_framework.routers import DefaultRouter
 
-from users.views import UserViewSet
+from users.views import SignedTokenViewSet, UserViewSet
 
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='users')
+router.register(r'auth/tokens', SignedTokenViewSet, basename='signed-tokens')
 
 urlpatterns = router.urls
@@ -1,10 +1,29 @@
 from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
 from drf_spectacular.utils import extend_schema_view, extend_schema
+from rest_framework import exceptions, status
+from rest_framework.decorators import action
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
-from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
-from users.serializers import UserSerializer
+from users.authentication import (
+    ACCESS_TOKEN,
+    REFRESH_TOKEN,
+    CachedTokenAuthentication,
+    SignedTokenAuthentication,
+    get_active_user,
+    issue_signed_tokens,
+    load_signed_token,
+    revoke_signed_token,
+)
+from users.serializers import (
+    SignedTokenRefreshSerializer,
+    SignedTokenRevokeSerializer,
+    SignedTokensSerializer,
+    UserSerializer,
+)
 
 
 @extend_schema_view(
@@ -22,3 +41,71 @@ class UserViewSet(RetrieveModelMixin, ListModelMixin, GenericViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
+
+
+@extend_schema_view(
+    create=extend_schema(
+        summary="Issue signed tokens.",
+        description="Return short-lived signed access token and refresh token of the authenticated user. "
+                    "Access token is sent as `Authorization: Bearer <token>`.",
+        request=None,
+    ),
+    refresh=extend_schema(
+        summary="Refresh signed tokens.",
+        description="Return new access and refresh tokens with current claims of the user, "
+                    "the refresh token is revoked.",
+        responses=SignedTokensSerializer,
+    ),
+    revoke=extend_schema(
+        summary="Revoke signed tokens.",
+        description="Add refresh and access tokens to the revocation list on logout.",
+        responses={204: None},
+    ),
+)
+class SignedTokenViewSet(GenericViewSet):
+    """
+    Viewset для подписанных токенов доступа, см. `users.authentication.SignedTokenAuthentication`.
+    """
+    # tokens are issued by the login token only, an access token must not renew itself
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    serializer_class = SignedTokensSerializer
+
+    def get_authenticate_header(self, request):
+        # invalid tokens of refresh and revoke are 401 errors without authenticators
+        return super().get_authenticate_header(request) or SignedTokenAuthentication().authenticate_header(request)
+
+    def create(self, request):
+        return Response(issue_signed_tokens(request.user), status=status.HTTP_201_CREATED)
+
+    @action(
+        methods=['post'], detail=False, authentication_classes=[], permission_classes=[AllowAny],
+        serializer_class=SignedTokenRefreshSerializer
+    )
+    def refresh(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        claims = load_signed_token(serializer.validated_data['refresh'], REFRESH_TOKEN)
+        user = get_active_user(claims['uid'])
+        # refresh token is used once, the revocation is atomic for concurrent refreshes
+        if not revoke_signed_token(claims):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        return Response(issue_signed_tokens(user), status=status.HTTP_200_OK)
+
+    @action(
+        methods=['post'], detail=False, authentication_classes=[], permission_classes=[AllowAny],
+        serializer_class=SignedTokenRevokeSerializer
+    )
+    def revoke(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        revoke_signed_token(load_signed_token(serializer.validated_data['refresh'], REFRESH_TOKEN))
+        if 'access' in serializer.validated_data:
+            try:
+                revoke_signed_token(load_signed_token(serializer.validated_data['access'], ACCESS_TOKEN))
+            except exceptions.AuthenticationFailed:
+                # expired access token needs no revocation
+                pass
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
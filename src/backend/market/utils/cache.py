@@ -0,0 +1,84 @@
+import json
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def _version_key(model):
+    return f'version:{model._meta.label_lower}'
+
+
+def get_versions(models):
+    """
+    Current version of every model. A missing version is started from the current time,
+    so an evicted counter never returns to a value which was already used.
+    """
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(*models):
+    """
+    Invalidate all the cached responses built from the models after the commit of the current transaction,
+    so a concurrent read can not cache the data before the commit with the new versions.
+    """
+    transaction.on_commit(lambda: _bump_versions(models))
+
+
+def _bump_versions(models):
+    for model in models:
+        key = _version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+class CachedResponseMixin:
+    """
+    Cache `list` and `retrieve` responses of a viewset.
+
+    Cache key is built from the action, url kwargs, query params and versions of `cache_models`.
+    Versions are bumped by signals on every write, so the cached responses are never served stale.
+    Authentication, permissions and throttling are checked before the cache is read.
+    """
+    cache_models = ()
+    cache_timeout = None
+
+    def get_cache_key(self, request, **kwargs):
+        data = json.dumps(
+            [
+                request.get_host(), self.basename, self.action, kwargs,
+                sorted(request.query_params.lists()), get_versions(self.cache_models)
+            ],
+            default=str
+        )
+        return f'response:{self.basename}:{md5(data.encode()).hexdigest()}'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request, **kwargs)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            timeout = self.cache_timeout if self.cache_timeout is not None else settings.RESPONSE_CACHE_TIMEOUT
+            cache.set(key, response.data, timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
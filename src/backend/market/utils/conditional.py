@@ -0,0 +1,55 @@
+import json
+from hashlib import md5
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    `ETag` and `Last-Modified` validators for `list` and `retrieve` of a viewset.
+
+    Validators are computed from the fetched objects before serialization, so a matching
+    `If-None-Match` or `If-Modified-Since` is answered with 304 without serializing anything.
+    List pages are validated by `ETag` only: removed rows do not change the last modification time.
+    """
+
+    def get_last_modified(self, instance):
+        return instance.updated_at
+
+    def get_etag(self, instances):
+        data = [self.request.user.pk, self.request.get_full_path()]
+        data += [(instance.pk, self.get_last_modified(instance).isoformat()) for instance in instances]
+        return '"%s"' % md5(json.dumps(data, default=str).encode()).hexdigest()
+
+    def conditional_response(self, request, etag, last_modified=None, handler=None):
+        """Return 304 if the client has the current version, otherwise the response of the handler."""
+        timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler()
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self.conditional_response(
+            request,
+            self.get_etag([instance]),
+            self.get_last_modified(instance),
+            lambda: Response(self.get_serializer(instance).data)
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        instances = page if page is not None else list(queryset)
+
+        def handler():
+            data = self.get_serializer(instances, many=True).data
+            return self.get_paginated_response(data) if page is not None else Response(data)
+
+        return self.conditional_response(request, self.get_etag(instances), handler=handler)
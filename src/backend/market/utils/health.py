@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+from functools import lru_cache
+
+import redis
+from celery import current_app
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponseNotAllowed, JsonResponse
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def get_probe_redis(url):
+    """Separate client with timeouts, so a hanging redis fails the probe instead of blocking it."""
+    return redis.Redis.from_url(
+        url, socket_timeout=settings.READINESS_CHECK_TIMEOUT, socket_connect_timeout=settings.READINESS_CHECK_TIMEOUT
+    )
+
+
+def check_database():
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'SET LOCAL statement_timeout = {int(settings.READINESS_CHECK_TIMEOUT * 1000)}')
+        cursor.execute('SELECT 1')
+
+
+def check_redis():
+    get_probe_redis(settings.REDIS_URL).ping()
+
+
+def check_broker():
+    with current_app.connection_for_write(connect_timeout=settings.READINESS_CHECK_TIMEOUT) as conn:
+        # no retries, the probe is repeated anyway
+        conn.ensure_connection(max_retries=0)
+
+
+# Dependencies of the readiness probe
+READINESS_CHECKS = {
+    'database': check_database,
+    'redis': check_redis,
+    'broker': check_broker,
+}
+
+
+class Readiness:
+    """
+    Results of the readiness checks kept in the process for `READINESS_CACHE_TIMEOUT` seconds,
+    probes of the pod run the checks once per timeout and read the results in between.
+    While one thread runs the checks, the others return the previous results instead of waiting.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked_at = None
+        self.results = None
+
+    @staticmethod
+    def run_checks():
+        results = {}
+        for name, check in READINESS_CHECKS.items():
+            start = time.perf_counter()
+            try:
+                check()
+            except Exception:
+                # errors name hosts and ports, they are logged and not returned by the public probe
+                logger.warning('Readiness check %s failed.', name, exc_info=True)
+                ok = False
+            else:
+                ok = True
+            results[name] = {'ok': ok, 'latency_ms': round((time.perf_counter() - start) * 1000, 3)}
+        return results
+
+    def is_stale(self):
+        return self.checked_at is None or time.monotonic() - self.checked_at >= settings.READINESS_CACHE_TIMEOUT
+
+    def get_results(self):
+        if not self.is_stale():
+            return self.results
+        # only the first probe waits for the checks, there are no previous results for it
+        if not self.lock.acquire(blocking=self.results is None):
+            return self.results
+        try:
+            if self.is_stale():
+                self.results = self.run_checks()
+                self.checked_at = time.monotonic()
+            return self.results
+        finally:
+            self.lock.release()
+
+
+class HealthCheckMiddleware:
+    """
+    Liveness `/health` and readiness `/ready` probes answered before the other middleware and DRF,
+    so they run no sessions, authentication and throttling and the host of the pod ip
+    is not checked against `ALLOWED_HOSTS`. Put it first in `MIDDLEWARE`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.readiness = Readiness()
+        self.handlers = {
+            '/health': self.health, '/health/': self.health,
+            '/ready': self.ready, '/ready/': self.ready,
+        }
+
+    def __call__(self, request):
+        handler = self.handlers.get(request.path_info)
+        if handler is None:
+            return self.get_response(request)
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        return handler(request)
+
+    @staticmethod
+    def health(request):
+        return JsonResponse({'status': 'ok'})
+
+    def ready(self, request):
+        results = self.readiness.get_results()
+        ready = all(result['ok'] for result in results.values())
+        return JsonResponse(
+            {'status': 'ok' if ready else 'unavailable', 'checks': results},
+            status=200 if ready else 503
+        )
@@ -0,0 +1,127 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from utils.models import IdempotencyKey
+
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    IDEMPOTENCY_KEY_HEADER, OpenApiTypes.STR, OpenApiParameter.HEADER,
+    description='Unique key of the request, a retry with the same key returns the response of the first request '
+                'instead of doing the work again.'
+)
+
+
+class IdempotencyKeyInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Запрос с этим ключом идемпотентности еще выполняется.'
+    default_code = 'idempotency_key_in_progress'
+
+
+class IdempotencyKeyMismatch(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'Ключ идемпотентности уже использован для другого запроса.'
+    default_code = 'idempotency_key_mismatch'
+
+
+def get_fingerprint(request):
+    """Hash of the method, path and data of the request."""
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    payload = json.dumps([request.method, request.path, data], sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _claim(user, key, fingerprint):
+    """Stored result of the key or a new record of the key, the second value is True for a claimed record."""
+    now = timezone.now()
+    expired = now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    locked_until = now + timedelta(seconds=settings.IDEMPOTENCY_KEY_LEASE)
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=user, key=key, fingerprint=fingerprint, locked_until=locked_until
+                )
+                return record, True
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if record is None:
+            continue
+        if record.created_at < expired:
+            record.delete()
+            continue
+        # the process of the first request died before storing the response, its lease is taken over once
+        if record.status_code is None and record.fingerprint == fingerprint and record.locked_until < now:
+            taken = IdempotencyKey.objects.filter(
+                pk=record.pk, status_code__isnull=True, locked_until=record.locked_until
+            ).update(locked_until=locked_until)
+            if taken:
+                record.locked_until = locked_until
+                return record, True
+        return record, False
+    raise IdempotencyKeyInProgress()
+
+
+def _replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        raise IdempotencyKeyMismatch()
+    if record.status_code is None:
+        raise IdempotencyKeyInProgress()
+    return Response(record.response, status=record.status_code, headers={REPLAYED_HEADER: 'true'})
+
+
+def idempotent(handler):
+    """
+    View method which is done once per `Idempotency-Key` header of the user.
+
+    The key is claimed by a row with a unique constraint before the work, so a concurrent retry
+    gets 409 Conflict instead of doing the work twice. The claim is a lease of `IDEMPOTENCY_KEY_LEASE`
+    seconds, a retry after it takes over the key of a request whose process died. The response
+    is stored on success and a retry with the same key returns it again for `IDEMPOTENCY_KEY_TTL`
+    seconds, a reuse of the key for another request gets 422. Failed requests release the key,
+    so they may be retried.
+    Requests without the header are not changed.
+    """
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if key is None or not request.user.is_authenticated:
+            return handler(view, request, *args, **kwargs)
+        if not key or len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            raise serializers.ValidationError({IDEMPOTENCY_KEY_HEADER: ['Некорректный ключ идемпотентности.']})
+
+        fingerprint = get_fingerprint(request)
+        record, created = _claim(request.user, key, fingerprint)
+        if not created:
+            return _replay(record, fingerprint)
+
+        try:
+            response = handler(view, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        if response.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+            record.delete()
+            return response
+
+        record.status_code = response.status_code
+        record.response = response.data
+        record.save(update_fields=['status_code', 'response'])
+        return response
+
+    return wrapper
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.11 on 2026-10-18 01:24
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0001_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='locked_until',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Заблокирован до'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class IdempotencyKey(models.Model):
+    """ Результат запроса с заголовком `Idempotency-Key`. """
+
+    class Meta:
+        verbose_name = 'Ключ идемпотентности'
+        verbose_name_plural = 'Список ключей идемпотентности'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key'),
+        ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name='Пользователь',
+        related_name='idempotency_keys',
+        on_delete=models.CASCADE
+    )
+
+    key = models.CharField(max_length=255, verbose_name='Ключ')
+
+    fingerprint = models.CharField(max_length=64, verbose_name='Хеш запроса')
+
+    # Null while the first request with the key is in progress
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name='Код ответа')
+
+    # Request in progress holds the key until this time, then a retry takes the key over
+    locked_until = models.DateTimeField(default=timezone.now, verbose_name='Заблокирован до')
+
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name='Ответ')
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата создания')
+
+    def __str__(self):
+        return f'{self.key}: {self.status_code}'
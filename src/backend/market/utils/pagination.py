@@ -0,0 +1,163 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over the ordering of the queryset.
+
+    Unlike `CursorPagination` it pages over all ordering fields plus the primary key, so ordering
+    by non unique fields like price is stable. Cursor is an opaque token with values of the ordering
+    fields of the last row on the page, next page is fetched with `WHERE (fields) > (values)`, so
+    page N costs as page 1 and no `COUNT(*)` is run.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset)
+
+        values, self.reverse = self.decode_cursor(request, queryset.model)
+        ordering = [self.invert(field) for field in self.ordering] if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.get_seek_filter(ordering, values))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = values is not None if not self.reverse else has_more
+        self.page = results
+        return results
+
+    def get_ordering(self, queryset):
+        """Ordering of the queryset with primary key as the last tie-breaker."""
+        ordering = [
+            field for field in (queryset.query.order_by or queryset.model._meta.ordering) if isinstance(field, str)
+        ]
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering.append('-pk' if ordering and ordering[0].startswith('-') else 'pk')
+        return ordering
+
+    @staticmethod
+    def get_field(model, field):
+        """Model field of the ordering, None for annotations."""
+        *path, name = field.lstrip('-').split('__')
+        opts = model._meta
+        try:
+            for part in path:
+                opts = opts.get_field(part).related_model._meta
+            return opts.pk if name == 'pk' else opts.get_field(name)
+        except (FieldDoesNotExist, AttributeError):
+            return None
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def get_seek_filter(ordering, values):
+        """
+        Rows after the given values: `(a > x) OR (a = x AND b > y) OR ...`.
+        Leading `a >= x` lets the database use an index range scan on the first field.
+        """
+        conditions = []
+        for i, field in enumerate(ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {name.lstrip('-'): value for name, value in zip(ordering[:i], values[:i])}
+            conditions.append(Q(**equal, **{f'{field.lstrip("-")}__{lookup}': values[i]}))
+
+        first = ordering[0]
+        leading = Q(**{f'{first.lstrip("-")}__{"lte" if first.startswith("-") else "gte"}': values[0]})
+        return leading & reduce(or_, conditions)
+
+    def get_values(self, instance):
+        values = []
+        for field in self.ordering:
+            value = reduce(getattr, field.lstrip('-').split('__'), instance)
+            values.append(value if isinstance(value, (int, float, bool, type(None))) else str(value))
+        return values
+
+    def encode_cursor(self, instance, reverse):
+        data = json.dumps({'v': self.get_values(instance), 'r': reverse}, separators=(',', ':'))
+        cursor = urlsafe_b64encode(data.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        """Values of the cursor converted by the ordering fields, a tampered cursor is not found."""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            data = json.loads(urlsafe_b64decode(cursor.encode()))
+            values, reverse = data['v'], bool(data['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering) or None in values:
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [
+                field.to_python(value) if field is not None else value
+                for field, value in zip((self.get_field(model, name) for name in self.ordering), values)
+            ]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Previous page from the first row, next page starts from the beginning
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'The pagination cursor value.',
+            'schema': {'type': 'string'},
+        }]
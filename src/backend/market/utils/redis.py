@@ -0,0 +1,13 @@
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def get_redis(url=None, timeout=None):
+    """
+    Redis client of the url, `REDIS_URL` by default. Clients keep a connection pool, so they are shared.
+    `timeout` limits connecting and every command in seconds, there is no limit by default.
+    """
+    return redis.Redis.from_url(url or settings.REDIS_URL, socket_timeout=timeout, socket_connect_timeout=timeout)
@@ -0,0 +1,150 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import BaseSerializer, ListSerializer, PrimaryKeyRelatedField
+
+SPARSE_FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        'fields', OpenApiTypes.STR,
+        description='Comma separated fields to render, nested fields are given by dotted paths: `id,product.name`.'
+    ),
+    OpenApiParameter('omit', OpenApiTypes.STR, description='Comma separated fields to skip: `owner,order_items`.'),
+    OpenApiParameter(
+        'expand', OpenApiTypes.STR,
+        description='Comma separated nested fields to render in full, other nested fields are rendered as ids '
+                    'when `fields` or `expand` is given.'
+    ),
+]
+
+
+class SparseFieldset:
+    """
+    Fields requested by `?fields=`, `?omit=` and `?expand=` of a GET request, as tuples of field names.
+
+    Without the parameters all the fields are rendered. When `fields` or `expand` is given,
+    nested serializers are collapsed to primary keys unless they are expanded explicitly
+    or by a dotted path in `fields`.
+    """
+
+    def __init__(self, fields=None, omit=(), expand=()):
+        self.fields = fields or None
+        self.omit = set(omit)
+        self.expand = set(expand)
+        self.collapse = self.fields is not None or bool(self.expand)
+
+    @staticmethod
+    def _paths(values):
+        return {tuple(part.strip().split('.')) for value in values for part in value.split(',') if part.strip()}
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        params = request.query_params
+        if not any(name in params for name in ('fields', 'omit', 'expand')):
+            return None
+        return cls(
+            fields=cls._paths(params.getlist('fields')),
+            omit=cls._paths(params.getlist('omit')),
+            expand=cls._paths(params.getlist('expand')),
+        )
+
+    @staticmethod
+    def _extends(paths, path, strict=False):
+        """Some of the paths starts with the path."""
+        return any(p[:len(path)] == path and (len(p) > len(path) or not strict) for p in paths)
+
+    def is_expanded(self, path):
+        return self._extends(self.expand, path) or self._extends(self.fields or (), path, strict=True)
+
+    def trim(self, fields, path):
+        """Fields of the serializer at the path from the root serializer."""
+        depth = len(path)
+        if self.fields is not None and not any(path[:i] in self.fields for i in range(1, depth + 1)):
+            wanted = {p[depth] for p in self.fields if len(p) > depth and p[:depth] == path}
+            if wanted:
+                fields = {name: field for name, field in fields.items() if name in wanted}
+
+        for name in list(fields):
+            if path + (name,) in self.omit:
+                del fields[name]
+            elif self.collapse and isinstance(fields[name], BaseSerializer) and not self.is_expanded(path + (name,)):
+                fields[name] = self.collapsed(fields[name])
+        return fields
+
+    @staticmethod
+    def collapsed(field):
+        kwargs = {'read_only': True}
+        if field.source:
+            kwargs['source'] = field.source
+        if isinstance(field, ListSerializer):
+            return PrimaryKeyRelatedField(many=True, **kwargs)
+        return PrimaryKeyRelatedField(**kwargs)
+
+
+class SparseFieldsMixin:
+    """
+    Serializer with fields trimmed by the sparse fieldset of the request, see `SparseFieldset`.
+    Nested serializers trim their fields by their path from the root serializer.
+    """
+
+    def get_sparse_path(self):
+        path, node = [], self
+        while node.parent is not None:
+            if node.field_name:
+                path.append(node.field_name)
+            node = node.parent
+        return tuple(reversed(path))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        sparse = SparseFieldset.from_request(self.context.get('request'))
+        if sparse is not None:
+            fields = sparse.trim(fields, self.get_sparse_path())
+        return fields
+
+
+def get_rendered_field(serializer, path):
+    """Field of the serializer by its path or None when the field is not rendered."""
+    field = serializer
+    for name in path:
+        if isinstance(field, ListSerializer):
+            field = field.child
+        fields = getattr(field, 'fields', None)
+        if fields is None or name not in fields:
+            return None
+        field = fields[name]
+    return field
+
+
+class SparseQuerysetMixin:
+    """
+    Joins and prefetches of a viewset queryset which follow the rendered fields of the serializer.
+
+    `sparse_select_related` and `sparse_prefetch_related` map dotted paths of serializer fields
+    to `select_related` and `prefetch_related` lookups. A lookup is applied only if its field is rendered
+    and is not collapsed to a primary key, which is read from the foreign key column itself.
+    """
+    sparse_select_related = {}
+    sparse_prefetch_related = {}
+
+    def is_rendered(self, serializer, path):
+        field = get_rendered_field(serializer, tuple(path.split('.')))
+        return field is not None and not isinstance(field, PrimaryKeyRelatedField)
+
+    def get_queryset(self):
+        return self.get_sparse_queryset(super().get_queryset())
+
+    def get_sparse_queryset(self, queryset):
+        serializer = self.get_serializer()
+        select_related = [
+            lookup for path, lookup in self.sparse_select_related.items() if self.is_rendered(serializer, path)
+        ]
+        prefetch_related = [
+            lookup for path, lookup in self.sparse_prefetch_related.items() if self.is_rendered(serializer, path)
+        ]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
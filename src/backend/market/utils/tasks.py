@@ -0,0 +1,14 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from utils.models import IdempotencyKey
+
+
+@shared_task(ignore_result=True)
+def purge_idempotency_keys():
+    """Delete stored results of idempotency keys older than `IDEMPOTENCY_KEY_TTL`."""
+    expired = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    IdempotencyKey.objects.filter(created_at__lt=expired).delete()
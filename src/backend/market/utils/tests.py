@@ -1,10 +1,174 @@
-from dj_rest_auth.tests.mixins import APIClient
+import time
+
+import redis
+from django.test import Client
 from rest_framework import status
-from rest_framework.reverse import reverse
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from utils import health, throttling
+from utils.throttling import AnonRateThrottle, gcra
+
+
+class AnonView(APIView):
+    permission_classes = (AllowAny,)
+    throttle_classes = (AnonRateThrottle,)
+
+    def get(self, request):
+        return Response({'status': 'ok'})
+
+
+def test_health(monkeypatch):
+    # arrange
+    monkeypatch.setitem(AnonRateThrottle.THROTTLE_RATES, 'anon', '1/min')
+    client = Client()
+
+    # act
+    responses = [client.get(url) for url in ('/health', '/health/', '/health')]
+
+    # assert: probes are not throttled
+    assert [resp.status_code for resp in responses] == [status.HTTP_200_OK] * 3
+    assert responses[0].json() == {'status': 'ok'}
+    assert client.post('/health').status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+
+
+def test_ready(monkeypatch):
+    # arrange
+    calls = []
+
+    def broker():
+        calls.append('broker')
+        raise redis.ConnectionError('Connection refused.')
+
+    monkeypatch.setattr(health, 'READINESS_CHECKS', {'database': lambda: calls.append('database'), 'broker': broker})
+    client = Client()
+
+    # act
+    resp = client.get('/ready')
+    cached_resp = client.get('/ready/')
+
+    # assert: checks run once per READINESS_CACHE_TIMEOUT
+    assert resp.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert calls == ['database', 'broker']
+    data = resp.json()
+    assert data['status'] == 'unavailable'
+    assert data['checks']['database']['ok'] is True
+    # errors are logged, only the status and the latency are public
+    assert set(data['checks']['broker']) == {'ok', 'latency_ms'}
+    assert data['checks']['broker']['ok'] is False
+    assert cached_resp.json() == data
+
+
+def test_ready_returns_previous_results_while_checked(monkeypatch, settings):
+    # arrange
+    readiness = health.Readiness()
+    monkeypatch.setattr(health, 'READINESS_CHECKS', {'database': lambda: None})
+    results = readiness.get_results()
+    settings.READINESS_CACHE_TIMEOUT = 0
+
+    # act: other thread runs the checks
+    with readiness.lock:
+        stale = readiness.get_results()
+
+    # assert
+    assert stale is results
+    assert readiness.get_results() is not results
+
+
+def test_gcra_allows_burst_and_spaces_requests():
+    # arrange: 3 requests per 3 seconds
+    interval, period, now = 1_000_000, 3_000_000, 10_000_000
+
+    # act
+    burst = [gcra('throttle_test', interval, period, now=now) for _ in range(4)]
+
+    # assert: burst of the limit, then the next request waits one interval
+    assert [allowed for allowed, _, _ in burst] == [True, True, True, False]
+    assert burst[-1][1] == interval
+    assert gcra('throttle_test', interval, period, now=now + interval) == (True, 0, period)
+    assert gcra('throttle_test', interval, period, now=now + interval)[0] is False
+
+
+def test_gcra_admits_burst_and_rate_in_one_period():
+    # arrange: 3 requests per 3 seconds after a quiet period
+    interval, period, now = 1_000_000, 3_000_000, 10_000_000
+
+    # act: a request every tenth of the interval for one period
+    allowed = [
+        gcra('throttle_test', interval, period, now=now + step * interval // 10)[0] for step in range(30)
+    ]
+
+    # assert: the burst and one request per interval
+    assert sum(allowed) == 2 * 3 - 1
+
+
+def test_gcra_script_allows_burst_and_spaces_requests(redis_client):
+    # arrange
+    redis_client.delete('throttle_test')
+    script = redis_client.register_script(throttling.GCRA_SCRIPT)
+    interval, period = 1_000_000, 3_000_000
+
+    # act
+    burst = [script(keys=['throttle_test'], args=[interval, period, 1, 1]) for _ in range(4)]
+    redis_client.delete('throttle_test')
+
+    # assert: burst of the limit, then the next request waits about one interval
+    assert [allowed for allowed, _, _ in burst] == [1, 1, 1, 0]
+    assert 0 < burst[-1][1] <= interval
+
+
+def test_throttle_returns_retry_after(monkeypatch):
+    # arrange
+    monkeypatch.setitem(AnonRateThrottle.THROTTLE_RATES, 'anon', '2/min')
+    view = AnonView.as_view()
+
+    # act
+    responses = [view(APIRequestFactory().get('/')) for _ in range(3)]
+
+    # assert
+    assert [resp.status_code for resp in responses] == [
+        status.HTTP_200_OK, status.HTTP_200_OK, status.HTTP_429_TOO_MANY_REQUESTS
+    ]
+    assert int(responses[-1]['Retry-After']) == 30
+
+
+def test_redis_throttle_fails_open(monkeypatch, settings):
+    # arrange
+    def script(keys, args):
+        raise redis.ConnectionError()
+
+    settings.THROTTLE_REDIS = True
+    monkeypatch.setattr(throttling, 'get_gcra_script', lambda: script)
+    monkeypatch.setitem(AnonRateThrottle.THROTTLE_RATES, 'anon', '1/min')
+    view = AnonView.as_view()
+
+    # act
+    responses = [view(APIRequestFactory().get('/')) for _ in range(2)]
+
+    # assert
+    assert [resp.status_code for resp in responses] == [status.HTTP_200_OK, status.HTTP_200_OK]
+
+
+def test_redis_throttle_fails_open_on_timeout(monkeypatch, settings):
+    # arrange: redis does not answer
+    settings.THROTTLE_REDIS = True
+    settings.REDIS_URL = 'redis://10.255.255.1:6379/0'
+    settings.THROTTLE_REDIS_TIMEOUT = 0.1
+    throttling.get_gcra_script.cache_clear()
+    monkeypatch.setitem(AnonRateThrottle.THROTTLE_RATES, 'anon', '1/min')
+    view = AnonView.as_view()
 
+    # act
+    started = time.monotonic()
+    try:
+        resp = view(APIRequestFactory().get('/'))
+        connection_kwargs = throttling.get_gcra_script().registered_client.connection_pool.connection_kwargs
+    finally:
+        throttling.get_gcra_script.cache_clear()
 
-def test_health():
-    api_client = APIClient()
-    url = reverse("health-check")
-    resp = api_client.get(url)
+    # assert: the request waits for the timeout only
     assert resp.status_code == status.HTTP_200_OK
+    assert time.monotonic() - started < 1
+    assert connection_kwargs['socket_connect_timeout'] == connection_kwargs['socket_timeout'] == 0.1
@@ -0,0 +1,146 @@
+import logging
+import math
+import time
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import throttling
+
+from utils.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# GCRA on the redis clock: the key keeps the theoretical arrival time of the next request in microseconds.
+# A request of the cost is allowed if the arrival time, moved by the cost in emission intervals,
+# is within the period from now, then the arrival time is moved by the charge which may be above the cost.
+# Return whether it is allowed, microseconds to wait and the used period.
+GCRA_SCRIPT = """
+redis.replicate_commands()
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000000 + tonumber(time[2])
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local charge = tonumber(ARGV[4])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now)
+local new_tat = tat + interval * cost
+if new_tat - now > period then
+    return {0, new_tat - now - period, tat - now}
+end
+new_tat = tat + interval * charge
+redis.call('SET', KEYS[1], string.format('%.0f', new_tat), 'PX', math.ceil((new_tat - now) / 1000))
+return {1, 0, new_tat - now}
+"""
+
+
+@lru_cache(maxsize=None)
+def get_gcra_script():
+    return get_redis(timeout=settings.THROTTLE_REDIS_TIMEOUT).register_script(GCRA_SCRIPT)
+
+
+def gcra(key, interval, period, cost=1, now=None, charge=None):
+    """
+    The same algorithm on the django cache for environments without redis, it is not atomic
+    between processes. Return whether the request is allowed, microseconds to wait and the used period.
+    """
+    now = now if now is not None else int(time.time() * 1_000_000)
+    tat = max(cache.get(key, now), now)
+    new_tat = tat + interval * cost
+    if new_tat - now > period:
+        return False, new_tat - now - period, tat - now
+    new_tat = tat + interval * (charge if charge is not None else cost)
+    cache.set(key, new_tat, (new_tat - now) / 1_000_000)
+    return True, 0, new_tat - now
+
+
+class GCRAThrottleMixin:
+    """
+    Rate throttle by the generic cell rate algorithm with one counter per client.
+
+    Instead of the history of request times, the key keeps one timestamp which is moved by
+    `duration / num_requests` on every allowed request, so a check is O(1). A burst of `num_requests`
+    is allowed after a quiet period and then one request per `duration / num_requests`, so a window
+    of the duration admits up to `2 * num_requests - 1` requests, while the sustained rate is the limit.
+    With `THROTTLE_REDIS` the check is one atomic lua script in redis shared by all the processes and pods.
+    Throttles fail open when redis is unavailable or does not answer in `THROTTLE_REDIS_TIMEOUT` seconds.
+    """
+    retry_after = None
+
+    def get_cost(self, request, view):
+        return 1
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        period = self.duration * 1_000_000
+        interval = period // self.num_requests
+        charge = max(1, self.get_cost(request, view))
+        # requests above the capacity are allowed with the whole bucket and leave the rest as a debt
+        cost = min(charge, self.num_requests)
+        if settings.THROTTLE_REDIS:
+            try:
+                allowed, retry_after, used = get_gcra_script()(keys=[self.key], args=[interval, period, cost, charge])
+            except redis.RedisError:
+                logger.warning('Throttle %s is not checked: redis is unavailable.', self.key, exc_info=True)
+                return True
+        else:
+            allowed, retry_after, used = gcra(self.key, interval, period, cost, charge=charge)
+
+        self.retry_after = retry_after / 1_000_000
+        self.remaining = max(0, (period - used) // interval)
+        self.reset = math.ceil(used / 1_000_000)
+        return bool(allowed)
+
+    def wait(self):
+        return self.retry_after
+
+
+class AnonRateThrottle(GCRAThrottleMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(GCRAThrottleMixin, throttling.UserRateThrottle):
+    pass
+
+
+class TokenBucketThrottle(GCRAThrottleMixin, throttling.SimpleRateThrottle):
+    """
+    Cost-aware token bucket: the rate `1000/hour` is a bucket of 1000 tokens refilled in an hour,
+    so bursts up to the capacity are allowed with the sustained rate of the refill.
+    A request takes `get_cost()` tokens, a request above the capacity waits for the full bucket
+    and takes the rest of its cost from the next refills. The state of the bucket is kept in the request
+    for the `RateLimit-*` headers, see `RateLimitHeadersMixin`.
+    """
+
+    def get_ident_of(self, request, view):
+        return f'user:{request.user.pk}'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident_of(request, view)}
+
+    def allow_request(self, request, view):
+        allowed = super().allow_request(request, view)
+        if self.retry_after is not None:
+            request.rate_limit = {
+                'RateLimit-Limit': self.num_requests,
+                'RateLimit-Remaining': self.remaining,
+                'RateLimit-Reset': self.reset,
+            }
+        return allowed
+
+
+class RateLimitHeadersMixin:
+    """Viewset which returns `RateLimit-*` headers of the token bucket of the request."""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        for header, value in getattr(request, 'rate_limit', {}).items():
+            response[header] = value
+        return response